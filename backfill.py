@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class BackfillCheckpoints:
+    """Last message ID backfilled per source (a channel or a student's DMs), in SQLite
+
+    A checkpoint only moves past a message once its entry is safely in the
+    backfill queue, so an interrupted run resumes where it stopped.
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                source TEXT PRIMARY KEY,
+                last_message_id INTEGER NOT NULL,
+                scanned INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL
+            )
+        ''')
+        self.conn.commit()
+
+    def get(self, source):
+        row = self.conn.execute('SELECT last_message_id FROM checkpoints WHERE source = ?', (source,)).fetchone()
+        return row[0] if row else None
+
+    def advance(self, source, message_id, scanned):
+        with self.conn:
+            self.conn.execute(
+                '''INSERT INTO checkpoints (source, last_message_id, scanned, updated_at) VALUES (?, ?, ?, ?)
+                   ON CONFLICT(source) DO UPDATE SET
+                       last_message_id = MAX(last_message_id, excluded.last_message_id),
+                       scanned = scanned + excluded.scanned,
+                       updated_at = excluded.updated_at''',
+                (source, message_id, scanned, time.time())
+            )
+
+    def clear(self, sources):
+        with self.conn:
+            self.conn.executemany('DELETE FROM checkpoints WHERE source = ?', [(source,) for source in sources])
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM checkpoints').fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+class BackfillRun:
+    """Streams message history from each source, parses it in a thread pool and queues new entries
+
+    ``sources`` is a list of (name, history) where ``history(after_id)`` returns an
+    async iterator of messages oldest first, resuming after ``after_id`` (None
+    for a source never backfilled). History is read in chunks while up to
+    ``workers`` earlier chunks are parsed off the event loop, so live messages
+    keep flowing. Chunks are settled in order: every entry that isn't a
+    duplicate is handed to ``enqueue`` and then the source's checkpoint moves
+    past the whole chunk, journal or not.
+    """
+
+    def __init__(self, checkpoints, sources, is_candidate, parse, is_duplicate, enqueue, workers=4, chunk_size=100):
+        self.checkpoints = checkpoints
+        self.sources = sources
+        self.is_candidate = is_candidate  # callable(message) -> True for a journal submission worth parsing
+        self.parse = parse  # callable(message) -> parsed_data or None; runs in a worker thread
+        self.is_duplicate = is_duplicate  # callable(message, parsed_data) -> True to skip; runs on the loop
+        self.enqueue = enqueue  # callable(parsed_data); runs on the loop
+        self.workers = max(1, workers)
+        self.chunk_size = max(1, chunk_size)
+        self.sources_done = 0
+        self.current_source = None
+        self.scanned = 0
+        self.candidates = 0
+        self.unparseable = 0
+        self.duplicates = 0
+        self.queued = 0
+        self.errors = []
+        self.started_at = None
+        self.finished_at = None
+        self._executor = None
+
+    def _parse_chunk(self, messages):
+        return [(message, self.parse(message)) for message in messages if self.is_candidate(message)]
+
+    def _settle(self, source, messages, results):
+        for message, parsed_data in results:
+            if parsed_data is None:
+                self.unparseable += 1
+            elif self.is_duplicate(message, parsed_data):
+                self.duplicates += 1
+            else:
+                self.enqueue(parsed_data)
+                self.queued += 1
+        self.candidates += len(results)
+        self.checkpoints.advance(source, messages[-1].id, len(messages))
+
+    async def _backfill_source(self, source, history):
+        loop = asyncio.get_running_loop()
+        in_flight = deque()  # (messages, future) in history order
+        chunk = []
+        async for message in history(self.checkpoints.get(source)):
+            chunk.append(message)
+            self.scanned += 1
+            if len(chunk) < self.chunk_size:
+                continue
+            in_flight.append((chunk, loop.run_in_executor(self._executor, self._parse_chunk, chunk)))
+            chunk = []
+            if len(in_flight) >= self.workers:
+                messages, future = in_flight.popleft()
+                self._settle(source, messages, await future)
+        if chunk:
+            in_flight.append((chunk, loop.run_in_executor(self._executor, self._parse_chunk, chunk)))
+        while in_flight:
+            messages, future = in_flight.popleft()
+            self._settle(source, messages, await future)
+
+    async def run(self):
+        self.started_at = time.time()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='backfill')
+        try:
+            for source, history in self.sources:
+                self.current_source = source
+                try:
+                    await self._backfill_source(source, history)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # One unreadable channel shouldn't end the run; its checkpoint stays put for a retry
+                    logger.warning("⚠️ Backfill of %s stopped early: %s", source, e)
+                    self.errors.append(f"{source}: {e}")
+                self.sources_done += 1
+            self.current_source = None
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self.finished_at = time.time()
+        logger.info("📥 Backfill finished: %s", self.stats())
+        return self
+
+    @property
+    def running(self):
+        return self.started_at is not None and self.finished_at is None
+
+    def stats(self):
+        elapsed = (self.finished_at or time.time()) - self.started_at if self.started_at else 0.0
+        return {
+            'sources': f'{self.sources_done}/{len(self.sources)}',
+            'current_source': self.current_source,
+            'scanned': self.scanned,
+            'journal_messages': self.candidates,
+            'unparseable': self.unparseable,
+            'duplicates': self.duplicates,
+            'queued': self.queued,
+            'errors': len(self.errors),
+            'elapsed_seconds': round(elapsed, 1),
+            'scan_rate_per_sec': round(self.scanned / elapsed, 1) if elapsed else 0.0,
+        }
@@ -0,0 +1,221 @@
+"""Backfill benchmark: !backfill's engine over tens of thousands of history messages
+
+Builds a journal channel whose history holds N messages (journal entries mixed
+with chatter, some already in Notion), then drives discord_monitor's backfill
+through three phases against benchmarks/fake_notion.py:
+
+  scan      read and parse history until it's interrupted halfway through
+  resume    a second run picking up from the checkpoints, with a burst of live
+            messages going through on_message at the same time
+  write     the backfill queue draining to Notion behind the live queue
+
+It checks that the two runs together queue every missing entry exactly once.
+
+Usage: python benchmarks/bench_backfill.py [--messages N] [--students N] [--existing F]
+                                           [--workers N] [--rate R] [--write-seconds S]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import discord  # noqa: E402
+
+from bench_bot import MESSAGE_TEMPLATE, StubChannel, StubMessage, StubUser, percentile  # noqa: E402
+from fake_notion import FakeNotion  # noqa: E402
+
+BENCH_CHANNEL_ID = 424242
+DATABASE_ID = 'bench-db'
+FIRST_DAY = datetime(2025, 3, 3, 9, tzinfo=timezone.utc)  # A Monday
+
+
+class HistoryChannel(StubChannel):
+    """A channel whose history() pages through a fixed message list like discord.py does"""
+
+    def __init__(self, channel_id, messages, page_latency):
+        super().__init__(channel_id)
+        self.messages = messages
+        self.page_latency = page_latency
+        self.pages = 0
+
+    async def history(self, limit=None, after=None, oldest_first=True):
+        after_id = after.id if isinstance(after, discord.Object) else discord.utils.time_snowflake(after)
+        for index, message in enumerate(message for message in self.messages if message.id > after_id):
+            if index % 100 == 0:
+                self.pages += 1  # One API request per 100 messages
+                await asyncio.sleep(self.page_latency)
+            yield message
+
+
+def build_history(args, students):
+    """(messages, journal keys) - one journal per student per workday plus chatter, oldest first"""
+    messages, journal_keys = [], []
+    journals = args.messages // 2
+    for index in range(journals):
+        student = students[index % len(students)]
+        day = index // len(students)
+        posted = FIRST_DAY + timedelta(days=day // 5 * 7 + day % 5, seconds=index % len(students))
+        for content in (
+            MESSAGE_TEMPLATE.format(date=posted.strftime('%Y-%m-%d'), name=student.name, hours=index % 10, index=index),
+            f"Anyone else seeing the SIEM lag today? ({index})",
+        ):
+            message = StubMessage(discord.utils.time_snowflake(posted) + len(messages), content, student, None)
+            message.created_at = posted
+            messages.append(message)
+            posted += timedelta(milliseconds=1)
+        journal_keys.append((str(student.id), (FIRST_DAY + timedelta(days=day // 5 * 7 + day % 5)).strftime('%Y-%m-%d')))
+    return messages, journal_keys
+
+
+async def run(args, dm, fake):
+    students = [StubUser(10_000 + index, f"student{index:04d}") for index in range(args.students)]
+    for student in students:
+        # Students already known from the first run get their DMs read too; these are empty
+        student.dm_channel = HistoryChannel(student.id, [], args.page_latency)
+    dm.bot._connection.user = StubUser(1, 'Elliot Alderson')
+    messages, journal_keys = build_history(args, students)
+    channel = HistoryChannel(BENCH_CHANNEL_ID, messages, args.page_latency)
+    for message in messages:
+        message.channel = channel
+    dm.bot.get_channel = {BENCH_CHANNEL_ID: channel}.get
+    dm.bot.get_user = {student.id: student for student in students}.get
+    cohort = dm.cohort_router.default
+
+    # Entries already in Notion: the first --existing fraction of the journal keys
+    existing_count = int(len(journal_keys) * args.existing)
+    for user_id, entry_date in journal_keys[:existing_count]:
+        fake.add_page({
+            'Date': {'date': {'start': entry_date}},
+            'Discord User ID': {'rich_text': [{'text': {'content': user_id}}]},
+        }, DATABASE_ID)
+    missing = len(set(journal_keys[existing_count:]))
+    start = FIRST_DAY - timedelta(days=1)
+    print(f"{len(messages)} messages ({len(journal_keys)} journal entries, {existing_count} already in Notion, "
+          f"{missing} missing), {args.workers} parser threads\n")
+    print(f"{'phase':<8}{'scanned':>9}{'seconds':>9}{'msgs/s':>10}{'queued':>8}{'dupes':>7}{'pages':>7}  notes")
+
+    def line(phase, run, elapsed, notes=''):
+        stats = run.stats()
+        print(f"{phase:<8}{stats['scanned']:>9}{elapsed:>9.2f}{stats['scanned'] / elapsed if elapsed else 0:>10.0f}"
+              f"{stats['queued']:>8}{stats['duplicates']:>7}{channel.pages:>7}  {notes}")
+
+    # Scan: interrupted halfway, as if the bot restarted or an admin ran !backfill stop
+    existing = await dm.existing_entry_keys(cohort, start.strftime('%Y-%m-%d'))
+    first = dm.build_backfill(cohort, dm.backfill_sources(cohort, start), existing)
+    task = asyncio.create_task(first.run())
+    started = time.perf_counter()
+    while first.scanned < len(messages) // 2 and not task.done():
+        await asyncio.sleep(0.001)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    line('scan', first, time.perf_counter() - started, f"stopped at checkpoint {dm.backfill_checkpoints.get(f'channel:{BENCH_CHANNEL_ID}')}")
+
+    # Resume from the checkpoint while live submissions keep arriving
+    channel.pages = 0
+    existing = await dm.existing_entry_keys(cohort, start.strftime('%Y-%m-%d'))
+    second = dm.build_backfill(cohort, dm.backfill_sources(cohort, start), existing)
+    live_latencies = []
+
+    async def live_message(index):
+        student = students[index % len(students)]
+        message = StubMessage(10 ** 18 + index, MESSAGE_TEMPLATE.format(date='2026-01-05', name=student.name, hours=8, index=index),
+                              student, channel)
+        started = time.perf_counter()
+        await dm.on_message(message)
+        live_latencies.append(time.perf_counter() - started)
+
+    async def live_traffic():
+        for index in range(args.live):
+            await live_message(index)
+            await asyncio.sleep(0.002)
+
+    started = time.perf_counter()
+    await asyncio.gather(second.run(), live_traffic())
+    line('resume', second, time.perf_counter() - started,
+         f"live on_message p50 {percentile(live_latencies, 0.5) * 1e3:.2f}ms / p99 {percentile(live_latencies, 0.99) * 1e3:.2f}ms "
+         f"({len(live_latencies)} during backfill)")
+
+    queued = [(payload['discord_user_id'], payload['date']) for payload in dm.backfill_queue.pending_payloads()]
+    exact = len(queued) == len(set(queued)) == missing
+    print(f"\nQueued {len(queued)} backfilled entries ({len(set(queued))} distinct, {missing} expected): "
+          f"{'OK' if exact else 'MISMATCH'}")
+
+    # Write: live queue first, then backfilled entries at BACKFILL_RATE
+    dm.ingest_worker.start()
+    dm.backfill_worker.start()
+    before = fake.counts['created']
+    backlog = dm.backfill_queue.depth()
+    started = time.perf_counter()
+    await asyncio.sleep(args.write_seconds)
+    elapsed = time.perf_counter() - started
+    await dm.backfill_worker.stop()
+    await dm.ingest_worker.stop()
+    written = fake.counts['created'] - before
+    backfilled = backlog - dm.backfill_queue.depth()
+    print(f"Wrote {written - backfilled} live and {backfilled} backfilled entries in {elapsed:.1f}s "
+          f"(backfill {backfilled / elapsed:.1f}/s, capped at {args.rate:g}/s); "
+          f"live queue {dm.ingest_queue.depth()}, backfill queue {dm.backfill_queue.depth()} left")
+    return exact
+
+
+async def main_async(args):
+    fake = await FakeNotion(latency=args.latency).start()
+    data_dir = tempfile.mkdtemp(prefix='bench-backfill-')
+    os.environ.update({
+        'DISCORD_TOKEN': 'bench',
+        'NOTION_TOKEN': 'bench',
+        'NOTION_DATABASE_ID': DATABASE_ID,
+        'NOTION_API_URL': fake.base_url,
+        'NOTION_RATE_LIMIT': '100',
+        'NOTION_MIRROR': 'false',
+        'CHANNEL_ID': str(BENCH_CHANNEL_ID),
+        'BOT_DATA_DIR': data_dir,
+        'METRICS_PORT': '0',
+        'BACKFILL_WORKERS': str(args.workers),
+        'BACKFILL_RATE': str(args.rate),
+    })
+    import discord_monitor as dm  # Reads its configuration from the environment at import
+
+    try:
+        return await run(args, dm, fake)
+    finally:
+        for closeable in (dm.ingest_queue, dm.backfill_queue, dm.backfill_checkpoints, dm.delivery_ledger, dm.processed_messages):
+            closeable.close()
+        for cohort in dm.cohort_router:
+            cohort.sent_update_log.close()
+            cohort.mirror.close()
+            await cohort.notion.close()
+        await fake.stop()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=40000, help='messages in the channel history (half are journals)')
+    parser.add_argument('--students', type=int, default=200, help='distinct stub users')
+    parser.add_argument('--existing', type=float, default=0.3, help='fraction of journal entries already in Notion')
+    parser.add_argument('--workers', type=int, default=4, help='backfill parser threads')
+    parser.add_argument('--page-latency', type=float, default=0.005, help='stub Discord latency per 100-message history page (s)')
+    parser.add_argument('--live', type=int, default=200, help='live messages sent while the resumed backfill runs')
+    parser.add_argument('--latency', type=float, default=0.005, help='Notion stand-in latency per request (s)')
+    parser.add_argument('--rate', type=float, default=20, help='BACKFILL_RATE, backfilled Notion writes/s')
+    parser.add_argument('--write-seconds', type=float, default=5, help='how long to let the queues drain')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s %(name)s: %(message)s')
+    sys.exit(0 if asyncio.run(main_async(args)) else 1)
+
+
+if __name__ == '__main__':
+    main()
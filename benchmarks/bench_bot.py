@@ -0,0 +1,281 @@
+"""End-to-end load benchmark: discord_monitor handlers against a local Notion stand-in
+
+Drives three phases through the real bot code, with Discord replaced by stub
+users/channels and Notion by benchmarks/fake_notion.py:
+
+  burst     thousands of "Daily CISO Update" messages through on_message at once
+  ingest    the write-behind worker draining them into (fake) Notion
+  delivery  a delivery day of N answered entries through deliver_responses
+
+Each phase reports throughput, p50/p99 latency and traced memory.
+
+Usage: python benchmarks/bench_bot.py [--messages N] [--entries N] [--latency S]
+                                      [--throttle-rate F] [--page-size N] [--mirror]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_notion import FakeNotion  # noqa: E402
+
+BENCH_CHANNEL_ID = 424242
+DATABASE_ID = 'bench-db'
+
+MESSAGE_TEMPLATE = """Daily CISO Update - {date}
+Student: {name}
+Hours Worked: {hours}
+Completed Today:
+- Configured firewall rules for DMZ segment {index}
+- Analyzed network traffic logs
+
+Current Findings/Issues:
+- Detected unusual port scanning activity
+
+Tomorrow's Plan:
+- Investigate port scanning source
+
+CISO Input Needed:
+- Should we block the suspicious IP immediately?
+"""
+
+RESPONSE_TEMPLATE = (
+    "Good work on the firewall rules, {name}. Block the IP at the edge, then open a ticket "
+    "so the SOC can correlate the scan with last week's alerts.\n\n"
+    "For tomorrow, start from the netflow data rather than the IDS alerts. " * 3
+)
+
+
+class StubUser:
+    """Just enough of discord.User/Member for the handlers"""
+
+    def __init__(self, user_id, name, dm_latency=0.0):
+        self.id = user_id
+        self.name = name
+        self.display_name = name
+        self.global_name = name
+        self.bot = False
+        self.guild = None
+        self.dm_latency = dm_latency
+        self.received = 0
+
+    async def send(self, content):
+        if self.dm_latency:
+            await asyncio.sleep(self.dm_latency)
+        self.received += 1
+
+
+class StubChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+        self.sent = 0
+
+    async def send(self, content):
+        self.sent += 1
+
+
+class StubMessage:
+    def __init__(self, message_id, content, author, channel):
+        self.id = message_id
+        self.content = content
+        self.author = author
+        self.channel = channel
+        self.guild = None
+        self._state = None  # Read by commands.Context; no command ever runs
+        self.reactions = []
+
+    async def add_reaction(self, emoji):
+        self.reactions.append(emoji)
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def histogram_line(histogram, **labels):
+    """(count, p50, p99) of one metrics.Histogram series"""
+    for key, (count, _, p50, p99) in histogram.snapshot().items():
+        if dict(key) == labels:
+            return count, p50, p99
+    return 0, 0.0, 0.0
+
+
+def report(phase, count, elapsed, p50, p99, memory, extra=''):
+    current, peak = memory
+    rate = count / elapsed if elapsed else 0.0
+    print(f"{phase:<10}{count:>8}{elapsed:>10.2f}{rate:>12.1f}{p50 * 1e3:>10.2f}{p99 * 1e3:>10.2f}"
+          f"{current / 1e6:>10.1f}{peak / 1e6:>10.1f}  {extra}")
+
+
+def traced():
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    return current, peak
+
+
+async def wait_until(predicate, timeout):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+
+async def run(args, dm, fake):
+    users = {
+        10_000 + index: StubUser(10_000 + index, f"student{index:04d}", args.dm_latency)
+        for index in range(args.students)
+    }
+    # The stubs stand in for discord.py's user cache; fetch_user is never reached
+    dm.bot.get_user = users.get
+    cohort = dm.cohort_router.default
+    dm.bot._connection.user = StubUser(1, 'Elliot Alderson')  # bot.user, normally set at login
+    channel = StubChannel(BENCH_CHANNEL_ID)
+    students = list(users.values())
+    burst_date = '2025-06-12'
+    delivery_date = '2025-06-13'
+
+    print(f"{'phase':<10}{'items':>8}{'seconds':>10}{'items/s':>12}{'p50 ms':>10}{'p99 ms':>10}"
+          f"{'mem MB':>10}{'peak MB':>10}")
+    tracemalloc.start()
+
+    # Burst: every message handled concurrently, as if they all landed in one gateway flush
+    messages = [
+        StubMessage(
+            1_000_000 + index,
+            MESSAGE_TEMPLATE.format(date=burst_date, name=students[index % len(students)].name,
+                                    hours=index % 10, index=index),
+            students[index % len(students)],
+            channel
+        )
+        for index in range(args.messages)
+    ]
+    latencies = []
+
+    async def handle(message):
+        started = time.perf_counter()
+        await dm.on_message(message)
+        latencies.append(time.perf_counter() - started)
+
+    traced()
+    started = time.perf_counter()
+    await asyncio.gather(*(handle(message) for message in messages))
+    elapsed = time.perf_counter() - started
+    queued = sum(1 for message in messages if '✅' in message.reactions)
+    report('burst', len(messages), elapsed, percentile(latencies, 0.5), percentile(latencies, 0.99), traced(),
+           f"queued={queued}")
+
+    # Ingest: write-behind drain of the burst into Notion
+    started = time.perf_counter()
+    dm.ingest_worker.start()
+    drained = await wait_until(lambda: dm.ingest_queue.depth() == 0, args.timeout)
+    elapsed = time.perf_counter() - started
+    await dm.ingest_worker.stop()
+    count, p50, p99 = histogram_line(dm.NOTION_REQUEST_SECONDS, endpoint='POST /pages', status='200')
+    report('ingest', count, elapsed, p50, p99, traced(),
+           f"created={fake.counts['created']}" + ('' if drained else ' (timed out)'))
+
+    # Delivery: N answered entries for one day, then the Response Sent updates
+    for index in range(args.entries):
+        student = students[index % len(students)]
+        fake.add_page({
+            'Date': {'date': {'start': delivery_date}},
+            'Student Name': {'title': [{'text': {'content': student.name}}]},
+            'Discord User ID': {'rich_text': [{'text': {'content': str(student.id)}}]},
+            'Discord Username': {'rich_text': [{'text': {'content': student.name}}]},
+            'Discord Display Name': {'rich_text': [{'text': {'content': student.name}}]},
+            'Hours Worked': {'number': 8},
+            'CISO Response': {'rich_text': [{'text': {'content': RESPONSE_TEMPLATE.format(name=student.name)}}]},
+            'Response Sent': {'checkbox': False},
+            'Status': {'select': {'name': 'New'}},
+        }, DATABASE_ID)
+    if dm.MIRROR_ENABLED:
+        await cohort.mirror_sync.sync_now(full=True)
+
+    cohort.sent_updater.start()
+    started = time.perf_counter()
+    result = await dm.deliver_responses(delivery_date)
+    delivered = time.perf_counter() - started
+    await cohort.sent_updater.wait_idle(args.timeout)
+    elapsed = time.perf_counter() - started
+    await cohort.sent_updater.stop()
+    count, p50, p99 = histogram_line(dm.DM_SEND_SECONDS)
+    report('delivery', result.sent_count, delivered, p50, p99, traced(),
+           f"dms={count} failed={result.failed_count} skipped={result.skipped_count}")
+    count, p50, p99 = histogram_line(dm.NOTION_REQUEST_SECONDS, endpoint='PATCH /pages/{id}', status='200')
+    report('mark_sent', count, elapsed, p50, p99, traced(), f"updated={fake.counts['updated']}")
+
+    tracemalloc.stop()
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+    print(f"\nNotion stand-in: {fake.counts}")
+    print(f"Notion client:   {cohort.notion.stats()}")
+    print(f"Max RSS: {max_rss / 1024:.1f} MB (tracemalloc adds its own overhead)")
+
+
+async def main_async(args):
+    fake = await FakeNotion(latency=args.latency, jitter=args.jitter, throttle_rate=args.throttle_rate,
+                            retry_after=args.retry_after).start()
+    data_dir = tempfile.mkdtemp(prefix='bench-bot-')
+    os.environ.update({
+        'DISCORD_TOKEN': 'bench',
+        'NOTION_TOKEN': 'bench',
+        'NOTION_DATABASE_ID': DATABASE_ID,
+        'NOTION_API_URL': fake.base_url,
+        'NOTION_RATE_LIMIT': str(args.rate_limit),
+        'NOTION_PAGE_SIZE': str(args.page_size),
+        'NOTION_MIRROR': 'true' if args.mirror else 'false',
+        'CHANNEL_ID': str(BENCH_CHANNEL_ID),
+        'BOT_DATA_DIR': data_dir,
+        'METRICS_PORT': '0',
+    })
+    import discord_monitor as dm  # Reads its configuration from the environment at import
+
+    try:
+        await run(args, dm, fake)
+    finally:
+        for closeable in (dm.ingest_queue, dm.backfill_queue, dm.backfill_checkpoints, dm.delivery_ledger, dm.processed_messages):
+            closeable.close()
+        for cohort in dm.cohort_router:
+            cohort.sent_update_log.close()
+            cohort.mirror.close()
+            await cohort.notion.close()
+        await fake.stop()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=2000, help='messages in the burst')
+    parser.add_argument('--students', type=int, default=200, help='distinct stub users')
+    parser.add_argument('--entries', type=int, default=500, help='answered entries on the delivery day')
+    parser.add_argument('--latency', type=float, default=0.02, help='Notion stand-in latency per request (s)')
+    parser.add_argument('--jitter', type=float, default=0.01, help='extra random latency per request (s)')
+    parser.add_argument('--throttle-rate', type=float, default=0.02, help='fraction of requests answered 429')
+    parser.add_argument('--retry-after', type=float, default=0.1, help='Retry-After sent with each 429 (s)')
+    parser.add_argument('--rate-limit', type=float, default=50, help='client token bucket, requests/s')
+    parser.add_argument('--page-size', type=int, default=100, help='rows per query page')
+    parser.add_argument('--dm-latency', type=float, default=0.01, help='stub Discord DM latency (s)')
+    parser.add_argument('--mirror', action='store_true', help='serve delivery reads from the local mirror')
+    parser.add_argument('--timeout', type=float, default=600, help='give up waiting for a drain after this long')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s %(name)s: %(message)s')
+    logging.getLogger('notion_client').setLevel(logging.ERROR)  # Injected 429s are counted in the summary instead
+    asyncio.run(main_async(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""Memory per guild member: default mode vs LOW_MEMORY_MODE
+
+Each mode runs in its own subprocess that imports discord_monitor with that
+mode's environment, feeds the bot's real connection state a GUILD_CREATE-style
+payload of N members, then does what the bot does with them: builds the member
+name index, indexes the known students' journal names and resolves every known
+student for delivery. tracemalloc measures each step.
+
+Usage: python benchmarks/bench_memory.py [--members N] [--students N] [--guilds N]
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+
+MODES = {'default': 'false', 'low-memory': 'true'}
+
+
+def guild_payload(guild_id, first_user, count):
+    """GUILD_CREATE data with ``count`` members, shaped like what the gateway sends"""
+    return {
+        'id': str(guild_id),
+        'name': f'guild-{guild_id}',
+        'owner_id': '1',
+        'member_count': count,
+        'roles': [{
+            'id': str(guild_id), 'name': '@everyone', 'permissions': '0', 'position': 0, 'color': 0,
+            'hoist': False, 'managed': False, 'mentionable': False,
+        }],
+        'members': [
+            {
+                'user': {
+                    'id': str(first_user + index),
+                    'username': f'member{first_user + index}',
+                    'global_name': f'Member {first_user + index}',
+                    'discriminator': '0',
+                    'avatar': None,
+                },
+                'nick': None,
+                'roles': [],
+                'joined_at': '2025-01-01T00:00:00+00:00',
+                'deaf': False,
+                'mute': False,
+                'flags': 0,
+            }
+            for index in range(count)
+        ],
+        'channels': [], 'threads': [], 'emojis': [], 'stickers': [], 'features': [],
+    }
+
+
+def traced_now():
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+async def measure(args):
+    """Runs inside a subprocess whose environment already selects the mode"""
+    import discord
+    import discord_monitor as dm
+
+    state = dm.bot._connection
+    first_user = 10 ** 17
+    per_guild = args.members // args.guilds
+    payloads = [guild_payload(index + 1, first_user + index * per_guild, per_guild) for index in range(args.guilds)]
+    students = [first_user + index * (args.members // args.students) for index in range(args.students)]
+
+    async def fetch_user(user_id):
+        # What bot.fetch_user builds from GET /users/{id}, minus the HTTP round trip
+        return discord.User(state=state, data={
+            'id': str(user_id), 'username': f'member{user_id}', 'global_name': f'Member {user_id}',
+            'discriminator': '0', 'avatar': None,
+        })
+    dm.user_cache.fetch = fetch_user
+
+    tracemalloc.start()
+    result = {}
+    before = traced_now()
+    for payload in payloads:
+        state._add_guild_from_data(payload)
+    del payloads
+    result['gateway_cache'] = traced_now() - before
+
+    before = traced_now()
+    dm.member_index.build(dm.bot.guilds)
+    for user_id in students:
+        dm.member_index.add_alias(f'Student {user_id}', user_id)
+    result['name_index'] = traced_now() - before
+
+    before = traced_now()
+    for user_id in students:
+        await dm.resolve_user(user_id)
+    result['user_cache'] = traced_now() - before
+    tracemalloc.stop()
+
+    result['cached_members'] = sum(len(guild.members) for guild in dm.bot.guilds)
+    result['indexed_names'] = len(dm.member_index)
+    result['fetched_users'] = len(dm.user_cache)
+    for cohort in dm.cohort_router:
+        await cohort.notion.close()
+    print(json.dumps(result))
+
+
+def run_mode(mode, args):
+    data_dir = tempfile.mkdtemp(prefix='bench-memory-')
+    env = dict(
+        os.environ,
+        DISCORD_TOKEN='bench', NOTION_TOKEN='bench', NOTION_DATABASE_ID='bench-db',
+        BOT_DATA_DIR=data_dir, METRICS_PORT='0', ENABLE_MEMBERS_INTENT='true',
+        LOW_MEMORY_MODE=MODES[mode],
+    )
+    try:
+        output = subprocess.run(
+            [sys.executable, __file__, '--measure', '--members', str(args.members),
+             '--students', str(args.students), '--guilds', str(args.guilds)],
+            env=env, check=True, capture_output=True, text=True
+        ).stdout
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--members', type=int, default=20000, help='guild members across all guilds')
+    parser.add_argument('--students', type=int, default=200, help='known students (members with journal entries)')
+    parser.add_argument('--guilds', type=int, default=2, help='guilds the members are spread over')
+    parser.add_argument('--measure', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        asyncio.run(measure(args))
+        return
+
+    print(f"{args.members} members in {args.guilds} guilds, {args.students} known students\n")
+    print(f"{'mode':<12}{'gateway KB':>12}{'index KB':>10}{'users KB':>10}{'total KB':>10}{'B/member':>10}"
+          f"{'members':>9}{'names':>7}{'fetched':>9}")
+    for mode in MODES:
+        result = run_mode(mode, args)
+        total = result['gateway_cache'] + result['name_index'] + result['user_cache']
+        print(f"{mode:<12}{result['gateway_cache'] / 1024:>12.0f}{result['name_index'] / 1024:>10.0f}"
+              f"{result['user_cache'] / 1024:>10.0f}{total / 1024:>10.0f}{total / args.members:>10.1f}"
+              f"{result['cached_members']:>9}{result['indexed_names']:>7}{result['fetched_users']:>9}")
+
+
+if __name__ == '__main__':
+    main()
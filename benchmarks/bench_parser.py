@@ -0,0 +1,299 @@
+"""Parser benchmark and regression gate for ciso_parser
+
+Three parts, all run by default:
+
+  corpus     per-case timing of the single-pass parser against the original
+             six-regex parser on Discord-sized messages (well-formed, missing
+             sections, unicode, adversarial)
+  expected   field-by-field checks that each corpus case still parses the same
+             (tests/test_parser.py runs the same cases under pytest)
+  scaling    each stress shape timed at two sizes; time must grow roughly
+             linearly, which catches catastrophic backtracking on any machine
+
+--save-baseline FILE records per-case timings; --baseline FILE fails any case
+that got slower than --tolerance times its recorded time. The exit status is
+non-zero when any gate fails, so this can run in CI.
+
+Usage: python benchmarks/bench_parser.py [--number N] [--size CHARS] [--factor K]
+                                         [--baseline FILE | --save-baseline FILE] [--tolerance X]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ciso_parser import parse_sections  # noqa: E402
+
+
+def legacy_parse(message_content):
+    """The pre-tokenizer parse_ciso_update, minus the Discord author fallbacks"""
+    date_match = re.search(r'Daily CISO Update - (.+?)(?:\n|$)', message_content, re.IGNORECASE)
+    date_str = None
+    if date_match:
+        date_str = date_match.group(1).strip()
+        try:
+            if ',' in date_str:
+                parsed_date = datetime.strptime(date_str, '%B %d, %Y')
+            elif '/' in date_str:
+                try:
+                    parsed_date = datetime.strptime(date_str, '%m/%d/%Y')
+                except ValueError:
+                    parsed_date = datetime.strptime(date_str, '%d/%m/%Y')
+            elif '-' in date_str:
+                parsed_date = datetime.strptime(date_str, '%Y-%m-%d')
+            else:
+                parsed_date = None
+            date_str = parsed_date.strftime('%Y-%m-%d') if parsed_date else None
+        except ValueError:
+            date_str = None
+    student_match = re.search(r'Student:\s*(.+?)(?:\n|$)', message_content, re.IGNORECASE)
+    hours_match = re.search(r'Hours Worked:\s*(\d+)', message_content, re.IGNORECASE)
+    completed_match = re.search(r'Completed Today:\s*(.*?)(?=Current Findings|Tomorrow\'s Plan|CISO Input|$)', message_content, re.DOTALL | re.IGNORECASE)
+    findings_match = re.search(r'Current Findings/Issues:\s*(.*?)(?=Tomorrow\'s Plan|CISO Input|$)', message_content, re.DOTALL | re.IGNORECASE)
+    tomorrow_match = re.search(r'Tomorrow\'s Plan:\s*(.*?)(?=CISO Input|$)', message_content, re.DOTALL | re.IGNORECASE)
+    ciso_match = re.search(r'CISO Input Needed:\s*(.*?)$', message_content, re.DOTALL | re.IGNORECASE)
+    return {
+        'date': date_str,
+        'student_name': student_match.group(1).strip() if student_match else None,
+        'hours_worked': int(hours_match.group(1)) if hours_match else 0,
+        'completed_today': completed_match.group(1).strip() if completed_match else "",
+        'current_findings': findings_match.group(1).strip() if findings_match else "",
+        'tomorrow_plan': tomorrow_match.group(1).strip() if tomorrow_match else "",
+        'ciso_input': ciso_match.group(1).strip() if ciso_match else "",
+    }
+
+
+WELL_FORMED = """Daily CISO Update - 2025-06-12
+Student: John Smith
+Hours Worked: 8
+Completed Today:
+- Configured firewall rules for DMZ
+- Analyzed network traffic logs
+- Completed SIEM dashboard setup
+
+Current Findings/Issues:
+- Detected unusual port scanning activity
+- Need clarification on incident response procedures
+
+Tomorrow's Plan:
+- Investigate port scanning source
+- Update security policies documentation
+
+CISO Input Needed:
+- Should we block the suspicious IP immediately?
+"""
+
+FILLER = "Reviewed SIEM alerts, tuned correlation rules and documented false positives. "
+
+
+def build_corpus():
+    """Realistic and adversarial messages, all bounded by Discord's 4000-char (Nitro) limit"""
+    return {
+        'well_formed': WELL_FORMED,
+        'named_date': WELL_FORMED.replace('2025-06-12', 'June 12, 2025'),
+        'slash_date': WELL_FORMED.replace('2025-06-12', '13/06/2025'),
+        'missing_later_sections': WELL_FORMED.split("Current Findings")[0],
+        'long_completed_4000': (
+            "Daily CISO Update - 2025-06-12\nStudent: Jane Doe\nHours Worked: 9\nCompleted Today:\n"
+            + (FILLER * 60)[:3900]
+        ),
+        'long_single_line_4000': "Daily CISO Update - 2025-06-12 " + ("x" * 3970),
+        'header_words_in_body_4000': (
+            "Daily CISO Update - 2025-06-12\nStudent: Sam\nHours Worked: 6\nCompleted Today:\n"
+            + ("asked about current findings and tomorrow plans, ciso inputs pending. " * 60)[:3900]
+        ),
+        'header_only': "Daily CISO Update - 2025-06-12\n",
+        'missing_student_and_hours': WELL_FORMED.replace("Student: John Smith\nHours Worked: 8\n", ""),
+        'out_of_order': (
+            "Daily CISO Update - 2025-06-12\nCISO Input Needed:\n- none\nTomorrow's Plan:\n- patch\n"
+            "Student: Ana\nHours Worked: 5\nCompleted Today:\n- audit\n"
+        ),
+        'markdown_bold': (
+            "**Daily CISO Update - 2025-06-12**\n**Student:** Lee\n**Hours Worked:** 4\n"
+            "**Completed Today:** hardening\n**Tomorrow's Plan:** more hardening\n**CISO Input Needed:** no"
+        ),
+        'unicode_sections': (
+            "Daily CISO Update - 2025-06-12\nStudent: Zoë Ñúñez 李小龙 🚀\nHours Worked: 7\nCompleted Today:\n"
+            + ("- 修复漏洞 🔐 réseau sécurisé, проверка журналов\n" * 40)[:1500]
+            + "\nCurrent Findings/Issues:\n- لا شيء\nTomorrow’s Plan:\n- 🛡️\nCISO Input Needed:\n- なし\n"
+        ),
+        'unicode_length_changing': (
+            # 'İ' lowercases to two code points, which sends the tokenizer down its case-insensitive path
+            "Daily CISO Update - 2025-06-12\nStudent: İlkay Çelik\nHours Worked: 6\nCompleted Today:\n"
+            + ("İzmir SOC shift, İOC triage. " * 130)[:3500] + "\nCISO Input Needed:\n- yes\n"
+        ),
+        'bullet_runs_4000': (
+            "Daily CISO Update - 2025-06-12\nStudent: Kim\nHours Worked: 3\nCompleted Today:\n"
+            + "notes " + ("* * * > ciso input " * 220)[:3900]
+        ),
+    }
+
+
+# Fields each corpus case must keep producing; a parser change that alters any of them is a regression
+EXPECTED = {
+    'well_formed': {
+        'date': '2025-06-12', 'student_name': 'John Smith', 'hours_worked': 8,
+        'ciso_input': '- Should we block the suspicious IP immediately?', 'missing_sections': [],
+    },
+    'named_date': {'date': '2025-06-12'},
+    'slash_date': {'date': '2025-06-13'},
+    'missing_later_sections': {
+        'student_name': 'John Smith', 'current_findings': '', 'tomorrow_plan': '', 'ciso_input': '',
+        'missing_sections': ['Current Findings/Issues', "Tomorrow's Plan", 'CISO Input Needed'],
+    },
+    'long_single_line_4000': {'student_name': None, 'completed_today': ''},
+    'header_words_in_body_4000': {'student_name': 'Sam', 'current_findings': '', 'ciso_input': ''},
+    'header_only': {'date': '2025-06-12', 'missing_sections': [
+        'Student', 'Hours Worked', 'Completed Today', 'Current Findings/Issues', "Tomorrow's Plan", 'CISO Input Needed',
+    ]},
+    'missing_student_and_hours': {'student_name': None, 'hours_worked': 0, 'missing_sections': ['Student', 'Hours Worked']},
+    'out_of_order': {
+        'student_name': 'Ana', 'hours_worked': 5, 'completed_today': '- audit',
+        'tomorrow_plan': '- patch', 'ciso_input': '- none',
+    },
+    'markdown_bold': {
+        'date': '2025-06-12', 'student_name': 'Lee', 'hours_worked': 4,
+        'completed_today': 'hardening', 'tomorrow_plan': 'more hardening', 'ciso_input': 'no',
+    },
+    'unicode_sections': {
+        'student_name': 'Zoë Ñúñez 李小龙 🚀', 'hours_worked': 7, 'current_findings': '- لا شيء',
+        'tomorrow_plan': '- 🛡️', 'ciso_input': '- なし', 'missing_sections': [],
+    },
+    'unicode_length_changing': {'student_name': 'İlkay Çelik', 'hours_worked': 6, 'ciso_input': '- yes'},
+    'bullet_runs_4000': {'student_name': 'Kim', 'ciso_input': '', 'missing_sections': [
+        'Current Findings/Issues', "Tomorrow's Plan", 'CISO Input Needed',
+    ]},
+}
+
+
+def _fill(unit, size):
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+# Shapes that would turn super-linear under a backtracking regex or a quadratic scan;
+# each builds a message of roughly ``size`` characters
+STRESS = {
+    'missing_sections_huge_body': lambda size: (
+        "Daily CISO Update - 2025-06-12\nStudent: Jane\nHours Worked: 9\nCompleted Today:\n" + _fill(FILLER, size)
+    ),
+    'single_line_no_newlines': lambda size: "Daily CISO Update - 2025-06-12 " + "x" * size,
+    'header_words_without_separators': lambda size: (
+        "Daily CISO Update - 2025-06-12\nCompleted Today:\n"
+        + _fill("student hours worked current findings tomorrow's plan ciso input ", size)
+    ),
+    'header_prefix_then_whitespace': lambda size: _fill("daily " + " " * 60 + "ciso \t\t" + " " * 60, size),
+    'bullet_runs_before_headers': lambda size: "notes " + _fill("* * * * > ciso input ", size),
+    'repeated_known_headers': lambda size: _fill("Completed Today:\nStudent: x\nCISO Input Needed:\n", size),
+    'unicode_body': lambda size: (
+        "Daily CISO Update - 2025-06-12\nCompleted Today:\n" + _fill("修复漏洞 🔐 проверка журналов ", size)
+    ),
+    'unicode_length_changing_body': lambda size: (
+        "Daily CISO Update - 2025-06-12\nCompleted Today:\n" + _fill("İzmir İOC triage ", size)
+    ),
+}
+
+
+def time_parse(parse, message, number, repeat=3):
+    """Best-of-repeat seconds per parse, with the date cache cold for each repeat's first call"""
+    parse_sections.__globals__['parse_date'].cache_clear()
+    return min(timeit.repeat(lambda: parse(message), number=number, repeat=repeat)) / number
+
+
+def run_corpus(number):
+    """Print the per-case timing table; returns {case: single-pass seconds per parse}"""
+    print(f"{'case':<28}{'chars':>7}{'legacy µs':>12}{'single-pass µs':>16}{'ns/char':>9}{'speedup':>9}")
+    timings = {}
+    total_legacy = total_new = 0.0
+    for name, message in build_corpus().items():
+        legacy = time_parse(legacy_parse, message, number)
+        new = time_parse(parse_sections, message, number)
+        timings[name] = new
+        total_legacy += legacy
+        total_new += new
+        print(f"{name:<28}{len(message):>7}{legacy * 1e6:>12.1f}{new * 1e6:>16.1f}"
+              f"{new * 1e9 / len(message):>9.1f}{legacy / new:>8.1f}x")
+    print(f"{'total':<35}{total_legacy * 1e6:>12.1f}{total_new * 1e6:>16.1f}{'':>9}{total_legacy / total_new:>8.1f}x")
+    return timings
+
+
+def check_expected():
+    """Compare each corpus parse against EXPECTED; returns the mismatches"""
+    corpus = build_corpus()
+    failures = []
+    for name, fields in EXPECTED.items():
+        parsed = parse_sections(corpus[name])
+        for field, expected in fields.items():
+            if parsed[field] != expected:
+                failures.append(f"{name}.{field}: expected {expected!r}, got {parsed[field]!r}")
+    return failures
+
+
+def run_scaling(size, factor, max_growth):
+    """Time every stress shape at size and size * factor; returns the ones that grew super-linearly"""
+    print(f"\n{'stress case':<34}{'chars':>9}{'µs':>11}{'chars':>10}{'µs':>11}{'growth':>8}")
+    failures = []
+    for name, build in STRESS.items():
+        small, large = build(size), build(size * factor)
+        # Fewer parses for bigger inputs keeps each case to a fraction of a second
+        number = max(3, 2_000_000 // len(large))
+        small_time = time_parse(parse_sections, small, number * factor, repeat=5)
+        large_time = time_parse(parse_sections, large, number, repeat=5)
+        # 1.0 is perfectly linear; a quadratic scan shows up as roughly ``factor``
+        growth = (large_time / small_time) / (len(large) / len(small))
+        flag = ''
+        if growth > max_growth:
+            flag = '  ✗ super-linear'
+            failures.append(f"{name}: grew {growth:.1f}x faster than its input")
+        print(f"{name:<34}{len(small):>9}{small_time * 1e6:>11.1f}{len(large):>10}{large_time * 1e6:>11.1f}"
+              f"{growth:>7.2f}x{flag}")
+    return failures
+
+
+def check_baseline(timings, path, tolerance):
+    """Corpus cases slower than tolerance times their recorded baseline"""
+    with open(path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    return [
+        f"{name}: {seconds * 1e6:.1f}µs vs baseline {baseline[name] * 1e6:.1f}µs"
+        for name, seconds in timings.items()
+        if baseline.get(name) and seconds > baseline[name] * tolerance
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=2000, help='parses per corpus case')
+    parser.add_argument('--size', type=int, default=20_000, help='stress message size in characters')
+    parser.add_argument('--factor', type=int, default=8, help='size multiplier for the scaling check')
+    parser.add_argument('--max-growth', type=float, default=2.5,
+                        help='allowed growth relative to linear before a stress case fails')
+    parser.add_argument('--baseline', help='JSON of per-case timings to compare against')
+    parser.add_argument('--save-baseline', help="write this run's per-case timings here")
+    parser.add_argument('--tolerance', type=float, default=1.5, help='allowed slowdown against --baseline')
+    args = parser.parse_args()
+
+    timings = run_corpus(args.number)
+    failures = check_expected()
+    failures += run_scaling(args.size, args.factor, args.max_growth)
+    if args.baseline:
+        failures += check_baseline(timings, args.baseline, args.tolerance)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(timings, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {args.save_baseline}")
+
+    if failures:
+        print(f"\n✗ {len(failures)} regression(s):")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\n✓ Parser output unchanged and every stress case scales linearly")
+
+
+if __name__ == '__main__':
+    main()
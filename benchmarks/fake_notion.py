@@ -0,0 +1,179 @@
+"""In-process stand-in for the slice of the Notion API the bot uses
+
+Serves POST /v1/pages, POST /v1/databases/{id}/query and PATCH /v1/pages/{id}
+from memory, with configurable per-request latency, a fraction of requests
+answered 429 + Retry-After, and Notion-style cursor pagination. Only the filter
+and sort shapes the bot actually sends are understood.
+"""
+import asyncio
+import random
+import uuid
+from datetime import datetime, timezone
+
+from aiohttp import web
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def _with_plain_text(segments):
+    """Echo rich_text/title segments back the way Notion does, with plain_text filled in"""
+    return [
+        {**segment, 'type': 'text', 'plain_text': segment.get('text', {}).get('content', '')}
+        for segment in segments or []
+    ]
+
+
+def _normalize_properties(properties):
+    normalized = {}
+    for name, value in properties.items():
+        value = dict(value)
+        for kind in ('title', 'rich_text'):
+            if kind in value:
+                value[kind] = _with_plain_text(value[kind])
+        normalized[name] = value
+    return normalized
+
+
+def _property_value(page, name):
+    prop = page['properties'].get(name, {})
+    if 'date' in prop:
+        return (prop['date'] or {}).get('start') or ''
+    if 'checkbox' in prop:
+        return bool(prop['checkbox'])
+    if 'number' in prop:
+        return prop['number']
+    for kind in ('title', 'rich_text'):
+        if kind in prop:
+            return ''.join(segment.get('plain_text', '') for segment in prop[kind])
+    return None
+
+
+def _matches(page, condition):
+    if not condition:
+        return True
+    if 'and' in condition:
+        return all(_matches(page, item) for item in condition['and'])
+    if 'or' in condition:
+        return any(_matches(page, item) for item in condition['or'])
+    if 'timestamp' in condition:
+        rule = condition[condition['timestamp']]
+        return page[condition['timestamp']] >= rule['on_or_after'] if 'on_or_after' in rule else True
+    value = _property_value(page, condition['property'])
+    rule = next(rule for key, rule in condition.items() if key != 'property')
+    if 'equals' in rule:
+        return value == rule['equals']
+    if 'on_or_after' in rule:
+        return bool(value) and value >= rule['on_or_after']
+    if 'on_or_before' in rule:
+        return bool(value) and value <= rule['on_or_before']
+    if rule.get('is_not_empty'):
+        return bool(value)
+    if rule.get('is_empty'):
+        return not value
+    return True
+
+
+class FakeNotion:
+    """Notion stand-in; ``base_url`` is what NotionClient should be pointed at"""
+
+    def __init__(self, latency=0.0, jitter=0.0, throttle_rate=0.0, retry_after=0.1, host='127.0.0.1', port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate  # Fraction of requests answered 429
+        self.retry_after = retry_after
+        self.host = host
+        self.port = port
+        self.pages = {}  # page_id -> page, in creation order
+        self.counts = {'requests': 0, 'throttled': 0, 'created': 0, 'queried': 0, 'updated': 0}
+        self._runner = None
+
+    @property
+    def base_url(self):
+        return f'http://{self.host}:{self.port}/v1'
+
+    def add_page(self, properties, parent_id='bench-db'):
+        """Insert a row directly (seeding a delivery day without going through HTTP)"""
+        now = _now()
+        page = {
+            'object': 'page',
+            'id': str(uuid.uuid4()),
+            'created_time': now,
+            'last_edited_time': now,
+            'archived': False,
+            'parent': {'type': 'database_id', 'database_id': parent_id},
+            'properties': _normalize_properties(properties),
+        }
+        self.pages[page['id']] = page
+        return page
+
+    async def _delay(self):
+        self.counts['requests'] += 1
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if self.throttle_rate and random.random() < self.throttle_rate:
+            self.counts['throttled'] += 1
+            raise web.HTTPTooManyRequests(
+                headers={'Retry-After': str(self.retry_after)},
+                text='{"object": "error", "status": 429, "code": "rate_limited"}',
+                content_type='application/json'
+            )
+
+    async def _create(self, request):
+        await self._delay()
+        body = await request.json()
+        self.counts['created'] += 1
+        return web.json_response(self.add_page(body['properties'], body.get('parent', {}).get('database_id')))
+
+    async def _query(self, request):
+        await self._delay()
+        body = await request.json()
+        self.counts['queried'] += 1
+        rows = [page for page in self.pages.values() if _matches(page, body.get('filter'))]
+        for sort in reversed(body.get('sorts', [])):
+            if 'timestamp' in sort:
+                key = lambda page, name=sort['timestamp']: page[name]
+            else:
+                key = lambda page, name=sort['property']: str(_property_value(page, name) or '')
+            rows.sort(key=key, reverse=sort.get('direction') == 'descending')
+        page_size = min(int(body.get('page_size', 100)), 100)
+        start = int(body.get('start_cursor') or 0)
+        chunk = rows[start:start + page_size]
+        has_more = start + page_size < len(rows)
+        return web.json_response({
+            'object': 'list',
+            'results': chunk,
+            'has_more': has_more,
+            'next_cursor': str(start + page_size) if has_more else None,
+        })
+
+    async def _update(self, request):
+        await self._delay()
+        page = self.pages.get(request.match_info['page_id'])
+        if page is None:
+            raise web.HTTPNotFound(text='{"object": "error", "status": 404}', content_type='application/json')
+        body = await request.json()
+        page['properties'].update(_normalize_properties(body.get('properties', {})))
+        page['last_edited_time'] = _now()
+        self.counts['updated'] += 1
+        return web.json_response(page)
+
+    async def start(self):
+        app = web.Application(client_max_size=16 * 1024 * 1024)
+        app.router.add_post('/v1/pages', self._create)
+        app.router.add_post('/v1/databases/{database_id}/query', self._query)
+        app.router.add_patch('/v1/pages/{page_id}', self._update)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if not self.port:
+            self.port = self._runner.addresses[0][1]
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
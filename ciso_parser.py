@@ -0,0 +1,195 @@
+import re
+from datetime import date
+from functools import lru_cache
+
+# Section key -> header as students are asked to write it (used for error output)
+SECTION_TITLES = {
+    'date': 'Daily CISO Update - [Date]',
+    'student_name': 'Student',
+    'hours_worked': 'Hours Worked',
+    'completed_today': 'Completed Today',
+    'current_findings': 'Current Findings/Issues',
+    'tomorrow_plan': "Tomorrow's Plan",
+    'ciso_input': 'CISO Input Needed',
+}
+
+# One alternation for every header so the message is tokenized in a single linear scan.
+# It runs case-sensitively over lowercased text, which is several times faster than IGNORECASE.
+# A header is followed by a separator or ends its line, so the lookahead throws out
+# header words used in running text before they ever reach Python.
+# (Named groups per header would defeat the regex engine's literal-prefix scan.)
+_HEADER_PATTERN = (
+    r"(?:daily\s+ciso\s+update"
+    r"|student"
+    r"|hours\s+worked"
+    r"|completed\s+today"
+    r"|current\s+findings(?:\s*/\s*issues)?"
+    r"|tomorrow[’']?s\s+plan"
+    r"|ciso\s+input(?:\s+needed)?)"
+    r"(?=[ \t]*(?:[:\-–—]|\n|\Z))"
+)
+_HEADER_RE = re.compile(_HEADER_PATTERN)
+_HEADER_RE_IGNORECASE = re.compile(_HEADER_PATTERN, re.IGNORECASE)
+
+# The first two letters of a header identify its section
+_SECTION_BY_PREFIX = {
+    'da': 'date',
+    'st': 'student_name',
+    'ho': 'hours_worked',
+    'co': 'completed_today',
+    'cu': 'current_findings',
+    'to': 'tomorrow_plan',
+    'ci': 'ciso_input',
+}
+
+# Headers that only count when followed by ':'; the rest also count alone on their own line
+_NEEDS_SEPARATOR = {'student_name', 'hours_worked'}
+
+_LINE_PREFIX_CHARS = ' \t*_#>-•'
+_SEPARATORS = ':-–—'
+_HOURS_RE = re.compile(r'\d+')
+# Bold/underline markers left over from "**Header:**" formatting
+_EMPHASIS_EDGES_RE = re.compile(r'^(?:\*\*|__)(?=\s|$)|(?:(?<=\s)|^)(?:\*\*|__)$')
+_ISO_DATE_RE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})$')
+_SLASH_DATE_RE = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})$')
+_NAMED_DATE_RE = re.compile(r'([A-Za-z]+)\.?\s+(\d{1,2}),\s*(\d{4})$')
+
+_MONTHS = {
+    name: number
+    for number, names in enumerate([
+        ('january', 'jan'), ('february', 'feb'), ('march', 'mar'), ('april', 'apr'),
+        ('may',), ('june', 'jun'), ('july', 'jul'), ('august', 'aug'),
+        ('september', 'sep', 'sept'), ('october', 'oct'), ('november', 'nov'), ('december', 'dec'),
+    ], 1)
+    for name in names
+}
+
+
+def _separator_after(text, pos):
+    """(separator, position after it) for the character following a header, skipping spaces"""
+    length = len(text)
+    while pos < length and text[pos] in ' \t':
+        pos += 1
+    if pos < length and text[pos] in _SEPARATORS:
+        return text[pos], pos + 1
+    return None, pos
+
+
+def _at_line_start(text, pos):
+    # Walk back over bullet/markdown characters only, so this stays O(1) on long lines
+    while pos > 0 and text[pos - 1] in _LINE_PREFIX_CHARS:
+        pos -= 1
+    return pos == 0 or text[pos - 1] == '\n'
+
+
+def tokenize(text):
+    """Split a message into {section key: raw body} in one pass over the text
+
+    A header ends the previous section. Only the first occurrence of each header
+    counts, so a later "student:" or "CISO input" inside free text stays part of
+    the section it appears in.
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        matches = _HEADER_RE.finditer(lowered)
+    else:
+        # A few characters change length when lowercased, which would shift offsets
+        lowered = text
+        matches = _HEADER_RE_IGNORECASE.finditer(text)
+
+    sections = {}
+    current_key = None
+    current_start = 0
+    for match in matches:
+        end = match.end()
+        key = _SECTION_BY_PREFIX[lowered[match.start():match.start() + 2].lower()]
+        if key == current_key or key in sections:
+            continue
+        separator, body_start = _separator_after(text, end)
+        if key in _NEEDS_SEPARATOR:
+            if separator != ':':
+                continue
+        elif separator is None and not _at_line_start(text, match.start()):
+            continue
+        if current_key is not None:
+            sections[current_key] = text[current_start:match.start()]
+        current_key = key
+        current_start = body_start
+    if current_key is not None:
+        sections[current_key] = text[current_start:]
+    return sections
+
+
+def _first_line(body):
+    body = body.lstrip()
+    end = body.find('\n')
+    return (body if end == -1 else body[:end]).strip(' \t*_')
+
+
+def _section_text(body):
+    body = body.strip()
+    if body[:2] in ('**', '__') or body[-2:] in ('**', '__'):
+        body = _EMPHASIS_EDGES_RE.sub('', body).strip()
+    return body
+
+
+def _safe_date(year, month, day):
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=1024)
+def parse_date(date_str):
+    """Parse a journal date ("June 13, 2025", "06/13/2025", "13/06/2025", "2025-06-13") to YYYY-MM-DD
+
+    Returns None when the string isn't a recognised date. Results are cached since a
+    whole cohort submits the same date string on a given day.
+    """
+    date_str = date_str.strip()
+    match = _ISO_DATE_RE.match(date_str)
+    if match:
+        year, month, day = map(int, match.groups())
+        return _safe_date(year, month, day)
+    match = _SLASH_DATE_RE.match(date_str)
+    if match:
+        first, second, year = map(int, match.groups())
+        # US month/day first, falling back to day/month
+        return _safe_date(year, first, second) or _safe_date(year, second, first)
+    match = _NAMED_DATE_RE.match(date_str)
+    if match:
+        month = _MONTHS.get(match.group(1).lower())
+        if month:
+            return _safe_date(int(match.group(3)), month, int(match.group(2)))
+    return None
+
+
+def parse_sections(text):
+    """Parse a "Daily CISO Update" message into its fields
+
+    Returns a dict with date_text (raw, '' when absent), date (YYYY-MM-DD or None),
+    student_name (None when absent), hours_worked, the four free-text sections and
+    missing_sections, a list of SECTION_TITLES for headers that were not found.
+    """
+    sections = tokenize(text)
+
+    date_text = _first_line(sections.get('date', '')).strip(':-–— \t*_')
+    student_name = _first_line(sections.get('student_name', '')) or None
+    hours_match = _HOURS_RE.match(sections.get('hours_worked', '').lstrip(' \t\r\n*_'))  # "**Hours Worked:** 8"
+
+    parsed = {
+        'date_text': date_text,
+        'date': parse_date(date_text) if date_text else None,
+        'student_name': student_name,
+        'hours_worked': int(hours_match.group()) if hours_match else 0,
+        'completed_today': _section_text(sections.get('completed_today', '')),
+        'current_findings': _section_text(sections.get('current_findings', '')),
+        'tomorrow_plan': _section_text(sections.get('tomorrow_plan', '')),
+        'ciso_input': _section_text(sections.get('ciso_input', '')),
+    }
+    parsed['missing_sections'] = [
+        title for key, title in SECTION_TITLES.items()
+        if key not in sections or (key == 'date' and not date_text)
+    ]
+    return parsed
@@ -0,0 +1,134 @@
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Name of the single cohort built from the plain environment variables; it keeps the original data file paths
+DEFAULT_COHORT = 'default'
+
+_SETTINGS = {
+    'database_id', 'channel_ids', 'guild_ids', 'ciso_name', 'delivery_cron', 'reminder_cron',
+    'announce_channel_id', 'notion_token', 'rate_limit',
+}
+
+
+class Cohort:
+    """One cohort's routing and delivery settings
+
+    The bot attaches the cohort's per-database resources (Notion client, mirror,
+    sent-update log) as attributes when it starts up.
+    """
+
+    def __init__(self, key, database_id, channel_ids=(), guild_ids=(), ciso_name='Your CISO',
+                 delivery_cron='0 18 * * *', reminder_cron='', announce_channel_id=None,
+                 notion_token=None, rate_limit=None):
+        self.key = key
+        self.database_id = database_id
+        self.channel_ids = tuple(int(channel_id) for channel_id in channel_ids)
+        self.guild_ids = tuple(int(guild_id) for guild_id in guild_ids)
+        self.ciso_name = ciso_name
+        self.delivery_cron = delivery_cron
+        self.reminder_cron = reminder_cron
+        # Delivery summaries and reminders go here; defaults to the first journal channel
+        self.announce_channel_id = int(announce_channel_id) if announce_channel_id else (
+            self.channel_ids[0] if self.channel_ids else None
+        )
+        self.notion_token = notion_token  # None = the bot's NOTION_TOKEN
+        self.rate_limit = rate_limit  # Requests/second for this database; None = an even share of the token's budget
+        self.notion = None
+        self.mirror = None
+        self.mirror_sync = None
+        self.sent_update_log = None
+        self.sent_updater = None
+
+    def job_name(self, base):
+        """Scheduler job name; the default cohort keeps the bare name so its run history carries over"""
+        return base if self.key == DEFAULT_COHORT else f'{base}[{self.key}]'
+
+    def __repr__(self):
+        return f'Cohort({self.key!r}, database={self.database_id!r})'
+
+
+def load_cohorts(path, **defaults):
+    """Cohorts from a JSON file holding a list of objects, each with a name and database_id
+
+    Any other Cohort setting may be given per cohort; ``defaults`` fill in the rest.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+    if not isinstance(raw, list) or not raw:
+        raise ValueError(f"{path} must contain a non-empty JSON list of cohorts")
+    cohorts = []
+    for item in raw:
+        unknown = set(item) - _SETTINGS - {'name'}
+        if unknown:
+            raise ValueError(f"Unknown cohort setting(s) in {path}: {', '.join(sorted(unknown))}")
+        if not item.get('name') or not item.get('database_id'):
+            raise ValueError(f"Every cohort in {path} needs a name and a database_id")
+        settings = {**defaults, **{key: value for key, value in item.items() if key != 'name'}}
+        cohorts.append(Cohort(item['name'], **settings))
+    return cohorts
+
+
+class CohortRouter:
+    """Finds the cohort a message belongs to with dict lookups on channel, guild and user ID
+
+    A channel mapping wins over a guild mapping. DMs have neither, so they go to
+    the cohort the student last posted in (learned from channel submissions and
+    each cohort's own entries), then to a mapped guild they share with the bot,
+    then to the first cohort. When no cohort maps any channel or guild, every
+    channel counts as a journal channel for the first cohort.
+    """
+
+    def __init__(self, cohorts):
+        if not cohorts:
+            raise ValueError("At least one cohort is required")
+        self.default = cohorts[0]
+        self._by_key = {}
+        self._by_channel = {}
+        self._by_guild = {}
+        self._by_user = {}
+        for cohort in cohorts:
+            if cohort.key in self._by_key:
+                raise ValueError(f"Duplicate cohort name {cohort.key!r}")
+            self._by_key[cohort.key] = cohort
+            for mapping, ids, kind in ((self._by_channel, cohort.channel_ids, 'channel'),
+                                       (self._by_guild, cohort.guild_ids, 'guild')):
+                for item_id in ids:
+                    if item_id in mapping:
+                        raise ValueError(f"{kind} {item_id} is mapped to both {mapping[item_id].key!r} and {cohort.key!r}")
+                    mapping[item_id] = cohort
+        self._catch_all = self.default if not self._by_channel and not self._by_guild else None
+
+    def __iter__(self):
+        return iter(self._by_key.values())
+
+    def __len__(self):
+        return len(self._by_key)
+
+    def get(self, key):
+        """Cohort by name; None (e.g. a queued entry from before cohorts existed) means the default"""
+        if key is None:
+            return self.default
+        return self._by_key.get(key)
+
+    def for_channel(self, channel_id, guild_id=None):
+        """Cohort whose journal channel this is, or None for channels the bot should ignore"""
+        cohort = self._by_channel.get(channel_id)
+        if cohort is None and guild_id is not None:
+            cohort = self._by_guild.get(guild_id)
+        return cohort or self._catch_all
+
+    def for_user(self, user_id, guild_ids=()):
+        """Cohort for a student's DM"""
+        cohort = self._by_user.get(user_id)
+        if cohort is not None:
+            return cohort
+        for guild_id in guild_ids:
+            cohort = self._by_guild.get(guild_id)
+            if cohort is not None:
+                return cohort
+        return self.default
+
+    def remember(self, user_id, cohort):
+        self._by_user[user_id] = cohort
@@ -0,0 +1,118 @@
+import os
+import time
+from collections import OrderedDict
+
+
+class MessageDedupeCache:
+    """Bounded LRU + TTL set of recently seen Discord message IDs
+
+    Keys are the integer snowflakes themselves, every operation is O(1), and the
+    oldest entries are evicted one at a time instead of dropping the whole cache.
+    With a persist_path, IDs are appended to a small log so duplicate
+    suppression survives reconnects and restarts.
+    """
+
+    def __init__(self, max_size=10000, ttl=6 * 3600, persist_path=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.persist_path = persist_path
+        self._seen = OrderedDict()  # message_id -> last seen timestamp, oldest first
+        self._log = None
+        self._log_lines = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        if persist_path:
+            self._load()
+
+    def __len__(self):
+        return len(self._seen)
+
+    def __contains__(self, message_id):
+        stamp = self._seen.get(message_id)
+        return stamp is not None and time.time() - stamp < self.ttl
+
+    def check_and_add(self, message_id, now=None):
+        """Return True if message_id was already seen (a duplicate), recording it either way"""
+        now = now if now is not None else time.time()
+        self._expire(now)
+        stamp = self._seen.get(message_id)
+        duplicate = stamp is not None and now - stamp < self.ttl
+        if duplicate:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._append_log(message_id, now)
+        self._seen[message_id] = now
+        self._seen.move_to_end(message_id)
+        while len(self._seen) > self.max_size:
+            self._seen.popitem(last=False)
+            self.evictions += 1
+        return duplicate
+
+    def _expire(self, now):
+        # Entries are ordered by last-seen time, so expired ones are always at the front
+        while self._seen:
+            message_id, stamp = next(iter(self._seen.items()))
+            if now - stamp < self.ttl:
+                break
+            self._seen.popitem(last=False)
+            self.expirations += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._seen),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _load(self):
+        """Replay the persisted log, keeping only live entries, then compact it"""
+        if os.path.exists(self.persist_path):
+            now = time.time()
+            with open(self.persist_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        message_id, stamp = line.split()
+                        message_id, stamp = int(message_id), float(stamp)
+                    except ValueError:
+                        continue  # Torn write from a crash
+                    if now - stamp < self.ttl:
+                        self._seen[message_id] = stamp
+                        self._seen.move_to_end(message_id)
+            while len(self._seen) > self.max_size:
+                self._seen.popitem(last=False)
+        self._compact()
+
+    def _compact(self):
+        directory = os.path.dirname(self.persist_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self._log is not None:
+            self._log.close()
+        temp_path = f'{self.persist_path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for message_id, stamp in self._seen.items():
+                f.write(f'{message_id} {stamp:.3f}\n')
+        os.replace(temp_path, self.persist_path)
+        self._log = open(self.persist_path, 'a', encoding='utf-8', buffering=1)
+        self._log_lines = len(self._seen)
+
+    def _append_log(self, message_id, stamp):
+        if self._log is None:
+            return
+        self._log.write(f'{message_id} {stamp:.3f}\n')
+        self._log_lines += 1
+        # Keep the log from growing without bound
+        if self._log_lines > self.max_size * 2:
+            self._compact()
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
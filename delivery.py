@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()  # Queue sentinel telling a worker stage to shut down
+
+
+class StageStats:
+    """Throughput counters for a single pipeline stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.first_start = None
+        self.last_end = None
+
+    def record(self, started, processed=1, failed=0):
+        """Record work that began at ``started`` (a perf_counter timestamp) and just finished"""
+        ended = time.perf_counter()
+        if self.first_start is None or started < self.first_start:
+            self.first_start = started
+        self.last_end = ended
+        self.busy_seconds += ended - started
+        self.processed += processed
+        self.failed += failed
+
+    @property
+    def wall_seconds(self):
+        if self.first_start is None:
+            return 0.0
+        return self.last_end - self.first_start
+
+    @property
+    def throughput(self):
+        """Items handled per second of wall time spent in this stage"""
+        total = self.processed + self.failed
+        return total / self.wall_seconds if self.wall_seconds > 0 else float(total)
+
+    def summary(self):
+        return (f"{self.name}: {self.processed} ok, {self.failed} failed, "
+                f"{self.throughput:.1f}/s over {self.wall_seconds:.2f}s")
+
+
+class DeliveryResult:
+    """Outcome of one delivery run"""
+
+    def __init__(self):
+        self.sent_count = 0
+        self.failed_count = 0
+        self.skipped_count = 0
+        self.failed_details = []
+        self.delivered = []  # response_data dicts that were sent and recorded
+        self.stages = {name: StageStats(name) for name in ('extract', 'send', 'mark')}
+        self.elapsed = 0.0
+
+    def fail(self, detail):
+        self.failed_count += 1
+        self.failed_details.append(detail)
+
+    def stats_summary(self):
+        lines = [stage.summary() for stage in self.stages.values()]
+        lines.append(f"total: {self.sent_count} sent, {self.failed_count} failed, "
+                     f"{self.skipped_count} skipped in {self.elapsed:.2f}s")
+        return "\n".join(lines)
+
+
+class DeliveryPipeline:
+    """Fan CISO responses out to students with bounded concurrency
+
+    Entries flow from extract (Notion row -> response data) through a bounded
+    queue to the send stage (DM, at most ``concurrency`` in flight). With
+    ``group_by``, entries sharing a key (one student) are buffered into a
+    group handled by a single worker in order, and ``merge`` sends each group
+    as one message; ``send`` always receives a list of responses. Each
+    successful DM is handed straight to ``mark``, which records it durably
+    (see SentUpdater) so the Notion "Response Sent" PATCHes happen off the
+    delivery path. ``claim`` is asked right before each send and can refuse an
+    entry another run already delivered or is delivering. With ``ordered``
+    the entries arrive with each key's rows together (the queries sort by
+    student), so a group is sent as soon as the next key starts instead of
+    after the whole stream; a key that turns up again later is sent as its
+    own group. Discord's
+    per-route rate-limit buckets are honoured by discord.py's HTTP client; the
+    concurrency cap keeps a run well under the global request budget so those
+    buckets rarely trip.
+    """
+
+    def __init__(self, extract, send, mark, concurrency=5, claim=None, group_by=None, merge=False, ordered=False):
+        self.extract = extract
+        self.send = send  # async callable(list of response_data for one student) -> (success, message)
+        self.mark = mark  # callable(entry_id) -> True once the delivery is recorded (may be async)
+        self.claim = claim  # callable(response_data) -> True if this run may send it (may be async)
+        self.group_by = group_by  # callable(response_data) -> recipient key
+        self.merge = merge
+        self.ordered = ordered
+        self.concurrency = max(1, concurrency)
+
+    async def run(self, entries):
+        """Deliver every entry from an (async) iterable of Notion rows and return a DeliveryResult"""
+        result = DeliveryResult()
+        started = time.perf_counter()
+        send_queue = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        senders = [asyncio.create_task(self._send_worker(send_queue, result))
+                   for _ in range(self.concurrency)]
+
+        try:
+            await self._produce(entries, send_queue, result)
+            for _ in senders:
+                await send_queue.put(_STOP)
+            await asyncio.gather(*senders)
+        finally:
+            for task in senders:
+                task.cancel()
+
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    async def _produce(self, entries, send_queue, result):
+        stats = result.stages['extract']
+        groups = {}  # Insertion-ordered, so students go out in query order
+        if hasattr(entries, '__aiter__'):
+            async for entry in entries:
+                await self._extract_one(entry, send_queue, result, stats, groups)
+        else:
+            for entry in entries:
+                await self._extract_one(entry, send_queue, result, stats, groups)
+        for group in groups.values():
+            await send_queue.put(group)
+
+    async def _flush_before(self, key, send_queue, groups):
+        """In ordered mode, send the groups of earlier keys once a new key starts"""
+        for earlier in [earlier for earlier in groups if earlier != key]:
+            await send_queue.put(groups.pop(earlier))
+
+    async def _extract_one(self, entry, send_queue, result, stats, groups):
+        started = time.perf_counter()
+        response_data = self.extract(entry)
+        if not response_data:
+            stats.record(started, processed=0, failed=1)
+            result.fail("Failed to extract response data")
+            return
+        stats.record(started)
+        if self.group_by is None:
+            await send_queue.put([response_data])
+        else:
+            key = self.group_by(response_data)
+            if self.ordered and key not in groups:
+                await self._flush_before(key, send_queue, groups)
+            groups.setdefault(key, []).append(response_data)
+
+    async def _claim(self, response_data, result):
+        if self.claim is None:
+            return True
+        claimed = self.claim(response_data)
+        if asyncio.iscoroutine(claimed):
+            claimed = await claimed
+        if not claimed:
+            result.skipped_count += 1
+            logger.info("⏭️ Skipping %s (%s) - already delivered", response_data['student_name'], response_data['date'],
+                        extra={'entry_id': response_data['entry_id']})
+        return claimed
+
+    async def _send_worker(self, send_queue, result):
+        while True:
+            group = await send_queue.get()
+            if group is _STOP:
+                return
+            claimed = [response_data for response_data in group if await self._claim(response_data, result)]
+            batches = [claimed] if self.merge and claimed else [[response_data] for response_data in claimed]
+            for batch in batches:
+                await self._send_batch(batch, result)
+
+    async def _send_batch(self, batch, result):
+        started = time.perf_counter()
+        try:
+            success, message = await self.send(batch)
+        except Exception as e:
+            success, message = False, str(e)
+        if not success:
+            result.stages['send'].record(started, processed=0, failed=len(batch))
+            for response_data in batch:
+                result.fail(f"{response_data['student_name']} ({response_data['date']}): {message}")
+            return
+        result.stages['send'].record(started, processed=len(batch))
+        for response_data in batch:
+            await self._mark_one(response_data, result)
+
+    async def _mark_one(self, response_data, result):
+        started = time.perf_counter()
+        try:
+            marked = self.mark(response_data['entry_id'])
+            if asyncio.iscoroutine(marked):
+                marked = await marked
+        except Exception as e:
+            logger.error("❌ Could not record delivery for %s: %s", response_data['student_name'], e,
+                         extra={'entry_id': response_data['entry_id']})
+            marked = False
+        if marked is True:
+            result.stages['mark'].record(started)
+            result.sent_count += 1
+            result.delivered.append(response_data)
+            logger.debug("✅ Response sent to %s", response_data['student_name'], extra={'entry_id': response_data['entry_id']})
+        else:
+            result.stages['mark'].record(started, processed=0, failed=1)
+            result.fail(f"{response_data['student_name']}: Failed to mark as sent")
+            logger.error("❌ Failed to mark response as sent for %s", response_data['student_name'],
+                         extra={'entry_id': response_data['entry_id']})
@@ -0,0 +1,158 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+CLAIMED = 'claimed'
+DELIVERED = 'delivered'
+
+
+def content_hash(text):
+    """Stable digest of a CISO response, ignoring surrounding whitespace"""
+    return hashlib.sha256((text or '').strip().encode('utf-8')).hexdigest()
+
+
+class DeliveryLedger:
+    """Local record of which responses have been (or are being) delivered
+
+    Keyed on Notion page ID + response content hash and mirrored in memory, so
+    overlapping delivery runs (the scheduled job and a manual !send_responses on
+    the same date) check it in O(1) without asking Notion. A run claims an entry
+    under the lock before sending; a concurrent run sees the claim and skips it.
+    Claims are settled by the database insert, so a run in another bot process
+    sharing the file is turned away too.
+    A claim left behind by a crash mid-send (or a partly delivered DM, or a run
+    cancelled on leader handover) keeps blocking the entry, since the DM may
+    already have gone out, until an admin confirms or releases it.
+    """
+
+    def __init__(self, path, retention_days=90):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS deliveries (
+                entry_id TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                status TEXT NOT NULL,
+                claimed_at REAL NOT NULL,
+                delivered_at REAL,
+                PRIMARY KEY (entry_id, content_hash)
+            )
+        ''')
+        with self.conn:
+            # Old rows are already flagged in Notion; keep the ledger (and the in-memory copy) small
+            self.conn.execute('DELETE FROM deliveries WHERE claimed_at < ?', (time.time() - retention_days * 86400,))
+        self._entries = {
+            (entry_id, digest): status
+            for entry_id, digest, status in self.conn.execute('SELECT entry_id, content_hash, status FROM deliveries')
+        }
+        self._lock = asyncio.Lock()
+        self.skipped = 0
+        in_doubt = self.in_doubt()
+        if in_doubt:
+            logger.warning("⚠️ %d deliveries were interrupted mid-send; they won't be retried until settled with !delivery_claims", in_doubt)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def status(self, entry_id, content):
+        return self._entries.get((entry_id, content_hash(content)))
+
+    async def claim(self, entry_id, content):
+        """Reserve an entry for this run; False when it's already delivered or in flight elsewhere"""
+        key = (entry_id, content_hash(content))
+        async with self._lock:
+            if self._entries.get(key) == CLAIMED:
+                # Another process may have settled it since; the file is the source of truth
+                row = self.conn.execute(
+                    'SELECT status FROM deliveries WHERE entry_id = ? AND content_hash = ?', key
+                ).fetchone()
+                if row:
+                    self._entries[key] = row[0]
+                else:
+                    del self._entries[key]
+            if key in self._entries:
+                self.skipped += 1
+                return False
+            with self.conn:
+                cursor = self.conn.execute(
+                    'INSERT OR IGNORE INTO deliveries (entry_id, content_hash, status, claimed_at) VALUES (?, ?, ?, ?)',
+                    (*key, CLAIMED, time.time())
+                )
+            if cursor.rowcount == 0:
+                # Another process claimed it since we loaded the ledger
+                row = self.conn.execute(
+                    'SELECT status FROM deliveries WHERE entry_id = ? AND content_hash = ?', key
+                ).fetchone()
+                self._entries[key] = row[0] if row else CLAIMED
+                self.skipped += 1
+                return False
+            self._entries[key] = CLAIMED
+            return True
+
+    def confirm(self, entry_id, content):
+        """The DM went out"""
+        key = (entry_id, content_hash(content))
+        with self.conn:
+            self.conn.execute(
+                'UPDATE deliveries SET status = ?, delivered_at = ? WHERE entry_id = ? AND content_hash = ?',
+                (DELIVERED, time.time(), *key)
+            )
+        self._entries[key] = DELIVERED
+
+    def release(self, entry_id, content):
+        """The send failed; let a later run try again"""
+        key = (entry_id, content_hash(content))
+        with self.conn:
+            self.conn.execute('DELETE FROM deliveries WHERE entry_id = ? AND content_hash = ?', key)
+        self._entries.pop(key, None)
+
+    def in_doubt(self):
+        return self.conn.execute('SELECT COUNT(*) FROM deliveries WHERE status = ?', (CLAIMED,)).fetchone()[0]
+
+    def claims(self):
+        """(entry_id, claimed_at) of every unsettled claim, oldest first - in flight or left in doubt"""
+        return self.conn.execute(
+            'SELECT entry_id, MIN(claimed_at) FROM deliveries WHERE status = ? GROUP BY entry_id ORDER BY 2',
+            (CLAIMED,)
+        ).fetchall()
+
+    def resolve(self, entry_id, delivered):
+        """Settle an entry's claims by hand: delivered=True confirms them, False releases them for resending
+
+        Returns how many claims were settled (0 when the entry had none).
+        """
+        with self.conn:
+            if delivered:
+                cursor = self.conn.execute(
+                    'UPDATE deliveries SET status = ?, delivered_at = ? WHERE entry_id = ? AND status = ?',
+                    (DELIVERED, time.time(), entry_id, CLAIMED)
+                )
+            else:
+                cursor = self.conn.execute('DELETE FROM deliveries WHERE entry_id = ? AND status = ?', (entry_id, CLAIMED))
+        for key, status in list(self._entries.items()):
+            if key[0] == entry_id and status == CLAIMED:
+                if delivered:
+                    self._entries[key] = DELIVERED
+                else:
+                    del self._entries[key]
+        return cursor.rowcount
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'in_flight_or_in_doubt': self.in_doubt(),
+            'skipped_duplicates': self.skipped,
+        }
+
+    def close(self):
+        self.conn.close()
@@ -1,23 +1,88 @@
 import discord
-import re
-import requests
+import asyncio
 import json
+import logging
 import os
+import time
 from datetime import datetime, timedelta
-from discord.ext import commands, tasks
+from functools import partial
+from discord.ext import commands
 from dotenv import load_dotenv
 import pytz
+from notion_client import NotionClient, NotionAPIError, NOTION_API_URL, NOTION_REQUEST_SECONDS, TokenBucket, encode_rich_text, decode_rich_text
+from delivery import DeliveryPipeline
+from ingest_queue import IngestQueue, IngestWorker
+from sent_updates import SentUpdateLog, SentUpdater
+from delivery_ledger import DeliveryLedger
+from member_index import MemberIndex, normalize_name
+from user_cache import UserCache
+from dedupe_cache import MessageDedupeCache
+from ciso_parser import parse_sections, SECTION_TITLES
+from scheduler import Scheduler
+from message_composer import compose as compose_message
+from notion_mirror import NotionMirror, MirrorSync
+from metrics import Counter, Gauge, Histogram, MetricsServer, REGISTRY
+from bot_logging import setup_logging
+from cohorts import Cohort, CohortRouter, DEFAULT_COHORT, load_cohorts
+from leases import Lease, LeaseStore, default_holder
+from rollups import Rollups, RollupSync, student_key
+from backfill import BackfillCheckpoints, BackfillRun
+
+logger = logging.getLogger('discord_monitor')
 
 load_dotenv()
 
+# Logging - levels, optional JSON lines, and formatting/I-O on a background thread so the event loop never blocks
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')  # DEBUG adds per-entry diagnostics
+LOG_JSON = os.getenv('LOG_FORMAT', 'text').lower() == 'json'
+LOG_FILE = os.getenv('LOG_FILE')  # Optional rotating log file alongside stdout
+log_listener = setup_logging(LOG_LEVEL, json_output=LOG_JSON, log_file=LOG_FILE) if __name__ == '__main__' else None
+
 # Bot setup
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix='!', intents=intents)
-
-# Message deduplication tracking
-processed_messages = set()
-MAX_PROCESSED_CACHE = 1000  # Prevent memory buildup
+# Privileged intent (enable it in the developer portal first) - needed to index every guild member up front
+intents.members = os.getenv('ENABLE_MEMBERS_INTENT', 'false').lower() == 'true'
+
+# Low-memory mode - no member cache, chunking or message cache; only students with journal entries are
+# indexed by name and anyone else is fetched on demand into a bounded cache (see README for the numbers)
+LOW_MEMORY_MODE = os.getenv('LOW_MEMORY_MODE', 'false').lower() == 'true'
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '1024'))  # Users kept after an on-demand fetch
+bot_options = dict(
+    member_cache_flags=discord.MemberCacheFlags.none(),
+    chunk_guilds_at_startup=False,
+    max_messages=None
+) if LOW_MEMORY_MODE else {}
+
+# Sharding - unset runs one gateway connection; "auto" lets Discord pick the shard count; a number
+# fixes it, and SHARD_IDS (e.g. "0,1") picks this process's share so several processes split the guilds
+SHARD_COUNT = os.getenv('SHARD_COUNT', '').strip().lower()
+SHARD_IDS = [int(shard_id) for shard_id in os.getenv('SHARD_IDS', '').split(',') if shard_id.strip()]
+if SHARD_IDS and not SHARD_COUNT.isdigit():
+    raise ValueError("SHARD_IDS needs a numeric SHARD_COUNT")
+if SHARD_COUNT:
+    bot = commands.AutoShardedBot(
+        command_prefix='!',
+        intents=intents,
+        shard_count=int(SHARD_COUNT) if SHARD_COUNT.isdigit() else None,
+        shard_ids=SHARD_IDS or None,
+        **bot_options
+    )
+else:
+    bot = commands.Bot(command_prefix='!', intents=intents, **bot_options)
+# Processes splitting one bot between them; each takes an even share of the Notion budget
+PROCESS_COUNT = -(-int(SHARD_COUNT) // len(SHARD_IDS)) if SHARD_IDS else 1
+PROCESS_INDEX = min(SHARD_IDS) // len(SHARD_IDS) if SHARD_IDS else 0  # 0..PROCESS_COUNT-1
+
+# Name -> user ID index for resolving students without a stored Discord ID
+member_index = MemberIndex()
+
+# Users fetched by ID when the gateway cache doesn't have them - bounded, so it can't grow with the guilds
+user_cache = UserCache(bot.fetch_user, max_size=USER_CACHE_SIZE)
+
+async def resolve_user(user_id):
+    """discord.User for an ID: the gateway cache first, then the bounded fetch cache"""
+    return bot.get_user(user_id) or await user_cache.get(user_id)
 
 # Environment variables
 DISCORD_TOKEN = os.getenv('DISCORD_TOKEN')
@@ -27,6 +92,29 @@ CHANNEL_ID = int(os.getenv('CHANNEL_ID')) if os.getenv('CHANNEL_ID') else None
 CISO_NAME = os.getenv('CISO_NAME', 'Your CISO')  # Your actual name
 ADMIN_CODE = os.getenv('ADMIN_CODE')  # Secret admin authentication code
 
+# Local state (queues, caches, ledgers) lives here
+DATA_DIR = os.getenv('BOT_DATA_DIR', 'data')
+# Each shard process keeps its own ingest queue and dedupe log; the rest of DATA_DIR is shared
+PROCESS_DATA_DIR = os.path.join(DATA_DIR, 'shards', '_'.join(map(str, SHARD_IDS))) if SHARD_IDS else DATA_DIR
+
+# Message deduplication tracking - bounded LRU/TTL keyed on message ID
+MAX_PROCESSED_CACHE = int(os.getenv('DEDUPE_CACHE_SIZE', '10000'))  # Prevent memory buildup
+DEDUPE_TTL_HOURS = float(os.getenv('DEDUPE_TTL_HOURS', '6'))
+DEDUPE_PERSIST = os.getenv('DEDUPE_PERSIST', 'true').lower() == 'true'  # Survive restarts
+processed_messages = MessageDedupeCache(
+    max_size=MAX_PROCESSED_CACHE,
+    ttl=DEDUPE_TTL_HOURS * 3600,
+    persist_path=os.path.join(PROCESS_DATA_DIR, 'processed_messages.log') if DEDUPE_PERSIST else None
+)
+
+# Delivery tuning
+DELIVERY_CONCURRENCY = int(os.getenv('DELIVERY_CONCURRENCY', '5'))  # DMs in flight at once
+MARK_SENT_WORKERS = int(os.getenv('MARK_SENT_WORKERS', '3'))  # Parallel "Response Sent" updaters (>= Notion rate limit)
+MARK_SENT_BATCH_SIZE = int(os.getenv('MARK_SENT_BATCH_SIZE', '30'))  # Updates pulled from the log per flush
+COALESCE_DMS = os.getenv('COALESCE_DMS', 'true').lower() == 'true'  # One DM per student per run, not per entry
+BACKLOG_MERGE = os.getenv('BACKLOG_MERGE', 'true').lower() == 'true'  # One DM per student in backlog runs
+BACKLOG_MAX_DAYS = int(os.getenv('BACKLOG_MAX_DAYS', '31'))  # Widest date range !send_backlog accepts
+
 # Timezone setup
 SAST = pytz.timezone('Africa/Johannesburg')
 
@@ -38,77 +126,115 @@ def get_sa_date():
     """Get current date in South African timezone"""
     return get_sa_time().date()
 
-# Notion API headers
-NOTION_HEADERS = {
-    'Authorization': f'Bearer {NOTION_TOKEN}',
-    'Content-Type': 'application/json',
-    'Notion-Version': '2022-06-28'
-}
+# Scheduled jobs (cron specs in SAST) - per-cohort overrides go in the cohorts file
+DELIVERY_CRON = os.getenv('DELIVERY_CRON', '0 18 * * *')
+REMINDER_CRON = os.getenv('REMINDER_CRON', '')  # e.g. "0 16 * * 1-5"; empty disables the reminder job
+
+# Cohorts - each maps its Discord channels/guilds to its own Notion database, CISO and delivery time.
+# Without COHORTS_FILE there is one cohort built from NOTION_DATABASE_ID, CHANNEL_ID and CISO_NAME.
+COHORTS_FILE = os.getenv('COHORTS_FILE')  # JSON list, e.g. [{"name": "jan", "database_id": "...", "channel_ids": [123]}]
+if COHORTS_FILE:
+    cohorts = load_cohorts(COHORTS_FILE, ciso_name=CISO_NAME, delivery_cron=DELIVERY_CRON, reminder_cron=REMINDER_CRON)
+else:
+    cohorts = [Cohort(
+        DEFAULT_COHORT,
+        NOTION_DATABASE_ID,
+        channel_ids=[CHANNEL_ID] if CHANNEL_ID else (),
+        ciso_name=CISO_NAME,
+        delivery_cron=DELIVERY_CRON,
+        reminder_cron=REMINDER_CRON
+    )]
+cohort_router = CohortRouter(cohorts)
+
+def cohort_data_dir(cohort):
+    """Where a cohort's own local stores live; the default cohort keeps the original paths"""
+    return DATA_DIR if cohort.key == DEFAULT_COHORT else os.path.join(DATA_DIR, 'cohorts', cohort.key)
+
+# Notion API clients - one per cohort database, each with its own keep-alive pool and token bucket
+NOTION_TIMEOUT = float(os.getenv('NOTION_TIMEOUT', '30'))
+NOTION_RATE_LIMIT = float(os.getenv('NOTION_RATE_LIMIT', '3')) / PROCESS_COUNT  # Requests/second per integration token
+NOTION_MAX_RETRIES = int(os.getenv('NOTION_MAX_RETRIES', '5'))  # Retries on 429/5xx before giving up
+NOTION_CACHE_TTL = float(os.getenv('NOTION_CACHE_TTL', '60'))  # Seconds read-only admin queries are reused
+NOTION_BASE_URL = os.getenv('NOTION_API_URL', NOTION_API_URL)  # Point at a stand-in server for benchmarks
+NOTION_PAGE_SIZE = int(os.getenv('NOTION_PAGE_SIZE', '100'))  # Rows per query page (max 100)
+# Rich text property holding each entry's Discord message ID, so a retried create finds its own row
+# (add it to the journal database; empty turns the lookup off and ambiguous failures aren't retried)
+SUBMISSION_ID_PROPERTY = os.getenv('NOTION_SUBMISSION_ID_PROPERTY', 'Submission ID')
+
+# Local SQLite mirror of each journal database - read paths hit indexed tables, Notion only sees delta polls
+MIRROR_ENABLED = os.getenv('NOTION_MIRROR', 'true').lower() == 'true'
+MIRROR_SYNC_INTERVAL = float(os.getenv('MIRROR_SYNC_INTERVAL', '60'))  # Seconds between delta polls
+MIRROR_FULL_SYNC_HOURS = float(os.getenv('MIRROR_FULL_SYNC_HOURS', '6'))  # Full resync to drop deleted pages
+
+# Journal rollups (hours, streaks, missed days) kept in memory and updated as entries arrive; every
+# process replays its cohorts' mirrors at startup and then folds in rows edited there since
+JOURNAL_WORKDAYS = [int(day) for day in os.getenv('JOURNAL_WORKDAYS', '1,2,3,4,5').split(',') if day.strip()]  # ISO weekdays
+rollups = Rollups(workdays=JOURNAL_WORKDAYS)
+
+def connect_cohorts():
+    """Give every cohort its Notion client (own keep-alive pool and token bucket) and local mirror"""
+    tokens = [cohort.notion_token or NOTION_TOKEN for cohort in cohort_router]
+    for cohort, token in zip(cohort_router, tokens):
+        # Notion's limit is per integration, so cohorts sharing a token split its budget unless told otherwise;
+        # either way each shard process gets its share
+        cohort.notion = NotionClient(
+            token,
+            timeout=NOTION_TIMEOUT,
+            rate_limit=cohort.rate_limit / PROCESS_COUNT if cohort.rate_limit else NOTION_RATE_LIMIT / tokens.count(token),
+            max_retries=NOTION_MAX_RETRIES,
+            cache_ttl=NOTION_CACHE_TTL,
+            base_url=NOTION_BASE_URL
+        )
+        cohort.mirror = NotionMirror(os.path.join(cohort_data_dir(cohort), 'notion_mirror.db'), submission_property=SUBMISSION_ID_PROPERTY)
+        cohort.mirror_sync = MirrorSync(
+            cohort.notion,
+            cohort.database_id,
+            cohort.mirror,
+            interval=MIRROR_SYNC_INTERVAL,
+            full_sync_interval=MIRROR_FULL_SYNC_HOURS * 3600,
+            page_size=NOTION_PAGE_SIZE
+        )
+
+connect_cohorts()
+rollup_sync = RollupSync(rollups, [(cohort.key, cohort.mirror) for cohort in cohort_router], interval=MIRROR_SYNC_INTERVAL)
 
-def parse_ciso_update(message_content, author):
-    """Parse the structured CISO update message"""
+def mirror_ready(cohort):
+    """True when reads for a cohort can be answered from its local mirror"""
+    return MIRROR_ENABLED and cohort.mirror_sync.is_ready()
+
+def cohort_for_context(ctx):
+    """Cohort an admin command acts on: the one owning the channel, or for DMs the sender's cohort"""
+    if isinstance(ctx.channel, discord.DMChannel):
+        return cohort_router.for_user(ctx.author.id, [guild.id for guild in ctx.author.mutual_guilds])
+    return cohort_router.for_channel(ctx.channel.id, ctx.guild.id if ctx.guild else None) or cohort_router.default
+
+def cohort_label(cohort):
+    """" (cohort name)" for admin replies, or nothing when there's only one cohort"""
+    return f" ({cohort.key})" if len(cohort_router) > 1 else ""
+
+def parse_ciso_update(message_content, author, default_date=None):
+    """Parse the structured CISO update message; entries without a date get default_date (today)"""
     try:
-        # Extract date
-        date_pattern = r'Daily CISO Update - (.+?)(?:\n|$)'
-        date_match = re.search(date_pattern, message_content, re.IGNORECASE)
-        
-        if date_match:
-            date_str = date_match.group(1).strip()
-            # Try to parse various date formats and convert to ISO format
-            try:
-                # Handle formats like "June 13, 2025", "06/13/2025", "2025-06-13"
-                if ',' in date_str:  # "June 13, 2025" format
-                    parsed_date = datetime.strptime(date_str, '%B %d, %Y')
-                elif '/' in date_str:  # "06/13/2025" or "13/06/2025" format
-                    try:
-                        parsed_date = datetime.strptime(date_str, '%m/%d/%Y')
-                    except:
-                        parsed_date = datetime.strptime(date_str, '%d/%m/%Y')
-                elif '-' in date_str:  # "2025-06-13" format (already correct)
-                    parsed_date = datetime.strptime(date_str, '%Y-%m-%d')
-                else:
-                    # Fallback to current date
-                    parsed_date = get_sa_time()
-                
-                # Convert to ISO format (YYYY-MM-DD)
-                date_str = parsed_date.strftime('%Y-%m-%d')
-                print(f"📅 Parsed date '{date_match.group(1).strip()}' -> '{date_str}'")
-                
-            except Exception as e:
-                print(f"⚠️ Date parsing failed for '{date_str}': {e}")
-                date_str = get_sa_date().strftime('%Y-%m-%d')
-        else:
-            date_str = get_sa_date().strftime('%Y-%m-%d')
-        
-        # Extract student name - prioritize from message, fallback to Discord display name
-        student_pattern = r'Student:\s*(.+?)(?:\n|$)'
-        student_match = re.search(student_pattern, message_content, re.IGNORECASE)
-        student_name = student_match.group(1).strip() if student_match else (author.display_name or author.name)
+        # Single pass over the message - see ciso_parser for the section tokenizer
+        sections = parse_sections(message_content)
         
-        # Extract hours worked
-        hours_pattern = r'Hours Worked:\s*(\d+)'
-        hours_match = re.search(hours_pattern, message_content, re.IGNORECASE)
-        hours_worked = int(hours_match.group(1)) if hours_match else 0
+        # Nothing but a header is a format problem, not an empty journal
+        if len(sections['missing_sections']) >= len(SECTION_TITLES) - 1:
+            logger.warning("⚠️ No journal sections found, missing: %s", ', '.join(sections['missing_sections']),
+                           extra={'discord_user_id': str(author.id)})
+            return None
         
-        # Extract completed today section
-        completed_pattern = r'Completed Today:\s*(.*?)(?=Current Findings|Tomorrow\'s Plan|CISO Input|$)'
-        completed_match = re.search(completed_pattern, message_content, re.DOTALL | re.IGNORECASE)
-        completed_today = completed_match.group(1).strip() if completed_match else ""
-        
-        # Extract current findings/issues
-        findings_pattern = r'Current Findings/Issues:\s*(.*?)(?=Tomorrow\'s Plan|CISO Input|$)'
-        findings_match = re.search(findings_pattern, message_content, re.DOTALL | re.IGNORECASE)
-        current_findings = findings_match.group(1).strip() if findings_match else ""
-        
-        # Extract tomorrow's plan
-        tomorrow_pattern = r'Tomorrow\'s Plan:\s*(.*?)(?=CISO Input|$)'
-        tomorrow_match = re.search(tomorrow_pattern, message_content, re.DOTALL | re.IGNORECASE)
-        tomorrow_plan = tomorrow_match.group(1).strip() if tomorrow_match else ""
+        # Date converted to ISO format (YYYY-MM-DD), falling back to today
+        date_str = sections['date']
+        if date_str:
+            logger.debug("📅 Parsed date '%s' -> '%s'", sections['date_text'], date_str)
+        else:
+            if sections['date_text']:
+                logger.warning("⚠️ Date parsing failed for '%s'", sections['date_text'], extra={'discord_user_id': str(author.id)})
+            date_str = (default_date or get_sa_date()).strftime('%Y-%m-%d')
         
-        # Extract CISO input needed - FIXED THE SYNTAX ERROR
-        ciso_pattern = r'CISO Input Needed:\s*(.*?)$'
-        ciso_match = re.search(ciso_pattern, message_content, re.DOTALL | re.IGNORECASE)
-        ciso_input = ciso_match.group(1).strip() if ciso_match else ""
+        # Student name - prioritize from message, fallback to Discord display name
+        student_name = sections['student_name'] or (author.display_name or author.name)
         
         return {
             'date': date_str,
@@ -116,18 +242,37 @@ def parse_ciso_update(message_content, author):
             'discord_user_id': str(author.id),  # Store Discord User ID
             'discord_username': author.name,    # Store Discord username for reference
             'discord_display_name': author.display_name or author.name,  # Store display name
-            'hours_worked': hours_worked,
-            'completed_today': completed_today,
-            'current_findings': current_findings,
-            'tomorrow_plan': tomorrow_plan,
-            'ciso_input': ciso_input
+            'hours_worked': sections['hours_worked'],
+            'completed_today': sections['completed_today'],
+            'current_findings': sections['current_findings'],
+            'tomorrow_plan': sections['tomorrow_plan'],
+            'ciso_input': sections['ciso_input'],
+            'missing_sections': sections['missing_sections']
         }
     except Exception as e:
-        print(f"Error parsing message: {e}")
+        logger.error("Error parsing message: %s", e, extra={'discord_user_id': str(author.id)})
         return None
 
-def create_notion_entry(parsed_data):
-    """Create a new entry in the Notion database"""
+async def find_notion_entry(cohort, submission_id):
+    """The cohort's Notion row created for one submission (Discord message), or None"""
+    query = {
+        "filter": {"property": SUBMISSION_ID_PROPERTY, "rich_text": {"equals": submission_id}},
+        "page_size": 1
+    }
+    results = (await cohort.notion.query_database(cohort.database_id, query)).get('results')
+    return results[0] if results else None
+
+async def create_notion_entry(parsed_data, attempts=0):
+    """Create a new entry in the submitting cohort's Notion database
+    
+    A failed create may still have reached Notion, so a retry (attempts > 0) first
+    looks for the row carrying this submission's message ID and settles on it if
+    it's there. A second entry the same day has its own ID and is never mistaken for it.
+    """
+    cohort = cohort_router.get(parsed_data.get('cohort'))
+    if cohort is None:
+        # Cohort removed from the config since this was queued; keep it until someone looks
+        return False, f"Unknown cohort {parsed_data.get('cohort')!r}"
     try:
         # Parse date string to ISO format for Notion
         try:
@@ -144,37 +289,37 @@ def create_notion_entry(parsed_data):
         
         # Notion database entry structure - UPDATED with Discord fields
         data = {
-            "parent": {"database_id": NOTION_DATABASE_ID},
+            "parent": {"database_id": cohort.database_id},
             "properties": {
                 "Date": {
                     "date": {"start": parsed_date.strftime('%Y-%m-%d')}
                 },
                 "Student Name": {
-                    "title": [{"text": {"content": parsed_data['student_name']}}]
+                    "title": encode_rich_text(parsed_data['student_name'])
                 },
                 "Discord User ID": {
-                    "rich_text": [{"text": {"content": parsed_data['discord_user_id']}}]
+                    "rich_text": encode_rich_text(parsed_data['discord_user_id'])
                 },
                 "Discord Username": {
-                    "rich_text": [{"text": {"content": parsed_data['discord_username']}}]
+                    "rich_text": encode_rich_text(parsed_data['discord_username'])
                 },
                 "Discord Display Name": {
-                    "rich_text": [{"text": {"content": parsed_data['discord_display_name']}}]
+                    "rich_text": encode_rich_text(parsed_data['discord_display_name'])
                 },
                 "Hours Worked": {
                     "number": parsed_data['hours_worked']
                 },
                 "Completed Today": {
-                    "rich_text": [{"text": {"content": parsed_data['completed_today'][:2000]}}]  # Notion has character limits
+                    "rich_text": encode_rich_text(parsed_data['completed_today'])  # Split into 2000-char segments
                 },
                 "Current Findings": {
-                    "rich_text": [{"text": {"content": parsed_data['current_findings'][:2000]}}]
+                    "rich_text": encode_rich_text(parsed_data['current_findings'])
                 },
                 "Tomorrow Plan": {
-                    "rich_text": [{"text": {"content": parsed_data['tomorrow_plan'][:2000]}}]
+                    "rich_text": encode_rich_text(parsed_data['tomorrow_plan'])
                 },
                 "CISO Input Needed": {
-                    "rich_text": [{"text": {"content": parsed_data['ciso_input'][:2000]}}]
+                    "rich_text": encode_rich_text(parsed_data['ciso_input'])
                 },
                 "CISO Response": {
                     "rich_text": [{"text": {"content": ""}}]  # Empty field for CISO to fill
@@ -188,102 +333,189 @@ def create_notion_entry(parsed_data):
             }
         }
         
-        # Send to Notion API
-        response = requests.post(
-            'https://api.notion.com/v1/pages',
-            headers=NOTION_HEADERS,
-            json=data
-        )
-        
-        if response.status_code == 200:
-            return True, "Entry created successfully"
+        # Send to Notion API - never twice for one submission
+        submission_id = parsed_data.get('message_id')
+        find_existing = None
+        if SUBMISSION_ID_PROPERTY and submission_id:
+            data['properties'][SUBMISSION_ID_PROPERTY] = {"rich_text": encode_rich_text(submission_id)}
+            find_existing = partial(find_notion_entry, cohort, submission_id)
+        page = await find_existing() if attempts and find_existing else None
+        if page:
+            logger.info("♻️ Entry for %s (message %s) already reached Notion", parsed_data['student_name'], submission_id,
+                        extra={'discord_user_id': parsed_data['discord_user_id'], 'message_id': submission_id,
+                               'entry_id': page['id'], 'cohort': cohort.key})
         else:
-            return False, f"Notion API error: {response.status_code} - {response.text}"
+            page = await cohort.notion.create_page(data, find_existing=find_existing)
+        if MIRROR_ENABLED and page:
+            try:
+                cohort.mirror.upsert([page])
+            except Exception as e:
+                logger.warning("⚠️ Could not add new entry to local mirror (next sync will): %s", e,
+                               extra={'entry_id': page.get('id'), 'cohort': cohort.key})
+        return True, "Entry created successfully"
             
+    except NotionAPIError as e:
+        return False, f"Notion API error: {e}"
     except Exception as e:
         return False, f"Error creating Notion entry: {e}"
 
-def get_entries_with_responses(target_date=None):
-    """Fetch Notion entries that have CISO responses but haven't been sent yet"""
-    try:
-        if target_date is None:
-            target_date = get_sa_date().strftime('%Y-%m-%d')
-        
-        # Query Notion database for entries with responses - ONLY for the specific date
-        query_data = {
-            "filter": {
-                "and": [
-                    {
-                        "property": "Date",
-                        "date": {
-                            "equals": target_date  # STRICT date matching
-                        }
-                    },
-                    {
-                        "property": "CISO Response",
-                        "rich_text": {
-                            "is_not_empty": True
-                        }
-                    },
-                    {
-                        "property": "Response Sent",
-                        "checkbox": {
-                            "equals": False
-                        }
+# The pending-response queries leave "Response Sent" to the caller: deliveries tick it while they page
+# through the results, and a filter on it would shift Notion's cursor and skip rows
+def response_sent(entry):
+    return bool((entry['properties'].get('Response Sent') or {}).get('checkbox'))
+
+def build_pending_responses_query(target_date):
+    """Notion filter for entries on target_date that have a CISO response (sent or not - see response_sent)"""
+    return {
+        "filter": {
+            "and": [
+                {
+                    "property": "Date",
+                    "date": {
+                        "equals": target_date  # STRICT date matching
                     }
-                ]
-            },
-            "sorts": [
+                },
                 {
-                    "property": "Student Name",
-                    "direction": "ascending"
+                    "property": "CISO Response",
+                    "rich_text": {
+                        "is_not_empty": True
+                    }
                 }
             ]
-        }
-        
-        response = requests.post(
-            f'https://api.notion.com/v1/databases/{NOTION_DATABASE_ID}/query',
-            headers=NOTION_HEADERS,
-            json=query_data
-        )
-        
-        if response.status_code == 200:
-            results = response.json()['results']
-            
-            # ADDITIONAL SAFETY CHECK: Double-verify the date matches
-            filtered_results = []
-            for entry in results:
-                entry_date = ""
-                if 'Date' in entry['properties'] and entry['properties']['Date']['date']:
-                    entry_date = entry['properties']['Date']['date']['start']
-                
-                # Convert target_date to match Notion's format for comparison
-                try:
-                    # Parse target_date (YYYY-MM-DD) and convert to Notion's format
-                    target_dt = datetime.strptime(target_date, '%Y-%m-%d')
-                    # Notion stores dates in YYYY-MM-DD format in the API
-                    expected_notion_date = target_dt.strftime('%Y-%m-%d')
-                    
-                    # Only include if date exactly matches target date
-                    if entry_date == expected_notion_date:
-                        filtered_results.append(entry)
-                        print(f"✅ Including entry with matching date: {entry_date}")
-                    else:
-                        print(f"⚠️ Filtered out entry with mismatched date: {entry_date} != {expected_notion_date}")
-                except Exception as e:
-                    print(f"❌ Date parsing error for {entry_date}: {e}")
-                    # If we can't parse, exclude for safety
-                    continue
-            
-            print(f"📊 Found {len(filtered_results)} entries with responses for {target_date}")
-            return filtered_results
-        else:
-            print(f"Error fetching entries: {response.status_code} - {response.text}")
-            return []
+        },
+        "sorts": [
+            {
+                "property": "Student Name",
+                "direction": "ascending"
+            }
+        ]
+    }
+
+def build_pending_range_query(start_date, end_date):
+    """Notion filter for every CISO response dated start_date..end_date inclusive (sent or not - see response_sent)"""
+    return {
+        "filter": {
+            "and": [
+                {"property": "Date", "date": {"on_or_after": start_date}},
+                {"property": "Date", "date": {"on_or_before": end_date}},
+                {"property": "CISO Response", "rich_text": {"is_not_empty": True}}
+            ]
+        },
+        "sorts": [
+            {"property": "Student Name", "direction": "ascending"},
+            {"property": "Date", "direction": "ascending"}
+        ]
+    }
+
+async def refresh_mirror_for_read(cohort, cached=False):
+    """True when a read can be answered locally; unless cached, pull the latest changes first"""
+    if not mirror_ready(cohort):
+        return False
+    if not cached:
+        # Deliveries must see responses written since the last poll
+        try:
+            await cohort.mirror_sync.sync_now()
+        except Exception as e:
+            logger.warning("⚠️ Mirror sync failed, answering from local copy (lag %.0fs): %s", cohort.mirror_sync.lag, e, extra={'cohort': cohort.key})
+    return True
+
+async def iter_entries_with_responses(target_date=None, page_size=None, cached=False, cohort=None):
+    """Stream Notion entries that have CISO responses but haven't been sent yet, page by page
+    
+    Answered from the local mirror once it has synced; cached=True skips the delta poll
+    first (and, without the mirror, lets back-to-back admin commands share one query result).
+    Only read-only previews and counts may pass cached=True - deliveries never do.
+    """
+    cohort = cohort or cohort_router.default
+    if target_date is None:
+        target_date = get_sa_date().strftime('%Y-%m-%d')
+    
+    # Notion stores dates in YYYY-MM-DD format in the API
+    try:
+        expected_notion_date = datetime.strptime(target_date, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError as e:
+        logger.error("❌ Date parsing error for %s: %s", target_date, e, extra={'cohort': cohort.key})
+        return
+    
+    if await refresh_mirror_for_read(cohort, cached):
+        entries = cohort.mirror.pending_responses(expected_notion_date)
+        logger.info("📊 Found %d entries with responses for %s (local mirror)", len(entries), target_date, extra={'cohort': cohort.key})
+        for entry in entries:
+            yield entry
+        return
+    
+    found = 0
+    try:
+        # Query Notion database for entries with responses - ONLY for the specific date
+        async for entry in cohort.notion.iter_database(
+            cohort.database_id,
+            build_pending_responses_query(target_date),
+            page_size=page_size or NOTION_PAGE_SIZE,
+            cached=cached
+        ):
+            if response_sent(entry):
+                continue
+            entry_date = ""
+            if 'Date' in entry['properties'] and entry['properties']['Date']['date']:
+                entry_date = entry['properties']['Date']['date']['start']
             
+            # ADDITIONAL SAFETY CHECK: Only include if date exactly matches target date
+            if entry_date == expected_notion_date:
+                found += 1
+                logger.debug("✅ Including entry with matching date: %s", entry_date)
+                yield entry
+            else:
+                logger.warning("⚠️ Filtered out entry with mismatched date: %s != %s", entry_date, expected_notion_date,
+                               extra={'entry_id': entry['id'], 'cohort': cohort.key})
+    
+    except NotionAPIError as e:
+        logger.error("Error fetching entries: %s", e, extra={'cohort': cohort.key})
+    except Exception as e:
+        logger.error("Error fetching entries with responses: %s", e, extra={'cohort': cohort.key})
+    
+    logger.info("📊 Found %d entries with responses for %s", found, target_date, extra={'cohort': cohort.key})
+
+async def iter_entries_in_range(start_date, end_date, page_size=None, cached=False, cohort=None):
+    """Stream every unsent CISO response dated start_date..end_date with one query, by student then date"""
+    cohort = cohort or cohort_router.default
+    try:
+        for value in (start_date, end_date):
+            datetime.strptime(value, '%Y-%m-%d')
+    except ValueError as e:
+        logger.error("❌ Date parsing error for %s..%s: %s", start_date, end_date, e, extra={'cohort': cohort.key})
+        return
+    
+    if await refresh_mirror_for_read(cohort, cached):
+        entries = cohort.mirror.pending_range(start_date, end_date)
+        logger.info("📊 Found %d entries with responses for %s..%s (local mirror)", len(entries), start_date, end_date,
+                    extra={'cohort': cohort.key})
+        for entry in entries:
+            yield entry
+        return
+    
+    found = 0
+    try:
+        # The date range is exact, so unlike the per-date path only Response Sent is re-checked
+        async for entry in cohort.notion.iter_database(
+            cohort.database_id,
+            build_pending_range_query(start_date, end_date),
+            page_size=page_size or NOTION_PAGE_SIZE,
+            cached=cached
+        ):
+            if response_sent(entry):
+                continue
+            found += 1
+            yield entry
+    except NotionAPIError as e:
+        logger.error("Error fetching entries: %s", e, extra={'cohort': cohort.key})
     except Exception as e:
-        print(f"Error fetching entries with responses: {e}")
-        return []
+        logger.error("Error fetching entries with responses: %s", e, extra={'cohort': cohort.key})
+    
+    logger.info("📊 Found %d entries with responses for %s..%s", found, start_date, end_date, extra={'cohort': cohort.key})
+
+async def get_entries_with_responses(target_date=None, cached=False, cohort=None):
+    """Fetch all Notion entries that have CISO responses but haven't been sent yet"""
+    return [entry async for entry in iter_entries_with_responses(target_date, cached=cached, cohort=cohort)]
 
 def extract_response_data(notion_entry):
     """Extract relevant data from Notion entry - UPDATED to include Discord User ID"""
@@ -292,23 +524,23 @@ def extract_response_data(notion_entry):
         
         # Extract student name
         student_name = ""
-        if 'Student Name' in properties and properties['Student Name']['title']:
-            student_name = properties['Student Name']['title'][0]['text']['content']
+        if 'Student Name' in properties:
+            student_name = decode_rich_text(properties['Student Name'])
         
         # Extract Discord User ID
         discord_user_id = ""
-        if 'Discord User ID' in properties and properties['Discord User ID']['rich_text']:
-            discord_user_id = properties['Discord User ID']['rich_text'][0]['text']['content']
+        if 'Discord User ID' in properties:
+            discord_user_id = decode_rich_text(properties['Discord User ID'])
         
         # Extract Discord Username (fallback)
         discord_username = ""
-        if 'Discord Username' in properties and properties['Discord Username']['rich_text']:
-            discord_username = properties['Discord Username']['rich_text'][0]['text']['content']
+        if 'Discord Username' in properties:
+            discord_username = decode_rich_text(properties['Discord Username'])
         
         # Extract Discord Display Name (fallback)
         discord_display_name = ""
-        if 'Discord Display Name' in properties and properties['Discord Display Name']['rich_text']:
-            discord_display_name = properties['Discord Display Name']['rich_text'][0]['text']['content']
+        if 'Discord Display Name' in properties:
+            discord_display_name = decode_rich_text(properties['Discord Display Name'])
         
         # Extract date
         entry_date = ""
@@ -317,8 +549,8 @@ def extract_response_data(notion_entry):
         
         # Extract CISO response
         ciso_response = ""
-        if 'CISO Response' in properties and properties['CISO Response']['rich_text']:
-            ciso_response = properties['CISO Response']['rich_text'][0]['text']['content']
+        if 'CISO Response' in properties:
+            ciso_response = decode_rich_text(properties['CISO Response'])
         
         return {
             'entry_id': notion_entry['id'],
@@ -331,7 +563,7 @@ def extract_response_data(notion_entry):
         }
         
     except Exception as e:
-        print(f"Error extracting response data: {e}")
+        logger.error("Error extracting response data: %s", e, extra={'entry_id': notion_entry.get('id')})
         return None
 
 def verify_admin_code(provided_code):
@@ -347,34 +579,69 @@ async def require_admin_auth(ctx, provided_code):
         return False
     return True
 
-def mark_response_sent(entry_id):
+async def mark_response_sent(entry_id, cohort=None):
     """Mark a Notion entry as response sent"""
     try:
-        update_data = {
-            "properties": {
-                "Response Sent": {
-                    "checkbox": True
-                },
-                "Status": {
-                    "select": {"name": "Responded"}
-                }
+        update_properties = {
+            "Response Sent": {
+                "checkbox": True
+            },
+            "Status": {
+                "select": {"name": "Responded"}
             }
         }
         
-        response = requests.patch(
-            f'https://api.notion.com/v1/pages/{entry_id}',
-            headers=NOTION_HEADERS,
-            json=update_data
-        )
-        
-        return response.status_code == 200
+        await (cohort or cohort_router.default).notion.update_page(entry_id, update_properties)
+        return True
         
     except Exception as e:
-        print(f"Error marking response as sent: {e}")
+        logger.error("Error marking response as sent: %s", e, extra={'entry_id': entry_id, 'cohort': (cohort or cohort_router.default).key})
         return False
 
-async def send_ciso_response(response_data):
-    """Send CISO response to student via DM - UPDATED to use Discord User ID"""
+def compose_ciso_messages(responses, ciso_name=CISO_NAME):
+    """DM chunks carrying every CISO response for one student, split on paragraphs under Discord's limit"""
+    first = responses[0]
+    if len(responses) == 1:
+        reviewed = f"I've reviewed your journal entry from {first['date']}. Here's my personal feedback:"
+        sections = [first['ciso_response']]
+    else:
+        dates = ", ".join(response_data['date'] for response_data in responses)
+        reviewed = f"I've reviewed your journal entries from {dates}. Here's my personal feedback:"
+        sections = [f"**{response_data['date']}**\n{response_data['ciso_response']}" for response_data in responses]
+    
+    header = f"""🛡️ **Message from your CISO - {ciso_name}**
+*Delivered via Elliot Alderson Bot*
+
+Hi {first['student_name']},
+
+{reviewed}"""
+    footer = f"""Remember, I'm always here to support your cybersecurity journey. Feel free to reach out directly if you need immediate assistance.
+
+Best regards,
+{ciso_name}
+Your CISO
+
+---
+*This message was delivered through Elliot Alderson, your CISO Bot Assistant*"""
+    return compose_message(header, sections, footer)
+
+class PartialDeliveryError(Exception):
+    """Some but not all parts of a student's DM went out"""
+
+async def send_ciso_responses(responses, cohort=None):
+    """Send CISO responses for one student via DM - UPDATED to use Discord User ID
+    
+    All of the student's responses are coalesced into as few messages as fit under
+    Discord's 2000-character limit, usually just one. Raises PartialDeliveryError
+    when a later part fails after earlier ones were delivered.
+    """
+    response_data = responses[0]
+    cohort = cohort or cohort_router.default
+    log_fields = {
+        'discord_user_id': response_data['discord_user_id'],
+        'entry_ids': [response['entry_id'] for response in responses],
+        'cohort': cohort.key
+    }
     try:
         user = None
         
@@ -382,158 +649,461 @@ async def send_ciso_response(response_data):
         if response_data['discord_user_id']:
             try:
                 user_id = int(response_data['discord_user_id'])
-                user = bot.get_user(user_id)
-                if not user:
-                    # Try fetching if not in cache
-                    user = await bot.fetch_user(user_id)
-                print(f"✅ Found user by ID: {user.name} ({user_id})")
+                user = await resolve_user(user_id)
+                logger.debug("✅ Found user by ID: %s (%s)", user.name, user_id, extra=log_fields)
             except (ValueError, discord.NotFound) as e:
-                print(f"⚠️ Could not find user by ID {response_data['discord_user_id']}: {e}")
+                logger.warning("⚠️ Could not find user by ID %s: %s", response_data['discord_user_id'], e, extra=log_fields)
         
-        # Fallback method: Search by display name or username
+        # Fallback method: Look up display name, username or student name in the member index
         if not user:
-            print(f"🔍 Falling back to name search for: {response_data['student_name']}")
-            for guild in bot.guilds:
-                for member in guild.members:
-                    # Check multiple name variations
-                    names_to_check = [
-                        response_data['student_name'].lower(),
-                        response_data['discord_display_name'].lower(),
-                        response_data['discord_username'].lower()
-                    ]
-                    
-                    member_names = [
-                        member.display_name.lower(),
-                        member.name.lower()
-                    ]
-                    
-                    if any(name in member_names for name in names_to_check if name):
-                        user = member
-                        print(f"✅ Found user by name search: {user.name}")
-                        break
-                if user:
-                    break
+            logger.debug("🔍 Falling back to name lookup for: %s", response_data['student_name'], extra=log_fields)
+            user_id = member_index.lookup(
+                response_data['student_name'],
+                response_data['discord_display_name'],
+                response_data['discord_username']
+            )
+            if user_id:
+                try:
+                    user = await resolve_user(user_id)
+                    logger.debug("✅ Found user by name lookup: %s", user.name, extra=log_fields)
+                except discord.NotFound as e:
+                    logger.warning("⚠️ Indexed user %s no longer exists: %s", user_id, e, extra=log_fields)
         
         if not user:
-            print(f"❌ Could not find Discord user for: {response_data['student_name']} (ID: {response_data['discord_user_id']})")
+            logger.error("❌ Could not find Discord user for: %s (ID: %s)", response_data['student_name'], response_data['discord_user_id'],
+                         extra=log_fields)
             return False, f"User not found: {response_data['student_name']}"
         
-        # Format the message
-        message = f"""🛡️ **Message from your CISO - {CISO_NAME}**
-*Delivered via Elliot Alderson Bot*
-
-Hi {response_data['student_name']},
-
-I've reviewed your journal entry from {response_data['date']}. Here's my personal feedback:
-
-{response_data['ciso_response']}
-
-Remember, I'm always here to support your cybersecurity journey. Feel free to reach out directly if you need immediate assistance.
-
-Best regards,
-{CISO_NAME}
-Your CISO
-
----
-*This message was delivered through Elliot Alderson, your CISO Bot Assistant*"""
-        
         # Send DM
-        await user.send(message)
-        print(f"📤 Response sent successfully to {user.name}")
+        chunks = compose_ciso_messages(responses, cohort.ciso_name)
+        for sent_chunks, chunk in enumerate(chunks):
+            try:
+                with DM_SEND_SECONDS.time():
+                    await user.send(chunk)
+            except discord.HTTPException as e:
+                if sent_chunks:
+                    raise PartialDeliveryError(f"Only {sent_chunks}/{len(chunks)} message parts reached {user.name}: {e}") from e
+                raise
+        logger.info("📤 %d response(s) sent successfully to %s in %d message(s)", len(responses), user.name, len(chunks), extra=log_fields)
         return True, f"Message sent to {user.name}"
         
+    except PartialDeliveryError:
+        raise
     except discord.Forbidden:
         error_msg = f"Cannot send DM to {response_data['student_name']} - DMs might be disabled"
-        print(f"🚫 {error_msg}")
+        logger.warning("🚫 %s", error_msg, extra=log_fields)
         return False, error_msg
     except Exception as e:
         error_msg = f"Error sending response to {response_data['student_name']}: {e}"
-        print(f"❌ {error_msg}")
+        logger.error("❌ %s", error_msg, extra=log_fields)
         return False, error_msg
 
+# Write-behind queue: submissions are persisted locally first, then drained to Notion
+INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', '10'))
+ingest_queue = IngestQueue(os.path.join(PROCESS_DATA_DIR, 'ingest_queue.db'))
+ingest_worker = IngestWorker(ingest_queue, create_notion_entry, batch_size=INGEST_BATCH_SIZE)
+
+# Backfill of entries posted while the bot was down - history is parsed in worker threads and queued
+# separately, and that queue only writes while the live one is empty, at no more than BACKFILL_RATE
+BACKFILL_DAYS = int(os.getenv('BACKFILL_DAYS', '14'))  # How far back a first !backfill looks
+BACKFILL_WORKERS = int(os.getenv('BACKFILL_WORKERS', '4'))  # Parser threads
+BACKFILL_RATE = float(os.getenv('BACKFILL_RATE', '1'))  # Notion writes/second for backfilled entries
+BACKFILL_BATCH_SIZE = int(os.getenv('BACKFILL_BATCH_SIZE', '5'))
+BACKFILL_PROGRESS_SECONDS = float(os.getenv('BACKFILL_PROGRESS_SECONDS', '15'))  # Progress message refresh
+backfill_queue = IngestQueue(os.path.join(PROCESS_DATA_DIR, 'backfill_queue.db'))
+backfill_checkpoints = BackfillCheckpoints(os.path.join(PROCESS_DATA_DIR, 'backfill_checkpoints.db'))
+backfill_limiter = TokenBucket(rate=BACKFILL_RATE)
+backfill_run = None
+backfill_task = None
+
+async def write_backfilled_entry(parsed_data, attempts=0):
+    """create_notion_entry for a backfilled entry, once live submissions are through
+    
+    Only live submissions that are due count; one backing off after a Notion error
+    shouldn't hold the whole backfill until its retry.
+    """
+    while ingest_queue.due_depth():
+        await asyncio.sleep(1)
+    await backfill_limiter.acquire()
+    return await create_notion_entry(parsed_data, attempts)
+
+backfill_worker = IngestWorker(backfill_queue, write_backfilled_entry, batch_size=BACKFILL_BATCH_SIZE)
+
+def is_journal_message(message):
+    return not message.author.bot and message.content.lower().startswith('daily ciso update')
+
+def parse_backfilled_message(message):
+    """parse_ciso_update for a message from history (runs in a worker thread); undated entries get the day it was posted"""
+    parsed_data = parse_ciso_update(message.content, message.author, default_date=message.created_at.astimezone(SAST).date())
+    if parsed_data:
+        parsed_data['message_id'] = str(message.id)
+    return parsed_data
+
+def entry_key(submission_id, discord_user_id, entry_date):
+    """Backfill dedupe key: the submission (Discord message) ID, or (user ID, day) for entries written without one"""
+    return submission_id or (discord_user_id, entry_date[:10])
+
+async def existing_entry_keys(cohort, since_date):
+    """entry_key of every entry dated since_date that's in the cohort's database or queued for it"""
+    if mirror_ready(cohort):
+        keys = {entry_key(*row) for row in cohort.mirror.entry_keys(since_date)}
+    else:
+        keys = set()
+        query = {"filter": {"property": "Date", "date": {"on_or_after": since_date}}}
+        async for page in cohort.notion.iter_database(cohort.database_id, query, page_size=NOTION_PAGE_SIZE):
+            properties = page.get('properties', {})
+            entry_date = ((properties.get('Date') or {}).get('date') or {}).get('start', '')
+            keys.add(entry_key(decode_rich_text(properties.get(SUBMISSION_ID_PROPERTY)),
+                               decode_rich_text(properties.get('Discord User ID')), entry_date))
+    for queue in (ingest_queue, backfill_queue):
+        keys.update(
+            entry_key(parsed_data.get('message_id'), parsed_data['discord_user_id'], parsed_data['date'])
+            for parsed_data in queue.pending_payloads()
+            if cohort_router.get(parsed_data.get('cohort')) is cohort
+        )
+    return keys
+
+def channel_history(channel_id, start):
+    """History source for a journal channel, fetched lazily so a missing channel only fails its own source"""
+    async def history(after_id):
+        channel = bot.get_channel(channel_id) or await bot.fetch_channel(channel_id)
+        async for message in channel.history(limit=None, after=discord.Object(after_id) if after_id else start, oldest_first=True):
+            yield message
+    return history
+
+def dm_history(user_id, start):
+    """History source for the bot's DMs with one student"""
+    async def history(after_id):
+        user = await resolve_user(user_id)
+        channel = user.dm_channel or await user.create_dm()
+        async for message in channel.history(limit=None, after=discord.Object(after_id) if after_id else start, oldest_first=True):
+            yield message
+    return history
+
+def backfill_sources(cohort, start, fallback_channel_id=None):
+    """(name, history) for the cohort's journal channels and every known student's DMs"""
+    channel_ids = cohort.channel_ids or ((fallback_channel_id,) if fallback_channel_id else ())
+    sources = [(f'channel:{channel_id}', channel_history(channel_id, start)) for channel_id in channel_ids]
+    students = rollups.cohort(cohort.key).students
+    sources += [(f'dm:{key}', dm_history(int(key), start)) for key in students if key.isdigit()]
+    return sources
+
+def build_backfill(cohort, sources, existing):
+    def is_duplicate(message, parsed_data):
+        # Entries written before submission IDs only match on (user, day); a second entry
+        # the same day is otherwise a separate submission and gets its own row
+        key = parsed_data['message_id']
+        if message.id in processed_messages or key in existing or (parsed_data['discord_user_id'], parsed_data['date']) in existing:
+            return True
+        existing.add(key)
+        return False
+    
+    def enqueue(parsed_data):
+        parsed_data['cohort'] = cohort.key
+        backfill_queue.enqueue(parsed_data)
+        backfill_worker.notify()
+        member_index.add_alias(parsed_data['student_name'], int(parsed_data['discord_user_id']))
+        rollups.record(cohort.key, student_key(parsed_data['discord_user_id'], parsed_data['student_name']),
+                       parsed_data['student_name'], parsed_data['date'], parsed_data['hours_worked'])
+    
+    return BackfillRun(backfill_checkpoints, sources, is_journal_message, parse_backfilled_message, is_duplicate, enqueue,
+                       workers=BACKFILL_WORKERS)
+
+# Durable "Response Sent" log per cohort - a DM is recorded here before anything else, then a worker pool PATCHes Notion
+def open_sent_update_logs():
+    for cohort in cohort_router:
+        cohort.sent_update_log = SentUpdateLog(os.path.join(cohort_data_dir(cohort), 'sent_updates.db'))
+        cohort.sent_updater = SentUpdater(
+            cohort.sent_update_log,
+            partial(mark_response_sent, cohort=cohort),
+            workers=MARK_SENT_WORKERS,
+            batch_size=MARK_SENT_BATCH_SIZE
+        )
+
+open_sent_update_logs()
+
+def record_response_delivered(entry_id, cohort=None):
+    """Note a delivered DM; Notion is updated in the background"""
+    cohort = cohort or cohort_router.default
+    cohort.sent_updater.record_delivered(entry_id)
+    if MIRROR_ENABLED:
+        cohort.mirror.mark_sent(entry_id)
+    return True
+
+# Delivery ledger (page ID + response hash) so overlapping auto/manual runs never send the same feedback twice
+delivery_ledger = DeliveryLedger(os.path.join(DATA_DIR, 'delivery_ledger.db'))
+
+async def claim_delivery(response_data, cohort=None):
+    """Reserve a response for this run; False if it was already delivered or another run has it"""
+    if (cohort or cohort_router.default).sent_updater.is_pending(response_data['entry_id']):
+        return False  # DM went out, Notion just hasn't confirmed "Response Sent" yet
+    return await delivery_ledger.claim(response_data['entry_id'], response_data['ciso_response'])
+
+async def send_claimed_responses(responses, cohort=None):
+    """send_ciso_responses for claimed entries, settling the ledger with the outcome"""
+    try:
+        success, message = await send_ciso_responses(responses, cohort)
+    except PartialDeliveryError as e:
+        # The student already has part of it; a resend would repeat that, so the claims stay in doubt
+        logger.error("❌ %s - left in the delivery ledger for follow-up, not retried", e,
+                     extra={'entry_ids': [response_data['entry_id'] for response_data in responses]})
+        return False, f"{e} (not retried automatically)"
+    except Exception:
+        for response_data in responses:
+            delivery_ledger.release(response_data['entry_id'], response_data['ciso_response'])
+        raise
+    # A cancelled send leaves the claims in place: the DM may already have gone out
+    settle = delivery_ledger.confirm if success else delivery_ledger.release
+    for response_data in responses:
+        settle(response_data['entry_id'], response_data['ciso_response'])
+    return success, message
+
+def delivery_group_key(response_data):
+    """Recipient key for grouping a student's entries: stored Discord ID, else normalized student name"""
+    return response_data['discord_user_id'] or normalize_name(response_data['student_name'])
+
+# One scheduler runs every cohort's jobs - last runs are persisted so a missed run catches up on restart
+scheduler = Scheduler(SAST, state_path=os.path.join(DATA_DIR, 'scheduler_state.json'))
+
+# Leases shared by every process on this host (SQLite in DATA_DIR):
+# - "leader": exactly one process runs the scheduler, Response Sent updaters and mirror syncs; when it
+#   dies another takes over within LEADER_LEASE_TTL and the scheduler catches up whatever it missed
+# - "instance:<shards>": a second process started with the same shards refuses to run
+LEADER_LEASE_TTL = float(os.getenv('LEADER_LEASE_TTL', '30'))
+SHARD_LABEL = ','.join(map(str, SHARD_IDS)) if SHARD_IDS else 'all'
+lease_store = LeaseStore(os.path.join(DATA_DIR, 'leases.db'))
+
+async def start_leader_duties():
+    """Background work that must run in exactly one process"""
+    for cohort in cohort_router:
+        cohort.sent_updater.start()  # Also finishes any updates left over from a crash
+        if MIRROR_ENABLED:
+            cohort.mirror_sync.start()
+    scheduler.start()
+
+async def stop_leader_duties():
+    await scheduler.stop()  # Cancels job runs in progress too, before the lease can pass to another process
+    for cohort in cohort_router:
+        await cohort.mirror_sync.stop()
+        await cohort.sent_updater.stop()
+
+leader_lease = Lease(lease_store, 'leader', default_holder(SHARD_LABEL), ttl=LEADER_LEASE_TTL,
+                     on_acquired=start_leader_duties, on_lost=stop_leader_duties)
+instance_lease = Lease(lease_store, f'instance:{SHARD_LABEL}', default_holder(), ttl=LEADER_LEASE_TTL,
+                       on_lost=lambda: bot.close())
+
+# Metrics - exposed in Prometheus format on METRICS_HOST:METRICS_PORT/metrics and summarized by !stats
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+# Shard processes each listen on METRICS_PORT + their process index (9108, 9109, ...) so all of them can be scraped
+METRICS_BASE_PORT = int(os.getenv('METRICS_PORT', '9108') or 0)  # 0 disables the endpoint
+METRICS_PORT = METRICS_BASE_PORT + PROCESS_INDEX if METRICS_BASE_PORT else 0
+metrics_server = MetricsServer(REGISTRY, host=METRICS_HOST, port=METRICS_PORT)
+PARSE_SECONDS = Histogram('ciso_parse_seconds', 'Time to parse a Daily CISO Update message')
+JOURNAL_MESSAGES = Counter('journal_messages_total', 'Journal submissions by outcome')
+DM_SEND_SECONDS = Histogram('discord_dm_send_seconds', 'Latency of each DM sent to a student')
+DELIVERY_RESPONSES = Counter('delivery_responses_total', 'CISO responses handled by delivery runs by outcome')
+DELIVERY_RUN_SECONDS = Histogram('delivery_run_seconds', 'Wall time of a delivery run', buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800))
+Gauge('ingest_queue_depth', 'Journal submissions waiting to be written to Notion', ingest_queue.depth)
+Gauge('backfill_queue_depth', 'Backfilled journal entries waiting to be written to Notion', backfill_queue.depth)
+Gauge('sent_updates_queue_depth', 'Delivered responses whose Response Sent update is still owed',
+      lambda: {(('cohort', cohort.key),): cohort.sent_update_log.depth() for cohort in cohort_router})
+Gauge('sent_updates_oldest_age_seconds', 'Age of the oldest unconfirmed Response Sent update',
+      lambda: {(('cohort', cohort.key),): cohort.sent_update_log.oldest_age() for cohort in cohort_router})
+Gauge('delivery_ledger_in_doubt', 'Delivery claims not yet settled (in flight, or left in doubt by a partial or interrupted send)',
+      delivery_ledger.in_doubt)
+Gauge('delivery_ledger_skipped_total', 'Deliveries skipped because the ledger had them', lambda: delivery_ledger.skipped, kind='counter')
+Gauge('dedupe_cache_size', 'Message IDs held by the dedupe cache', lambda: len(processed_messages))
+Gauge('dedupe_cache_hits_total', 'Duplicate messages suppressed', lambda: processed_messages.hits, kind='counter')
+Gauge('dedupe_cache_misses_total', 'New messages seen by the dedupe cache', lambda: processed_messages.misses, kind='counter')
+Gauge('user_cache_size', 'Users held by the bounded on-demand user cache', lambda: len(user_cache))
+Gauge('notion_client_events_total', 'Notion client requests, retries and errors by cohort and kind',
+      lambda: {
+          (('cohort', cohort.key), ('kind', kind)): value
+          for cohort in cohort_router for kind, value in cohort.notion.stats().items()
+      }, kind='counter')
+Gauge('notion_mirror_rows', 'Rows in each local Notion mirror',
+      lambda: {(('cohort', cohort.key),): cohort.mirror.row_count() for cohort in cohort_router} if MIRROR_ENABLED else None)
+Gauge('notion_mirror_lag_seconds', 'Seconds since each local mirror last synced',
+      lambda: {
+          (('cohort', cohort.key),): cohort.mirror_sync.lag
+          for cohort in cohort_router if cohort.mirror_sync.last_sync
+      } if MIRROR_ENABLED else None)
+Gauge('leader', '1 while this process holds the leader lease and runs the scheduled jobs',
+      lambda: {(('shards', SHARD_LABEL),): int(leader_lease.held)})
+Gauge('lease_acquisitions_total', 'Times this process acquired each lease',
+      lambda: {(('lease', lease.name),): lease.acquisitions for lease in (leader_lease, instance_lease)}, kind='counter')
+Gauge('rollups_students', 'Students tracked by the in-memory rollups', lambda: rollups.stats()['students'])
+Gauge('rollups_array_bytes', 'Bytes held by the rollup day arrays', rollups.memory_bytes)
+Gauge('rollups_entries_recorded_total', 'Journal entries folded into the rollups', lambda: rollups.recorded, kind='counter')
+Gauge('rollup_sync_skipped_total', "Mirrored rows the rollup sync couldn't fold in", lambda: rollup_sync.skipped, kind='counter')
+
+def build_delivery_pipeline(cohort, group=False, merge=False):
+    """Delivery pipeline wired to the Discord sender and the cohort's durable sent-update log
+    
+    group=True hands each student's entries to one worker in date order; merge=True also
+    folds them into a single DM. The pending-response queries sort by student, so each
+    student's group goes out as soon as the next student's rows start.
+    """
+    return DeliveryPipeline(
+        extract=extract_response_data,
+        send=partial(send_claimed_responses, cohort=cohort),
+        mark=partial(record_response_delivered, cohort=cohort),
+        concurrency=DELIVERY_CONCURRENCY,
+        claim=partial(claim_delivery, cohort=cohort),
+        group_by=delivery_group_key if group or merge else None,
+        merge=merge,
+        ordered=True
+    )
+
+async def deliver_responses(target_date, cohort=None):
+    """Send every pending CISO response for target_date through the delivery pipeline
+    
+    Always reads fresh (delta poll or uncached query) so responses written moments ago go out.
+    """
+    cohort = cohort or cohort_router.default
+    result = await build_delivery_pipeline(cohort, merge=COALESCE_DMS).run(
+        iter_entries_with_responses(target_date, cohort=cohort)
+    )
+    report_delivery(f"Delivery for {target_date}", result, mode='daily', cohort=cohort)
+    return result
+
+def report_delivery(label, result, mode, cohort):
+    """Log a delivery run's stage stats and feed the delivery metrics"""
+    if len(cohort_router) > 1:
+        label = f"{label} [{cohort.key}]"
+    logger.info("📊 %s:\n%s", label, result.stats_summary(), extra={'cohort': cohort.key})
+    logger.info("📡 Notion client: %s", cohort.notion.stats(), extra={'cohort': cohort.key})
+    logger.info("📝 Response Sent updates: %s", cohort.sent_updater.stats(), extra={'cohort': cohort.key})
+    DELIVERY_RESPONSES.inc(result.sent_count, outcome='sent')
+    DELIVERY_RESPONSES.inc(result.failed_count, outcome='failed')
+    DELIVERY_RESPONSES.inc(result.skipped_count, outcome='skipped')
+    DELIVERY_RUN_SECONDS.observe(result.elapsed, mode=mode)
+
+async def deliver_backlog(start_date, end_date, merge=BACKLOG_MERGE, cohort=None):
+    """Send every pending CISO response dated start_date..end_date, grouped by student"""
+    cohort = cohort or cohort_router.default
+    result = await build_delivery_pipeline(cohort, group=True, merge=merge).run(
+        iter_entries_in_range(start_date, end_date, cohort=cohort)
+    )
+    report_delivery(f"Backlog delivery for {start_date}..{end_date} ({'merged' if merge else 'separate'} DMs)", result,
+                    mode='backlog', cohort=cohort)
+    return result
+
+@bot.event
+async def setup_hook():
+    """Start background workers once, before the gateway connects"""
+    ingest_worker.start()  # Every process drains its own shards' submissions
+    backfill_worker.start()  # Finishes a backfill interrupted by a restart
+    if MIRROR_ENABLED:
+        rollup_sync.start()
+    for cohort in cohort_router:
+        # Students who already have entries stay resolvable by the name they journal under (the only
+        # names indexed in low-memory mode) and keep DMing into the right cohort after a restart
+        for user_id, student_name in cohort.mirror.known_students():
+            if not user_id.isdigit():
+                continue
+            member_index.add_alias(student_name, int(user_id))
+            if len(cohort_router) > 1:
+                cohort_router.remember(int(user_id), cohort)
+    if METRICS_PORT:
+        try:
+            await metrics_server.start()
+            logger.info("📈 Metrics at http://%s:%d/metrics", METRICS_HOST, METRICS_PORT)
+        except OSError as e:
+            logger.warning("⚠️ Could not start metrics endpoint on %s:%d: %s", METRICS_HOST, METRICS_PORT, e)
+    
+    for cohort in cohort_router:
+        scheduler.add_job(cohort.job_name('daily_delivery'), cohort.delivery_cron, partial(auto_send_daily_responses, cohort=cohort))
+        if cohort.reminder_cron:
+            # A reminder hours late is just noise, so only catch up briefly
+            scheduler.add_job(cohort.job_name('journal_reminder'), cohort.reminder_cron,
+                              partial(scheduled_journal_reminder, cohort=cohort), catch_up_window=timedelta(hours=1))
+    # The leader lease starts the scheduler and the other single-process duties wherever it lands
+    leader_lease.start()
+
 @bot.event
 async def on_ready():
-    print(f'Bot is ready! Logged in as {bot.user.name} (ID: {bot.user.id})')
-    print(f'Connected to {len(bot.guilds)} guilds')
+    logger.info('Bot is ready! Logged in as %s (ID: %s)', bot.user.name, bot.user.id)
+    logger.info('Connected to %d guilds', len(bot.guilds))
+    if SHARD_COUNT:
+        logger.info('🧩 Shards %s of %s; leader: %s', sorted(bot.shards), bot.shard_count, leader_lease.current_holder() or 'none yet')
+    
+    # (Re)build the member name index - rebuilding on reconnect covers events missed while offline
+    member_index.build(bot.guilds)
+    logger.info('🗂️ Indexed %d member names', len(member_index))
+
+@bot.event
+async def on_member_join(member):
+    member_index.add_member(member)
+
+@bot.event
+async def on_member_update(before, after):
+    member_index.add_member(after)
+
+@bot.event
+async def on_member_remove(member):
+    member_index.remove_member(member)
+
+@bot.event
+async def on_user_update(before, after):
+    # Username/global name changes apply to every guild the user shares with us
+    for guild in after.mutual_guilds:
+        member = guild.get_member(after.id)
+        if member:
+            member_index.add_member(member)
+
+@bot.event
+async def on_guild_join(guild):
+    member_index.add_guild(guild)
+
+@bot.event
+async def on_guild_remove(guild):
+    member_index.remove_guild(guild)
+
+async def auto_send_daily_responses(scheduled_for=None, cohort=None):
+    """Automatically send CISO responses at the scheduled delivery time (18:00 SAST by default)"""
+    await bot.wait_until_ready()
+    cohort = cohort or cohort_router.default
+    # Deliver for the day the run was scheduled, so a catch-up after a restart still uses the right date
+    current_time = scheduled_for or get_sa_time()
+    
+    current_date = current_time.strftime('%Y-%m-%d')
+    
+    logger.info("🕕 %s SAST - Auto-sending daily CISO responses for %s", current_time.strftime('%H:%M'), current_date, extra={'cohort': cohort.key})
+    
+    # Stream entries with responses for today - the first student's DM goes out as soon as the next student's row arrives
+    result = await deliver_responses(current_date, cohort=cohort)
+    sent_count = result.sent_count
+    failed_count = result.failed_count
+    failed_details = result.failed_details
     
-    # Check if this is a reconnection (potential duplicate instance)
-    if hasattr(bot, '_ready_called'):
-        print("⚠️ WARNING: on_ready called multiple times - possible duplicate instance!")
+    if sent_count == 0 and failed_count == 0:
+        logger.info("📭 No pending CISO responses found for %s", current_date, extra={'cohort': cohort.key})
         return
     
-    bot._ready_called = True
-    auto_send_daily_responses.start()
-
-@tasks.loop(minutes=30)
-async def auto_send_daily_responses():
-    """Automatically send CISO responses at 18:00 SAST"""
-    current_time = get_sa_time()
+    # Log summary to console and include date verification
+    logger.info("📊 Auto-send complete for %s: %d sent, %d failed", current_date, sent_count, failed_count, extra={'cohort': cohort.key})
+    logger.info("🔒 SAFETY: Only processed entries with date = %s", current_date, extra={'cohort': cohort.key})
     
-    # Check if it's 18:00 SAST (between 18:00-18:30 to avoid duplicates)
-    if current_time.hour == 18 and current_time.minute < 30:
-        current_date = current_time.strftime('%Y-%m-%d')
-        
-        print(f"🕕 18:00 SAST - Auto-sending daily CISO responses for {current_date}")
-        
-        # Get entries with responses for today
-        entries = get_entries_with_responses(current_date)
-        
-        if not entries:
-            print(f"📭 No pending CISO responses found for {current_date}")
-            return
-        
-        sent_count = 0
-        failed_count = 0
-        failed_details = []
-        
-        print(f"📬 Found {len(entries)} pending responses to send...")
-        
-        for entry in entries:
-            response_data = extract_response_data(entry)
-            if not response_data:
-                failed_count += 1
-                failed_details.append("Failed to extract response data")
-                continue
-            
-            # Send the response
-            success, message = await send_ciso_response(response_data)
-            
-            if success:
-                # Mark as sent in Notion
-                if mark_response_sent(response_data['entry_id']):
-                    sent_count += 1
-                    print(f"✅ Auto-sent response to {response_data['student_name']}")
-                else:
-                    failed_count += 1
-                    failed_details.append(f"{response_data['student_name']}: Failed to mark as sent in Notion")
-                    print(f"❌ Failed to mark response as sent for {response_data['student_name']}")
-            else:
-                failed_count += 1
-                failed_details.append(f"{response_data['student_name']}: {message}")
-        
-        # Log summary to console and include date verification
-        print(f"📊 Auto-send complete for {current_date}: {sent_count} sent, {failed_count} failed")
-        print(f"🔒 SAFETY: Only processed entries with date = {current_date}")
-        
-        # Optionally send summary to admin channel (if you want notifications)
-        if CHANNEL_ID:
-            channel = bot.get_channel(CHANNEL_ID)
-            if channel and (sent_count > 0 or failed_count > 0):
-                summary = f"""🤖 **Automated CISO Response Delivery - {current_date}**
+    # Optionally send summary to admin channel (if you want notifications)
+    if cohort.announce_channel_id:
+        channel = bot.get_channel(cohort.announce_channel_id)
+        if channel and (sent_count > 0 or failed_count > 0):
+            summary = f"""🤖 **Automated CISO Response Delivery - {current_date}**
 
 ✅ **Successfully sent:** {sent_count} responses
 ❌ **Failed:** {failed_count} responses
 🔒 **Date Filter:** Only {current_date} entries processed
 
-All available responses from {CISO_NAME} have been delivered automatically!"""
-                
-                if failed_count > 0 and len(failed_details) <= 3:
-                    summary += f"\n\n**Failed Details:**\n" + "\n".join([f"• {detail}" for detail in failed_details])
-                
-                try:
-                    await channel.send(summary)
-                except Exception as e:
-                    print(f"Failed to send auto-summary to channel: {e}")
+All available responses from {cohort.ciso_name} have been delivered automatically!"""
+            
+            if failed_count > 0 and len(failed_details) <= 3:
+                summary += f"\n\n**Failed Details:**\n" + "\n".join([f"• {detail}" for detail in failed_details])
+            
+            try:
+                await channel.send(summary)
+            except Exception as e:
+                logger.error("Failed to send auto-summary to channel: %s", e, extra={'cohort': cohort.key})
 
 @bot.event
 async def on_message(message):
@@ -545,43 +1115,60 @@ async def on_message(message):
     if message.author.bot:
         return
     
-    # Message deduplication check
-    message_key = f"{message.id}_{message.author.id}_{message.content[:50]}"
-    if message_key in processed_messages:
-        print(f"🔄 Duplicate message detected and ignored from {message.author.name}")
+    # Message deduplication check (records the ID as seen; old IDs age out individually)
+    if processed_messages.check_and_add(message.id):
+        JOURNAL_MESSAGES.inc(outcome='duplicate')
+        logger.info("🔄 Duplicate message detected and ignored from %s", message.author.name,
+                    extra={'discord_user_id': message.author.id, 'message_id': message.id})
         return
     
-    # Add to processed messages cache
-    processed_messages.add(message_key)
-    
-    # Clean cache if it gets too large
-    if len(processed_messages) > MAX_PROCESSED_CACHE:
-        # Remove oldest half
-        processed_messages.clear()
-        print("🧹 Cleared message deduplication cache")
-    
-    # Check if it's a DM or the specified channel
+    # Check if it's a DM or one of a cohort's journal channels (one dict lookup)
     is_dm = isinstance(message.channel, discord.DMChannel)
-    is_target_channel = CHANNEL_ID and message.channel.id == CHANNEL_ID
+    cohort = None
+    if not is_dm:
+        cohort = cohort_router.for_channel(message.channel.id, message.guild.id if message.guild else None)
     
-    # Only process CISO updates from DMs or the target channel
-    if not (is_dm or is_target_channel or CHANNEL_ID is None):
+    # Only process CISO updates from DMs or journal channels
+    if not (is_dm or cohort):
         await bot.process_commands(message)
         return
     
     # Check if message starts with "Daily CISO Update"
     if message.content.lower().startswith('daily ciso update'):
         message_type = "DM" if is_dm else "channel"
-        print(f"CISO update detected from {message.author.name} (ID: {message.author.id}) via {message_type}")
+        if is_dm:
+            cohort = cohort_router.for_user(message.author.id, [guild.id for guild in message.author.mutual_guilds])
+        log_fields = {'discord_user_id': message.author.id, 'message_id': message.id, 'cohort': cohort.key}
+        logger.info("CISO update detected from %s (ID: %s) via %s", message.author.name, message.author.id, message_type, extra=log_fields)
         
         # Parse the message - UPDATED to pass author object
-        parsed_data = parse_ciso_update(message.content, message.author)
+        with PARSE_SECONDS.time():
+            parsed_data = parse_ciso_update(message.content, message.author)
         
         if parsed_data:
-            # Create Notion entry
-            success, result_message = create_notion_entry(parsed_data)
+            # Remember the name the student writes in their journal for later DM lookups
+            member_index.add_alias(parsed_data['student_name'], message.author.id)
+            if LOW_MEMORY_MODE:
+                user_cache.put(message.author.id, message.author)  # Saves a fetch when their response goes out
+            if not is_dm:
+                member_index.add_member(message.author)
+                cohort_router.remember(message.author.id, cohort)
+            parsed_data['cohort'] = cohort.key
+            parsed_data['message_id'] = str(message.id)  # Idempotency key for the Notion write
+            
+            # Queue the entry locally - the ingest worker pushes it to Notion in the background
+            try:
+                queue_id = ingest_queue.enqueue(parsed_data)
+                ingest_worker.notify()
+                success, result_message = True, f"Queued as #{queue_id}"
+            except Exception as e:
+                success, result_message = False, f"Error queueing entry: {e}"
             
+            JOURNAL_MESSAGES.inc(outcome='queued' if success else 'enqueue_failed')
             if success:
+                rollups.record(cohort.key, student_key(parsed_data['discord_user_id'], parsed_data['student_name']), parsed_data['student_name'],
+                               parsed_data['date'], parsed_data['hours_worked'])
+                
                 # React with checkmark and send confirmation
                 await message.add_reaction('✅')
                 
@@ -595,15 +1182,18 @@ async def on_message(message):
 **Date:** {parsed_data['date']}
 **Hours:** {parsed_data['hours_worked']}
 
-Your journal entry has been recorded in the database with your Discord information for reliable message delivery. I'll review it and may send you personalized feedback later today.
+Your journal entry has been recorded with your Discord information for reliable message delivery and will be synced to the database shortly. I'll review it and may send you personalized feedback later today.
 
 Keep up the excellent work on your cybersecurity journey! 🎯
 
 *- Elliot Alderson, CISO Bot Assistant*
                     """
+                    if parsed_data['missing_sections']:
+                        confirmation_msg += f"\n⚠️ **Sections not found:** {', '.join(parsed_data['missing_sections'])} - they were saved as empty. Use `!format` to check the template.\n"
                     await message.channel.send(confirmation_msg)
                 
-                print(f"Successfully processed update for {parsed_data['student_name']} (ID: {parsed_data['discord_user_id']}) via {message_type}")
+                logger.info("Successfully queued update for %s (ID: %s) via %s - %s", parsed_data['student_name'],
+                            parsed_data['discord_user_id'], message_type, result_message, extra=log_fields)
                 
             else:
                 # React with X to indicate error
@@ -621,9 +1211,10 @@ Please try again or contact your instructor if the problem persists.
                     """
                     await message.channel.send(error_msg)
                 
-                print(f"Failed to process update: {result_message}")
+                logger.error("Failed to process update: %s", result_message, extra=log_fields)
                 
         else:
+            JOURNAL_MESSAGES.inc(outcome='parse_failed')
             # React with warning for parsing issues
             await message.add_reaction('⚠️')
             
@@ -655,7 +1246,7 @@ Try sending it again with the correct format! 📝
                 """
                 await message.channel.send(format_help)
             
-            print(f"Failed to parse CISO update message from {message.author.name}")
+            logger.warning("Failed to parse CISO update message from %s", message.author.name, extra=log_fields)
     
     # Process other commands
     await bot.process_commands(message)
@@ -670,42 +1261,22 @@ async def send_daily_responses(ctx, admin_code: str = None, date: str = None):
     
     if date is None:
         date = get_sa_date().strftime('%Y-%m-%d')
+    cohort = cohort_for_context(ctx)
     
-    await ctx.send(f"🔍 Checking for pending CISO responses for {date}...")
-    
-    # Get entries with responses
-    entries = get_entries_with_responses(date)
-    
-    if not entries:
-        await ctx.send(f"📭 No pending responses found for {date}")
-        return
+    await ctx.send(f"🔍 Checking for pending CISO responses for {date}{cohort_label(cohort)}...")
     
-    sent_count = 0
-    failed_count = 0
-    failed_details = []
+    # Each student's pending responses are coalesced into as few DMs as possible
+    result = await deliver_responses(date, cohort=cohort)
+    sent_count = result.sent_count
+    failed_count = result.failed_count
+    failed_details = result.failed_details
     
-    for entry in entries:
-        response_data = extract_response_data(entry)
-        if not response_data:
-            failed_count += 1
-            failed_details.append("Failed to extract response data")
-            continue
-        
-        # Send the response - UPDATED function call
-        success, message = await send_ciso_response(response_data)
-        
-        if success:
-            # Mark as sent in Notion
-            if mark_response_sent(response_data['entry_id']):
-                sent_count += 1
-                print(f"✅ Response sent to {response_data['student_name']}")
-            else:
-                failed_count += 1
-                failed_details.append(f"{response_data['student_name']}: Failed to mark as sent in Notion")
-                print(f"❌ Failed to mark response as sent for {response_data['student_name']}")
+    if sent_count == 0 and failed_count == 0:
+        if result.skipped_count:
+            await ctx.send(f"📭 All {result.skipped_count} pending responses for {date} were already delivered by another run")
         else:
-            failed_count += 1
-            failed_details.append(f"{response_data['student_name']}: {message}")
+            await ctx.send(f"📭 No pending responses found for {date}")
+        return
     
     # Send summary
     summary = f"""📊 **Response Sending Complete**
@@ -714,7 +1285,10 @@ async def send_daily_responses(ctx, admin_code: str = None, date: str = None):
 ❌ **Failed:** {failed_count} responses
 📅 **Date:** {date}
 
-All successful responses have been delivered from {CISO_NAME}!"""
+All successful responses have been delivered from {cohort.ciso_name}!
+⏱️ **Run time:** {result.elapsed:.1f}s"""
+    if result.skipped_count:
+        summary += f"\n⏭️ **Skipped (already delivered):** {result.skipped_count}"
     
     if failed_details:
         summary += f"\n\n**Failed Details:**\n" + "\n".join([f"• {detail}" for detail in failed_details[:5]])
@@ -723,6 +1297,57 @@ All successful responses have been delivered from {CISO_NAME}!"""
     
     await ctx.send(summary)
 
+@bot.command(name='send_backlog')
+async def send_backlog(ctx, admin_code: str = None, start_date: str = None, end_date: str = None, mode: str = None):
+    """Send every pending CISO response across a date range, grouped per student - ADMIN ONLY"""
+    
+    # Check admin authentication
+    if not await require_admin_auth(ctx, admin_code):
+        return
+    
+    today = get_sa_date()
+    end_date = end_date or today.strftime('%Y-%m-%d')
+    start_date = start_date or (today - timedelta(days=7)).strftime('%Y-%m-%d')
+    try:
+        span = (datetime.strptime(end_date, '%Y-%m-%d') - datetime.strptime(start_date, '%Y-%m-%d')).days
+    except ValueError:
+        await ctx.send("❌ Dates must be YYYY-MM-DD, e.g. `!send_backlog [admin_code] 2025-06-09 2025-06-13`")
+        return
+    if span < 0 or span >= BACKLOG_MAX_DAYS:
+        await ctx.send(f"❌ Date range must run forwards and cover at most {BACKLOG_MAX_DAYS} days")
+        return
+    if mode not in (None, 'merge', 'separate'):
+        await ctx.send("❌ Mode must be `merge` (one DM per student) or `separate` (one DM per entry)")
+        return
+    merge = BACKLOG_MERGE if mode is None else mode == 'merge'
+    cohort = cohort_for_context(ctx)
+    
+    await ctx.send(f"🔍 Checking for pending CISO responses from {start_date} to {end_date}{cohort_label(cohort)}...")
+    
+    result = await deliver_backlog(start_date, end_date, merge=merge, cohort=cohort)
+    
+    if result.sent_count == 0 and result.failed_count == 0:
+        await ctx.send(f"📭 No pending responses found from {start_date} to {end_date}")
+        return
+    
+    students = len({delivery_group_key(response_data) for response_data in result.delivered})
+    summary = f"""📊 **Backlog Sending Complete**
+
+✅ **Successfully sent:** {result.sent_count} responses to {students} students
+❌ **Failed:** {result.failed_count} responses
+📅 **Dates:** {start_date} to {end_date}
+✉️ **Mode:** {'one DM per student' if merge else 'one DM per entry'}
+⏱️ **Run time:** {result.elapsed:.1f}s"""
+    if result.skipped_count:
+        summary += f"\n⏭️ **Skipped (already delivered):** {result.skipped_count}"
+    
+    if result.failed_details:
+        summary += f"\n\n**Failed Details:**\n" + "\n".join([f"• {detail}" for detail in result.failed_details[:5]])
+        if len(result.failed_details) > 5:
+            summary += f"\n• ... and {len(result.failed_details) - 5} more"
+    
+    await ctx.send(summary)
+
 @bot.command(name='preview_responses')
 async def preview_responses(ctx, admin_code: str = None, date: str = None):
     """Preview pending CISO responses without sending them - ADMIN ONLY"""
@@ -734,7 +1359,7 @@ async def preview_responses(ctx, admin_code: str = None, date: str = None):
     if date is None:
         date = get_sa_date().strftime('%Y-%m-%d')
     
-    entries = get_entries_with_responses(date)
+    entries = await get_entries_with_responses(date, cached=True, cohort=cohort_for_context(ctx))
     
     if not entries:
         await ctx.send(f"📭 No pending responses found for {date}")
@@ -742,10 +1367,18 @@ async def preview_responses(ctx, admin_code: str = None, date: str = None):
     
     preview_msg = f"📋 **Response Preview for {date}**\n\n"
     
-    for i, entry in enumerate(entries, 1):
-        response_data = extract_response_data(entry)
+    responses = [data for data in map(extract_response_data, entries) if data]
+    # Resolve everyone in one pass so students we can't reach are flagged before sending
+    resolved = member_index.resolve_batch(responses)
+    
+    for i, response_data in enumerate(responses, 1):
         if response_data:
-            discord_info = f"(ID: {response_data['discord_user_id'][:8]}...)" if response_data['discord_user_id'] else "(No ID stored)"
+            if response_data['discord_user_id']:
+                discord_info = f"(ID: {response_data['discord_user_id'][:8]}...)"
+            elif resolved.get(response_data['entry_id']):
+                discord_info = "(No ID stored - matched by name)"
+            else:
+                discord_info = "(No ID stored - ⚠️ no matching member)"
             preview_msg += f"**{i}. {response_data['student_name']}** {discord_info}\n"
             preview_msg += f"Response: {response_data['ciso_response'][:100]}{'...' if len(response_data['ciso_response']) > 100 else ''}\n\n"
     
@@ -767,8 +1400,13 @@ async def response_count(ctx, admin_code: str = None, date: str = None):
     if date is None:
         date = get_sa_date().strftime('%Y-%m-%d')
     
-    entries = get_entries_with_responses(date)
-    count = len(entries)
+    cohort = cohort_for_context(ctx)
+    if mirror_ready(cohort):
+        count = cohort.mirror.count_pending(date)
+    else:
+        count = 0
+        async for _ in iter_entries_with_responses(date, cached=True, cohort=cohort):
+            count += 1
     
     if count == 0:
         await ctx.send(f"📭 No pending responses for {date}")
@@ -815,67 +1453,245 @@ async def debug_dates(ctx, admin_code: str = None):
             ]
         }
         
-        response = requests.post(
-            f'https://api.notion.com/v1/databases/{NOTION_DATABASE_ID}/query',
-            headers=NOTION_HEADERS,
-            json=query_data
-        )
-        
-        if response.status_code == 200:
-            results = response.json()['results']
-            
-            if not results:
-                await ctx.send("📭 No entries with CISO responses found in database")
+        cohort = cohort_for_context(ctx)
+        if mirror_ready(cohort):
+            total, results = cohort.mirror.all_pending(limit=5)  # Show max 5 entries
+        else:
+            # Walk every page so the total is accurate, but only keep the entries we display
+            results = []
+            total = 0
+            try:
+                async for entry in cohort.notion.iter_database(cohort.database_id, query_data, page_size=NOTION_PAGE_SIZE, cached=True):
+                    total += 1
+                    if len(results) < 5:  # Show max 5 entries
+                        results.append(entry)
+            except NotionAPIError as e:
+                await ctx.send(f"❌ **Error querying database:** {e.status}")
                 return
+        
+        if not results:
+            await ctx.send("📭 No entries with CISO responses found in database")
+            return
             
-            debug_msg = f"🗃️ **Found {len(results)} entries with responses:**\n\n"
+        debug_msg = f"🗃️ **Found {total} entries with responses:**\n\n"
+        
+        for i, entry in enumerate(results, 1):
+            properties = entry['properties']
             
-            for i, entry in enumerate(results[:5], 1):  # Show max 5 entries
-                properties = entry['properties']
-                
-                # Extract data
-                student_name = ""
-                if 'Student Name' in properties and properties['Student Name']['title']:
-                    student_name = properties['Student Name']['title'][0]['text']['content']
-                
-                entry_date = ""
-                if 'Date' in properties and properties['Date']['date']:
-                    entry_date = properties['Date']['date']['start']
-                
-                response_sent = False
-                if 'Response Sent' in properties:
-                    response_sent = properties['Response Sent']['checkbox']
-                
-                # Check if date matches today
-                date_matches = entry_date == current_date
-                match_emoji = "✅" if date_matches else "❌"
-                
-                debug_msg += f"**{i}. {student_name}**\n"
-                debug_msg += f"Date: `{entry_date}` {match_emoji}\n"
-                debug_msg += f"Response Sent: {response_sent}\n"
-                debug_msg += f"Matches Today: {date_matches}\n\n"
+            # Extract data
+            student_name = ""
+            if 'Student Name' in properties:
+                student_name = decode_rich_text(properties['Student Name'])
             
-            if len(results) > 5:
-                debug_msg += f"... and {len(results) - 5} more entries"
+            entry_date = ""
+            if 'Date' in properties and properties['Date']['date']:
+                entry_date = properties['Date']['date']['start']
             
-            # Split message if too long
-            if len(debug_msg) > 2000:
-                debug_msg = debug_msg[:1900] + "\n\n*... (truncated)*"
+            response_sent = False
+            if 'Response Sent' in properties:
+                response_sent = properties['Response Sent']['checkbox']
             
-            await ctx.send(debug_msg)
+            # Check if date matches today
+            date_matches = entry_date == current_date
+            match_emoji = "✅" if date_matches else "❌"
             
-        else:
-            await ctx.send(f"❌ **Error querying database:** {response.status_code}")
+            debug_msg += f"**{i}. {student_name}**\n"
+            debug_msg += f"Date: `{entry_date}` {match_emoji}\n"
+            debug_msg += f"Response Sent: {response_sent}\n"
+            debug_msg += f"Matches Today: {date_matches}\n\n"
+        
+        if total > 5:
+            debug_msg += f"... and {total - 5} more entries"
+        
+        # Split message if too long
+        if len(debug_msg) > 2000:
+            debug_msg = debug_msg[:1900] + "\n\n*... (truncated)*"
+        
+        await ctx.send(debug_msg)
             
     except Exception as e:
         await ctx.send(f"❌ **Debug error:** {str(e)}")
 
+@bot.command(name='queue_status')
+async def queue_status(ctx, admin_code: str = None):
+    """Show write-behind ingestion and Response Sent update queue health - ADMIN ONLY"""
+    
+    # Check admin authentication
+    if not await require_admin_auth(ctx, admin_code):
+        return
+    
+    stats = ingest_worker.stats()
+    await ctx.send(f"""📥 **Ingestion Queue**
+
+**Waiting for Notion:** {stats['depth']}
+**Oldest entry age:** {stats['oldest_age_seconds']}s
+**Drain rate:** {stats['drain_rate_per_min']}/min
+**Written since start:** {stats['drained']}
+**Failed attempts:** {stats['failed_attempts']}
+**Gave up (dead-lettered):** {stats['dead']}""")
+    
+    cohort = cohort_for_context(ctx)
+    sent = cohort.sent_updater.stats()
+    await ctx.send(f"""📝 **Response Sent Updates**{cohort_label(cohort)}
+
+**Waiting for Notion:** {sent['depth']}
+**Oldest update age:** {sent['oldest_age_seconds']}s
+**Flush latency:** p50 {sent['flush_latency_p50']}s / p95 {sent['flush_latency_p95']}s / max {sent['flush_latency_max']}s
+**Flushed since start:** {sent['flushed']}
+**Failed attempts:** {sent['failed_attempts']}
+**Gave up (dead-lettered):** {sent['dead']}""")
+    
+    ledger = delivery_ledger.stats()
+    await ctx.send(f"""📒 **Delivery Ledger**
+
+**Responses tracked:** {ledger['entries']}
+**Unsettled claims (in flight or in doubt):** {ledger['in_flight_or_in_doubt']}
+**Duplicate sends skipped:** {ledger['skipped_duplicates']}""" + (
+        "\nUse `!delivery_claims [admin_code]` to review them." if ledger['in_flight_or_in_doubt'] else ""))
+
+@bot.command(name='delivery_claims')
+async def delivery_claims(ctx, admin_code: str = None, action: str = None, entry_id: str = None):
+    """List delivery claims left in doubt, or settle one by hand - ADMIN ONLY"""
+    
+    # Check admin authentication
+    if not await require_admin_auth(ctx, admin_code):
+        return
+    
+    if action in ('confirm', 'release'):
+        if not entry_id:
+            await ctx.send(f"❌ Give the entry ID, e.g. `!delivery_claims [admin_code] {action} <entry_id>`")
+            return
+        settled = delivery_ledger.resolve(entry_id, delivered=action == 'confirm')
+        if not settled:
+            await ctx.send(f"📭 No unsettled claim for `{entry_id}`")
+            return
+        if action == 'confirm':
+            # The student has it; record Response Sent so it drops out of pending queries
+            record_response_delivered(entry_id, cohort_for_context(ctx))
+            await ctx.send(f"✅ Marked `{entry_id}` as delivered")
+        else:
+            await ctx.send(f"🔁 Released `{entry_id}` - the next delivery run will send it again")
+        logger.info("📒 %s %s delivery claim for %s", ctx.author.name, action, entry_id, extra={'entry_id': entry_id})
+        return
+    if action is not None:
+        await ctx.send("❌ Use `!delivery_claims [admin_code]`, `confirm <entry_id>` or `release <entry_id>`")
+        return
+    
+    claims = delivery_ledger.claims()
+    if not claims:
+        await ctx.send("📒 No unsettled delivery claims")
+        return
+    now = time.time()
+    lines = [f"📒 **Unsettled delivery claims** ({len(claims)}) - recent ones may still be sending\n"]
+    lines += [f"`{claim_entry_id}` claimed {(now - claimed_at) / 60:.0f} min ago" for claim_entry_id, claimed_at in claims[:20]]
+    if len(claims) > 20:
+        lines.append(f"...and {len(claims) - 20} more")
+    lines.append("\nCheck the student's DMs, then `confirm <entry_id>` if it arrived or `release <entry_id>` to send it again.")
+    await ctx.send("\n".join(lines))
+
+@bot.command(name='cache_stats')
+async def cache_stats(ctx, admin_code: str = None):
+    """Show Notion query cache hit rate - ADMIN ONLY"""
+    
+    # Check admin authentication
+    if not await require_admin_auth(ctx, admin_code):
+        return
+    
+    cohort = cohort_for_context(ctx)
+    stats = cohort.notion.cache.stats()
+    await ctx.send(f"""🗄️ **Notion Query Cache**{cohort_label(cohort)} (TTL {NOTION_CACHE_TTL:.0f}s)
+
+**Hit rate:** {stats['hit_rate'] * 100:.1f}% ({stats['hits']} hits / {stats['misses']} misses)
+**Cached queries:** {stats['entries']}
+**Invalidations (writes):** {stats['invalidations']}""")
+    users = user_cache.stats()
+    await ctx.send(f"👤 **User Cache** ({'low-memory mode' if LOW_MEMORY_MODE else 'backs up the member cache'}): "
+                   f"{users['size']}/{users['max_size']} users, {users['hit_rate'] * 100:.1f}% hit rate, "
+                   f"{len(member_index)} names indexed")
+
+@bot.command(name='mirror_status')
+async def mirror_status(ctx, admin_code: str = None):
+    """Show local Notion mirror sync lag and row counts - ADMIN ONLY"""
+    
+    # Check admin authentication
+    if not await require_admin_auth(ctx, admin_code):
+        return
+    
+    if not MIRROR_ENABLED:
+        await ctx.send("🪞 Local Notion mirror is disabled (set `NOTION_MIRROR=true` to enable)")
+        return
+    
+    cohort = cohort_for_context(ctx)
+    stats = cohort.mirror_sync.stats()
+    lag = f"{stats['lag_seconds']:.0f}s" if stats['lag_seconds'] is not None else "never synced"
+    await ctx.send(f"""🪞 **Local Notion Mirror**{cohort_label(cohort)}
+
+**Status:** {'serving reads' if stats['ready'] else 'initial sync pending - reads go to Notion'}
+**Sync lag:** {lag}
+**Rows mirrored:** {stats['rows']}
+**Pending responses (today):** {cohort.mirror.count_pending(get_sa_date().strftime('%Y-%m-%d'))}
+**Rows in last sync:** {stats['last_delta_rows']}
+**Syncs since start:** {stats['syncs']}""")
+
+def format_latency(histogram, **labels):
+    """"p50 / p99 (count)" for a latency histogram series, in milliseconds"""
+    count, _, p50, p99 = histogram.snapshot().get(tuple(sorted(labels.items())), (0, 0.0, 0.0, 0.0))
+    if not count:
+        return "no samples yet"
+    return f"p50 {p50 * 1000:.1f}ms / p99 {p99 * 1000:.1f}ms ({count})"
+
+@bot.command(name='stats')
+async def show_stats(ctx, admin_code: str = None):
+    """Show latency histograms, throughput counters, queue depths, rollups and the leader lease - ADMIN ONLY"""
+    
+    # Check admin authentication
+    if not await require_admin_auth(ctx, admin_code):
+        return
+    
+    messages = {dict(key).get('outcome'): value for key, value in JOURNAL_MESSAGES.snapshot().items()}
+    deliveries = {dict(key).get('outcome'): value for key, value in DELIVERY_RESPONSES.snapshot().items()}
+    dedupe = processed_messages.stats()
+    
+    notion_lines = []
+    for key, (count, _, p50, p99) in sorted(NOTION_REQUEST_SECONDS.snapshot().items(), key=lambda item: -item[1][0])[:6]:
+        labels = dict(key)
+        notion_lines.append(f"• `{labels['endpoint']}` {labels['status']}: p50 {p50 * 1000:.0f}ms / p99 {p99 * 1000:.0f}ms ({count})")
+    notion_summary = "\n".join(notion_lines) or "none yet"
+    
+    rollup_stats = rollups.stats()
+    leader = leader_lease.stats()
+    leader_text = "this process" if leader['held'] else (leader['holder'] or "no process yet")
+    if leader['expires_in_seconds'] is not None:
+        leader_text += f", expires in {leader['expires_in_seconds']:.0f}s"
+    
+    stats_msg = f"""📈 **Bot Stats**
+
+**Journal messages:** {messages.get('queued', 0)} queued, {messages.get('parse_failed', 0)} unparseable, {messages.get('enqueue_failed', 0)} failed, {messages.get('duplicate', 0)} duplicates
+**Parse time:** {format_latency(PARSE_SECONDS)}
+**DM send:** {format_latency(DM_SEND_SECONDS)}
+**Deliveries:** {deliveries.get('sent', 0)} sent, {deliveries.get('failed', 0)} failed, {deliveries.get('skipped', 0)} skipped
+**Queues:** {ingest_queue.depth()} waiting for Notion, {sum(cohort.sent_update_log.depth() for cohort in cohort_router)} Response Sent updates owed
+**Dedupe cache:** {dedupe['size']} IDs, {dedupe['hit_rate'] * 100:.1f}% hit rate
+**Rollups:** {rollup_stats['students']} students in {rollup_stats['cohorts']} cohorts, {rollup_stats['entries_recorded']} entries folded, {rollup_sync.skipped} rows skipped, {rollup_stats['array_bytes'] / 1024:.0f} KiB of day arrays
+**Leader lease:** {leader_text} ({leader['acquisitions']} acquisitions here)
+
+**Notion calls:**
+{notion_summary}"""
+    if METRICS_PORT:
+        stats_msg += f"\n\n*Full metrics: http://{METRICS_HOST}:{METRICS_PORT}/metrics*"
+    await ctx.send(stats_msg)
+
 @bot.command(name='send_reminder')
 async def send_journal_reminder(ctx):
     """Manually send journal submission reminder"""
-    current_time = get_sa_time()
+    await ctx.send(build_reminder_message())
+    await ctx.send("📝 Journal submission reminder sent!")
+
+def build_reminder_message(current_time=None):
+    """Journal reminder text with the template pre-filled for the given day"""
+    current_time = current_time or get_sa_time()
     
-    reminder_msg = f"""@everyone It's time for your daily CISO update! Please use the following format:
+    return f"""@everyone It's time for your daily CISO update! Please use the following format:
 
 Daily CISO Update - {current_time.strftime('%Y-%m-%d')}
 Student: [Your Name]
@@ -891,9 +1707,180 @@ Tomorrow's Plan:
 
 CISO Input Needed:
 [List any questions or input needed from the CISO]"""
+
+async def scheduled_journal_reminder(scheduled_for, cohort=None):
+    """Post the journal reminder to the cohort's channel"""
+    await bot.wait_until_ready()
+    cohort = cohort or cohort_router.default
+    channel = bot.get_channel(cohort.announce_channel_id) if cohort.announce_channel_id else None
+    if not channel:
+        logger.warning("⚠️ Reminder job skipped for cohort %s - no channel set or channel not found", cohort.key, extra={'cohort': cohort.key})
+        return
+    await channel.send(build_reminder_message(scheduled_for))
+    logger.info("📝 Scheduled journal reminder sent for %s", scheduled_for.strftime('%Y-%m-%d'), extra={'cohort': cohort.key})
+
+@bot.command(name='schedule')
+async def show_schedule(ctx, admin_code: str = None):
+    """Show scheduled jobs with their last and next runs - ADMIN ONLY"""
     
-    await ctx.send(reminder_msg)
-    await ctx.send("📝 Journal submission reminder sent!")
+    # Check admin authentication
+    if not await require_admin_auth(ctx, admin_code):
+        return
+    
+    leader = leader_lease.current_holder()
+    runner = "this process" if leader_lease.held else (leader or "no process yet")
+    lines = [f"🗓️ **Scheduled Jobs** (SAST) - running on {runner}\n"]
+    for name, spec, last_run, next_run in scheduler.describe():
+        last_text = last_run.strftime('%Y-%m-%d %H:%M') if last_run else 'never'
+        next_text = next_run.strftime('%Y-%m-%d %H:%M') if next_run else 'pending'
+        lines.append(f"**{name}** `{spec}` - last: {last_text}, next: {next_text}")
+    await ctx.send("\n".join(lines))
+
+@bot.command(name='report')
+async def show_report(ctx, admin_code: str = None, *, student: str = None):
+    """Show hours, streaks and missed days for the cohort or one student - ADMIN ONLY"""
+    
+    # Check admin authentication
+    if not await require_admin_auth(ctx, admin_code):
+        return
+    
+    cohort = cohort_for_context(ctx)
+    today = get_sa_date()
+    
+    if not student:
+        report = rollups.cohort_report(cohort.key, today)
+        await ctx.send(f"""📊 **Journal Report**{cohort_label(cohort)} - {today.strftime('%Y-%m-%d')}
+
+**Students:** {report['students']} ({report['submitted_today']} submitted today)
+**Hours:** {report['today_hours']} today · {report['week_hours']} this week · {report['month_hours']} this month · {report['total_hours']} all time
+**Submission rate this week:** {report['week_submission_rate'] * 100:.0f}%
+
+*Use `!report [admin_code] <student>` for one student*""")
+        return
+    
+    # A mention, a user ID or the name they journal under
+    user_id = ctx.message.mentions[0].id if ctx.message.mentions else None
+    if user_id is None and student.strip('<@!>').isdigit():
+        user_id = int(student.strip('<@!>'))
+    if user_id is None:
+        user_id = member_index.lookup(student)
+    found = rollups.find(cohort.key, student_key(user_id, student)) or rollups.find(cohort.key, student_key(None, student))
+    if found is None:
+        await ctx.send(f"❌ No journal entries recorded for {student}{cohort_label(cohort)}")
+        return
+    
+    report = rollups.student_report(found, today)
+    await ctx.send(f"""📊 **{report['name']}**{cohort_label(cohort)} - {today.strftime('%Y-%m-%d')}
+
+**Hours:** {report['today_hours']} today · {report['week_hours']} this week · {report['month_hours']} this month · {report['total_hours']} all time
+**Entries:** {report['submissions']} (last: {report['last_entry']})
+**Streak:** {report['current_streak']} workdays (best {report['best_streak']})
+**Missed workdays:** {report['missed_days']}""")
+
+def format_backfill_progress(run, cohort):
+    stats = run.stats()
+    state = "running" if run.running else ("stopped" if backfill_task and backfill_task.cancelled() else "finished")
+    current = f"\n**Reading:** {stats['current_source']}" if run.running and stats['current_source'] else ""
+    errors = "\n**Errors:** " + "; ".join(run.errors[-3:]) if run.errors else ""
+    return f"""📥 **Backfill {state}**{cohort_label(cohort)}
+
+**Sources:** {stats['sources']}{current}
+**Messages scanned:** {stats['scanned']} ({stats['scan_rate_per_sec']}/s)
+**Journal entries:** {stats['journal_messages']} found, {stats['duplicates']} already in Notion, {stats['unparseable']} unparseable
+**Queued for Notion:** {stats['queued']} ({backfill_queue.depth()} still to write at {BACKFILL_RATE:g}/s)
+**Elapsed:** {stats['elapsed_seconds']}s{errors}"""
+
+async def report_backfill_progress(run, cohort, status_message):
+    """Keep the progress message current until the backfill task ends"""
+    while backfill_task is not None and not backfill_task.done():
+        await asyncio.wait({backfill_task}, timeout=BACKFILL_PROGRESS_SECONDS)
+        try:
+            await status_message.edit(content=format_backfill_progress(run, cohort))
+        except discord.HTTPException as e:
+            logger.warning("⚠️ Could not update backfill progress: %s", e, extra={'cohort': cohort.key})
+    if backfill_task is not None and not backfill_task.cancelled() and backfill_task.exception():
+        logger.error("❌ Backfill failed: %s", backfill_task.exception(), extra={'cohort': cohort.key})
+
+@bot.command(name='backfill')
+async def backfill_history(ctx, admin_code: str = None, since: str = None):
+    """Ingest journal entries posted in the cohort's channels and DMs while the bot was down - ADMIN ONLY"""
+    global backfill_run, backfill_task
+    
+    # Check admin authentication
+    if not await require_admin_auth(ctx, admin_code):
+        return
+    
+    cohort = cohort_for_context(ctx)
+    running = backfill_task is not None and not backfill_task.done()
+    if since == 'status':
+        if backfill_run is None:
+            await ctx.send(f"📥 No backfill has run since startup ({backfill_queue.depth()} backfilled entries still to write)")
+        else:
+            await ctx.send(format_backfill_progress(backfill_run, cohort))
+        return
+    if since == 'stop':
+        if not running:
+            await ctx.send("📥 No backfill is running")
+            return
+        backfill_task.cancel()
+        await ctx.send("🛑 Backfill stopped - run `!backfill` again to resume from where it got to")
+        return
+    if running:
+        await ctx.send("⏳ A backfill is already running - use `!backfill [admin_code] status` or `stop`")
+        return
+    
+    # A date starts over from that day; otherwise each source resumes from its checkpoint
+    now = get_sa_time()
+    if since:
+        try:
+            start = SAST.localize(datetime.strptime(since, '%Y-%m-%d'))
+        except ValueError:
+            await ctx.send("❌ Use a date (YYYY-MM-DD), `status` or `stop`, e.g. `!backfill [admin_code] 2025-06-01`")
+            return
+    else:
+        start = now - timedelta(days=BACKFILL_DAYS)
+    fallback_channel_id = ctx.channel.id if ctx.guild else None
+    sources = backfill_sources(cohort, start, fallback_channel_id)
+    if since:
+        backfill_checkpoints.clear([name for name, _ in sources])
+    checkpoints = [backfill_checkpoints.get(name) for name, _ in sources]
+    oldest = min([start] + [discord.utils.snowflake_time(message_id).astimezone(SAST) for message_id in checkpoints if message_id])
+    
+    status_message = await ctx.send(f"🔍 Loading existing entries since {oldest.strftime('%Y-%m-%d')}{cohort_label(cohort)}...")
+    try:
+        existing = await existing_entry_keys(cohort, oldest.strftime('%Y-%m-%d'))
+    except Exception as e:
+        logger.error("❌ Backfill could not load existing entries: %s", e, extra={'cohort': cohort.key})
+        await status_message.edit(content=f"❌ Could not load existing entries to dedupe against: {e}")
+        return
+    
+    backfill_run = build_backfill(cohort, sources, existing)
+    backfill_task = asyncio.create_task(backfill_run.run())
+    logger.info("📥 Backfill started by %s for %d sources%s, %d existing entries", ctx.author.name, len(sources), cohort_label(cohort), len(existing),
+                extra={'cohort': cohort.key})
+    await status_message.edit(content=format_backfill_progress(backfill_run, cohort))
+    await report_backfill_progress(backfill_run, cohort, status_message)
+
+@bot.command(name='cohorts')
+async def show_cohorts(ctx, admin_code: str = None):
+    """Show each cohort's channels, database, CISO and delivery time - ADMIN ONLY"""
+    
+    # Check admin authentication
+    if not await require_admin_auth(ctx, admin_code):
+        return
+    
+    current = cohort_for_context(ctx)
+    lines = [f"🎓 **Cohorts** ({len(cohort_router)}) - admin commands act on the cohort of the channel they're run in\n"]
+    for cohort in cohort_router:
+        channels = ", ".join(f"<#{channel_id}>" for channel_id in cohort.channel_ids) or "all channels"
+        if cohort.guild_ids:
+            channels += f" + {len(cohort.guild_ids)} guild(s)"
+        marker = " ⬅️ this channel" if cohort is current else ""
+        lines.append(
+            f"**{cohort.key}**{marker}: {channels} → database `{cohort.database_id[:8]}…`, "
+            f"CISO {cohort.ciso_name}, delivery `{cohort.delivery_cron}`, {cohort.notion.limiter.rate:g} req/s"
+        )
+    await ctx.send("\n".join(lines))
 
 @bot.command(name='test_user')
 async def test_user_lookup(ctx, user_id: str = None):
@@ -903,11 +1890,7 @@ async def test_user_lookup(ctx, user_id: str = None):
         return
     
     try:
-        user_id_int = int(user_id)
-        user = bot.get_user(user_id_int)
-        
-        if not user:
-            user = await bot.fetch_user(user_id_int)
+        user = await resolve_user(int(user_id))
         
         if user:
             await ctx.send(f"✅ **User Found!**\n**Name:** {user.name}\n**Display Name:** {user.display_name}\n**ID:** {user.id}")
@@ -967,8 +1950,18 @@ Your Discord User ID is now automatically stored for reliable message delivery!
 - `!test` - Test if bot is responding
 - `!test_user [user_id]` - Test Discord user lookup
 - `!send_responses [admin_code] [date]` - Send pending CISO responses (ADMIN ONLY)
+- `!send_backlog [admin_code] [start_date] [end_date] [merge|separate]` - Send all pending responses in a date range (ADMIN ONLY)
 - `!preview_responses [admin_code] [date]` - Preview pending responses (ADMIN ONLY)
 - `!response_count [admin_code] [date]` - Check response count (ADMIN ONLY)
+- `!queue_status [admin_code]` - Show ingestion, Response Sent and delivery ledger health (ADMIN ONLY)
+- `!delivery_claims [admin_code] [confirm|release] [entry_id]` - Review or settle deliveries left in doubt (ADMIN ONLY)
+- `!cache_stats [admin_code]` - Show Notion query cache hit rate (ADMIN ONLY)
+- `!stats [admin_code]` - Show latency, throughput, queue, rollup and lease metrics (ADMIN ONLY)
+- `!mirror_status [admin_code]` - Show local Notion mirror sync lag and row counts (ADMIN ONLY)
+- `!schedule [admin_code]` - Show scheduled jobs and their next runs (ADMIN ONLY)
+- `!report [admin_code] [student]` - Hours, streaks and missed days for the cohort or one student (ADMIN ONLY)
+- `!backfill [admin_code] [YYYY-MM-DD|status|stop]` - Ingest entries posted while the bot was down (ADMIN ONLY)
+- `!cohorts [admin_code]` - Show cohorts and which one this channel belongs to (ADMIN ONLY)
 - `!send_reminder` - Send journal submission reminder
 - `!format` - Show this help message
 
@@ -1007,24 +2000,63 @@ Happy journaling with improved reliability! 🛡️
 async def on_command_error(ctx, error):
     if isinstance(error, commands.CommandNotFound):
         return  # Ignore unknown commands
-    print(f'Error: {error}')
+    logger.error('Error: %s', error)
+
+async def main():
+    """Run the bot and release the Notion session on shutdown"""
+    # A crashed predecessor's lease runs out within the TTL; a live duplicate keeps renewing it
+    if not await instance_lease.wait_acquire(LEADER_LEASE_TTL + instance_lease.renew_interval):
+        logger.error("❌ Another process (%s) is already running shards %s - exiting", instance_lease.current_holder(), SHARD_LABEL)
+        lease_store.close()
+        return
+    instance_lease.start()
+    async with bot:
+        try:
+            await bot.start(DISCORD_TOKEN)
+        finally:
+            await stop_leader_duties()
+            await leader_lease.stop()  # Released only once our duties have stopped
+            await metrics_server.stop()
+            if backfill_task is not None:
+                backfill_task.cancel()
+            await ingest_worker.stop()
+            await backfill_worker.stop()
+            await rollup_sync.stop()
+            await instance_lease.stop()
+            lease_store.close()
+            ingest_queue.close()
+            backfill_queue.close()
+            backfill_checkpoints.close()
+            delivery_ledger.close()
+            processed_messages.close()
+            for cohort in cohort_router:
+                cohort.sent_update_log.close()
+                cohort.mirror.close()
+                await cohort.notion.close()
 
 if __name__ == '__main__':
-    # Verify required environment variables
-    if not DISCORD_TOKEN:
-        print("ERROR: DISCORD_TOKEN environment variable not set")
-        exit(1)
-    if not NOTION_TOKEN:
-        print("ERROR: NOTION_TOKEN environment variable not set")
-        exit(1)
-    if not NOTION_DATABASE_ID:
-        print("ERROR: NOTION_DATABASE_ID environment variable not set")
-        exit(1)
-    if not ADMIN_CODE:
-        print("WARNING: ADMIN_CODE environment variable not set - admin commands will be disabled")
+    try:
+        # Verify required environment variables
+        if not DISCORD_TOKEN:
+            logger.error("DISCORD_TOKEN environment variable not set")
+            exit(1)
+        if not NOTION_TOKEN and not all(cohort.notion_token for cohort in cohort_router):
+            logger.error("NOTION_TOKEN environment variable not set")
+            exit(1)
+        if not NOTION_DATABASE_ID and not COHORTS_FILE:
+            logger.error("NOTION_DATABASE_ID environment variable not set (or use COHORTS_FILE)")
+            exit(1)
+        if not ADMIN_CODE:
+            logger.warning("ADMIN_CODE environment variable not set - admin commands will be disabled")
     
-    print("🚀 Starting Enhanced CISO Bot with Discord User ID tracking...")
-    print(f"🔐 Admin protection: {'ENABLED' if ADMIN_CODE else 'DISABLED'}")
+        logger.info("🚀 Starting Enhanced CISO Bot with Discord User ID tracking...")
+        logger.info("🔐 Admin protection: %s", 'ENABLED' if ADMIN_CODE else 'DISABLED')
+        logger.info("🎓 Cohorts: %s", ', '.join(cohort.key for cohort in cohort_router))
+        if SHARD_COUNT:
+            logger.info("🧩 Sharding: %s shards, this process runs %s", SHARD_COUNT, SHARD_LABEL)
     
-    # Start the bot
-    bot.run(DISCORD_TOKEN)
+        # Start the bot
+        asyncio.run(main())
+    finally:
+        # Flush whatever is still queued for the log thread
+        log_listener.stop()
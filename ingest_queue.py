@@ -0,0 +1,196 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class IngestQueue:
+    """Durable SQLite-backed write-behind queue for parsed journal submissions
+
+    Submissions are committed locally before the student sees a reaction, so a
+    Notion outage or a restart never loses an entry; the worker drains them later.
+    """
+
+    def __init__(self, path, max_attempts=20):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS pending (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT NOT NULL,
+                enqueued_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                dead INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS pending_ready ON pending (dead, next_attempt_at, id)')
+        self.conn.commit()
+
+    def enqueue(self, parsed_data):
+        """Persist a parsed submission and return its queue ID"""
+        with self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO pending (payload, enqueued_at) VALUES (?, ?)',
+                (json.dumps(parsed_data), time.time())
+            )
+        return cursor.lastrowid
+
+    def next_batch(self, limit):
+        """Oldest submissions that are due for a (re)try, as (id, parsed_data, attempts) tuples"""
+        rows = self.conn.execute(
+            'SELECT id, payload, attempts FROM pending WHERE dead = 0 AND next_attempt_at <= ? ORDER BY id LIMIT ?',
+            (time.time(), limit)
+        ).fetchall()
+        return [(row_id, json.loads(payload), attempts) for row_id, payload, attempts in rows]
+
+    def ack(self, ids):
+        """Remove submissions that reached Notion"""
+        if not ids:
+            return
+        with self.conn:
+            self.conn.executemany('DELETE FROM pending WHERE id = ?', [(row_id,) for row_id in ids])
+
+    def retry_later(self, row_id, error, delay):
+        """Record a failed attempt; gives up (dead-letters) after max_attempts"""
+        with self.conn:
+            self.conn.execute(
+                '''UPDATE pending
+                   SET attempts = attempts + 1, next_attempt_at = ?, last_error = ?,
+                       dead = CASE WHEN attempts + 1 >= ? THEN 1 ELSE 0 END
+                   WHERE id = ?''',
+                (time.time() + delay, str(error)[:500], self.max_attempts, row_id)
+            )
+
+    def pending_payloads(self):
+        """Every submission still waiting to reach Notion (dead letters excluded)"""
+        return [json.loads(payload) for (payload,) in self.conn.execute('SELECT payload FROM pending WHERE dead = 0')]
+
+    def depth(self):
+        return self.conn.execute('SELECT COUNT(*) FROM pending WHERE dead = 0').fetchone()[0]
+
+    def due_depth(self):
+        """Submissions ready to write now (not dead-lettered or backing off)"""
+        return self.conn.execute(
+            'SELECT COUNT(*) FROM pending WHERE dead = 0 AND next_attempt_at <= ?', (time.time(),)
+        ).fetchone()[0]
+
+    def dead_count(self):
+        return self.conn.execute('SELECT COUNT(*) FROM pending WHERE dead = 1').fetchone()[0]
+
+    def oldest_age(self):
+        """Seconds since the oldest undelivered submission was queued (0 when empty)"""
+        oldest = self.conn.execute('SELECT MIN(enqueued_at) FROM pending WHERE dead = 0').fetchone()[0]
+        return time.time() - oldest if oldest else 0.0
+
+    def close(self):
+        self.conn.close()
+
+
+class IngestWorker:
+    """Background task draining an IngestQueue to Notion in batches"""
+
+    def __init__(self, queue, writer, batch_size=10, idle_interval=5.0, max_backoff=300):
+        self.queue = queue
+        self.writer = writer  # async callable(parsed_data, attempts) -> (success, message)
+        self.batch_size = batch_size
+        self.idle_interval = idle_interval
+        self.max_backoff = max_backoff
+        self.drained = 0
+        self.failed_attempts = 0
+        self._recent = deque(maxlen=1000)  # Timestamps of recent successful writes
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def notify(self):
+        """Wake the worker as soon as something is enqueued"""
+        self._wakeup.set()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        while True:
+            # Clear before draining so a submission queued mid-drain still wakes us
+            self._wakeup.clear()
+            try:
+                drained = await self.drain_once()
+            except Exception as e:
+                logger.exception("❌ Ingest worker error: %s", e)
+                drained = 0
+            if drained:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.idle_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def drain_once(self):
+        """Push one batch to Notion; returns how many submissions were written"""
+        batch = self.queue.next_batch(self.batch_size)
+        if not batch:
+            return 0
+
+        outcomes = await asyncio.gather(
+            *(self.writer(parsed_data, attempts) for _, parsed_data, attempts in batch),
+            return_exceptions=True
+        )
+
+        written = []
+        for (row_id, parsed_data, attempts), outcome in zip(batch, outcomes):
+            if isinstance(outcome, Exception):
+                success, message = False, str(outcome)
+            else:
+                success, message = outcome
+            if success:
+                written.append(row_id)
+            else:
+                self.failed_attempts += 1
+                delay = min(self.max_backoff, 2 ** attempts)
+                self.queue.retry_later(row_id, message, delay)
+                logger.warning("⚠️ Queued entry for %s not saved yet (attempt %d): %s", parsed_data.get('student_name'), attempts + 1, message,
+                               extra={'discord_user_id': parsed_data.get('discord_user_id'), 'cohort': parsed_data.get('cohort')})
+
+        self.queue.ack(written)
+        now = time.time()
+        self.drained += len(written)
+        self._recent.extend([now] * len(written))
+        return len(written)
+
+    def drain_rate(self, window=60.0):
+        """Entries written to Notion per second over the last ``window`` seconds"""
+        cutoff = time.time() - window
+        return sum(1 for stamp in self._recent if stamp >= cutoff) / window
+
+    def stats(self):
+        return {
+            'depth': self.queue.depth(),
+            'dead': self.queue.dead_count(),
+            'oldest_age_seconds': round(self.queue.oldest_age(), 1),
+            'drained': self.drained,
+            'failed_attempts': self.failed_attempts,
+            'drain_rate_per_min': round(self.drain_rate() * 60, 1),
+        }
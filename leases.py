@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def default_holder(tag=None):
+    """Holder ID naming this process: host, PID and an optional tag such as its shard IDs"""
+    holder = f'{socket.gethostname()}:{os.getpid()}'
+    return f'{holder}:{tag}' if tag else holder
+
+
+class LeaseStore:
+    """Named, expiring leases in a SQLite file shared by every bot process on the host
+
+    A lease belongs to one holder until it expires, and the holder renews it well
+    before then. The take-or-renew is a single upsert, so SQLite's write lock
+    decides races: two processes going for an expired lease can't both win.
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=5)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS leases (
+                name TEXT PRIMARY KEY,
+                holder TEXT NOT NULL,
+                acquired_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        ''')
+        self.conn.commit()
+
+    def acquire(self, name, holder, ttl):
+        """Take or renew a lease; True when ``holder`` owns it for the next ``ttl`` seconds"""
+        now = time.time()
+        with self.conn:
+            cursor = self.conn.execute(
+                '''INSERT INTO leases (name, holder, acquired_at, expires_at) VALUES (?, ?, ?, ?)
+                   ON CONFLICT(name) DO UPDATE SET
+                       acquired_at = CASE WHEN leases.holder = excluded.holder THEN leases.acquired_at ELSE excluded.acquired_at END,
+                       holder = excluded.holder,
+                       expires_at = excluded.expires_at
+                   WHERE leases.holder = excluded.holder OR leases.expires_at < excluded.acquired_at''',
+                (name, holder, now, now + ttl)
+            )
+        return cursor.rowcount == 1
+
+    def release(self, name, holder):
+        """Give a lease up early so another process can take it without waiting out the TTL"""
+        with self.conn:
+            self.conn.execute('DELETE FROM leases WHERE name = ? AND holder = ?', (name, holder))
+
+    def holder(self, name):
+        """(holder, acquired_at, expires_at) of a live lease, or None when nobody holds it"""
+        return self.conn.execute(
+            'SELECT holder, acquired_at, expires_at FROM leases WHERE name = ? AND expires_at >= ?',
+            (name, time.time())
+        ).fetchone()
+
+    def close(self):
+        self.conn.close()
+
+
+class Lease:
+    """Background task keeping one named lease renewed, with callbacks when it's gained or lost
+
+    ``on_acquired`` and ``on_lost`` are async callables. If the store can't be
+    reached, the lease is treated as held only until the last successful renewal
+    runs out, so a process cut off from the store steps down no later than a
+    rival could take over.
+    """
+
+    def __init__(self, store, name, holder, ttl=30.0, renew_interval=None, on_acquired=None, on_lost=None):
+        self.store = store
+        self.name = name
+        self.holder = holder
+        self.ttl = ttl
+        self.renew_interval = renew_interval or ttl / 3
+        self.on_acquired = on_acquired
+        self.on_lost = on_lost
+        self.held = False
+        self.acquisitions = 0
+        self._valid_until = 0.0
+        self._task = None
+
+    def try_acquire(self):
+        """One take-or-renew attempt; True when this process holds the lease afterwards"""
+        now = time.time()
+        try:
+            won = self.store.acquire(self.name, self.holder, self.ttl)
+        except sqlite3.Error as e:
+            logger.warning("⚠️ Could not renew lease '%s': %s", self.name, e)
+            return self.held and now < self._valid_until
+        if won:
+            self._valid_until = now + self.ttl
+        return won
+
+    async def check(self):
+        """Renew (or try to take) the lease and fire the callback for any change; returns whether it's held"""
+        held = self.try_acquire()
+        if held and not self.held:
+            self.held = True
+            self.acquisitions += 1
+            logger.info("👑 Acquired lease '%s' as %s", self.name, self.holder)
+            if self.on_acquired:
+                await self.on_acquired()
+        elif not held and self.held:
+            self.held = False
+            logger.warning("⚠️ Lost lease '%s' to %s", self.name, self.current_holder() or 'nobody')
+            if self.on_lost:
+                await self.on_lost()
+        return held
+
+    async def wait_acquire(self, timeout):
+        """Keep trying for up to ``timeout`` seconds, e.g. while a crashed predecessor's lease runs out"""
+        deadline = time.monotonic() + timeout
+        while not await self.check():
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(min(1.0, self.renew_interval))
+        return True
+
+    def current_holder(self):
+        row = self.store.holder(self.name)
+        return row[0] if row else None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        """Stop renewing and release the lease if it's ours"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.held:
+            self.held = False
+            try:
+                self.store.release(self.name, self.holder)
+            except sqlite3.Error as e:
+                logger.warning("⚠️ Could not release lease '%s': %s", self.name, e)
+
+    async def run(self):
+        while True:
+            try:
+                await self.check()
+            except Exception as e:
+                logger.exception("❌ Lease '%s' renewal error: %s", self.name, e)
+            await asyncio.sleep(self.renew_interval)
+
+    def stats(self):
+        row = self.store.holder(self.name)
+        return {
+            'held': self.held,
+            'holder': row[0] if row else None,
+            'held_for_seconds': round(time.time() - row[1], 1) if row else None,
+            'expires_in_seconds': round(row[2] - time.time(), 1) if row else None,
+            'acquisitions': self.acquisitions,
+        }
@@ -0,0 +1,121 @@
+def normalize_name(name):
+    """Case-fold and collapse whitespace so lookups ignore formatting differences"""
+    if not name:
+        return ''
+    return ' '.join(name.casefold().split())
+
+
+def member_names(member):
+    """Every name a student might be known by: server nickname, global name, username"""
+    names = {
+        normalize_name(getattr(member, 'display_name', None)),
+        normalize_name(getattr(member, 'global_name', None)),
+        normalize_name(getattr(member, 'name', None)),
+    }
+    names.discard('')
+    return names
+
+
+class MemberIndex:
+    """In-memory map from normalized display name / username / student name to Discord user ID
+
+    Built once from the guild member cache and kept current from member
+    join/update/leave events, so resolving a student by name is a dict hit
+    instead of a scan over every member of every guild.
+    """
+
+    def __init__(self):
+        self._by_name = {}  # normalized name -> {user_id: reference count}
+        self._members = {}  # (guild_id, user_id) -> names indexed for that membership
+        self._aliases = {}  # user_id -> student names taken from journal submissions
+
+    def __len__(self):
+        return len(self._by_name)
+
+    def _add_name(self, name, user_id):
+        holders = self._by_name.setdefault(name, {})
+        holders[user_id] = holders.get(user_id, 0) + 1
+
+    def _remove_name(self, name, user_id):
+        holders = self._by_name.get(name)
+        if not holders or user_id not in holders:
+            return
+        holders[user_id] -= 1
+        if holders[user_id] <= 0:
+            del holders[user_id]
+        if not holders:
+            del self._by_name[name]
+
+    def build(self, guilds):
+        """Rebuild the index from every cached member of every guild"""
+        self._by_name.clear()
+        self._members.clear()
+        for guild in guilds:
+            self.add_guild(guild)
+        for user_id, aliases in self._aliases.items():
+            for name in aliases:
+                self._add_name(name, user_id)
+
+    def add_guild(self, guild):
+        for member in guild.members:
+            self.add_member(member)
+
+    def remove_guild(self, guild):
+        for guild_id, user_id in [key for key in self._members if key[0] == guild.id]:
+            for name in self._members.pop((guild_id, user_id)):
+                self._remove_name(name, user_id)
+
+    def add_member(self, member):
+        """Index a member, or re-index one whose nickname/username changed"""
+        guild_id = member.guild.id if getattr(member, 'guild', None) else None
+        key = (guild_id, member.id)
+        names = member_names(member)
+        previous = self._members.get(key, set())
+        for name in previous - names:
+            self._remove_name(name, member.id)
+        for name in names - previous:
+            self._add_name(name, member.id)
+        self._members[key] = names
+
+    def remove_member(self, member):
+        guild_id = member.guild.id if getattr(member, 'guild', None) else None
+        for name in self._members.pop((guild_id, member.id), set()):
+            self._remove_name(name, member.id)
+
+    def add_alias(self, name, user_id):
+        """Remember a student name (as written in their journal) for a user ID"""
+        name = normalize_name(name)
+        if not name:
+            return
+        aliases = self._aliases.setdefault(user_id, set())
+        if name not in aliases:
+            aliases.add(name)
+            self._add_name(name, user_id)
+
+    def lookup(self, *names):
+        """User ID for the first name that matches anyone, or None"""
+        for name in names:
+            holders = self._by_name.get(normalize_name(name))
+            if holders:
+                # Deterministic pick when two people share a name
+                return min(holders)
+        return None
+
+    def resolve_batch(self, responses):
+        """Map entry_id -> user ID (or None) for a batch of extracted responses in one pass"""
+        resolved = {}
+        for response_data in responses:
+            user_id = None
+            if response_data.get('discord_user_id'):
+                try:
+                    user_id = int(response_data['discord_user_id'])
+                except ValueError:
+                    user_id = None
+            if user_id is None:
+                user_id = self.lookup(
+                    response_data.get('student_name'),
+                    response_data.get('discord_display_name'),
+                    response_data.get('discord_username')
+                )
+            resolved[response_data['entry_id']] = user_id
+        return resolved
@@ -0,0 +1,50 @@
+DISCORD_MESSAGE_LIMIT = 2000
+PARAGRAPH_SEPARATOR = '\n\n'
+
+# Progressively finer boundaries to split an oversized block on
+_BOUNDARIES = ('\n\n', '\n', ' ')
+
+
+def split_block(text, limit=DISCORD_MESSAGE_LIMIT, boundaries=_BOUNDARIES):
+    """Split text into pieces of at most ``limit`` characters
+
+    Cuts on the coarsest boundary that works - paragraphs, then lines, then
+    words - and only hard-splits a single unbroken run longer than the limit.
+    """
+    if len(text) <= limit:
+        return [text] if text else []
+    if not boundaries:
+        return [text[start:start + limit] for start in range(0, len(text), limit)]
+    boundary, finer = boundaries[0], boundaries[1:]
+    pieces = []
+    for part in text.split(boundary):
+        pieces.extend(split_block(part, limit, finer) if len(part) > limit else [part])
+    return pack(pieces, limit, boundary)
+
+
+def pack(blocks, limit=DISCORD_MESSAGE_LIMIT, separator=PARAGRAPH_SEPARATOR):
+    """Greedily join blocks (each already within the limit) into as few messages as possible"""
+    messages = []
+    current = []
+    length = 0
+    for block in blocks:
+        if not block:
+            continue
+        added = len(block) + (len(separator) if current else 0)
+        if current and length + added > limit:
+            messages.append(separator.join(current))
+            current, length = [], 0
+            added = len(block)
+        current.append(block)
+        length += added
+    if current:
+        messages.append(separator.join(current))
+    return messages
+
+
+def compose(header, sections, footer, limit=DISCORD_MESSAGE_LIMIT):
+    """Lay out header, body sections and footer as paragraphs across the fewest messages under ``limit``"""
+    blocks = []
+    for block in (header, *sections, footer):
+        blocks.extend(split_block(block.strip('\n'), limit))
+    return pack(blocks, limit)
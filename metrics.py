@@ -0,0 +1,207 @@
+import bisect
+import time
+from contextlib import contextmanager
+
+from aiohttp import web
+
+# Latency buckets in seconds, from a fast parse up to a heavily throttled Notion call
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key):
+    if not key:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in key) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count, optionally split by labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, registry=None):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        (registry or REGISTRY).register(self)
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(labels), 0)
+
+    def samples(self):
+        for key, value in self._values.items():
+            yield self.name, key, value
+
+    def snapshot(self):
+        return {key: value for key, value in self._values.items()}
+
+
+class Gauge:
+    """Point-in-time value read from a callback at scrape time (queue depths, cache sizes)
+
+    The callback returns a number, or a dict mapping label dicts (as tuples of
+    (name, value) pairs) to numbers for a labelled gauge.
+    """
+
+    def __init__(self, name, documentation, callback, kind='gauge', registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.kind = kind  # 'counter' for totals kept elsewhere, e.g. cache hit counts
+        (registry or REGISTRY).register(self)
+
+    def samples(self):
+        try:
+            value = self.callback()
+        except Exception:
+            return
+        if isinstance(value, dict):
+            for key, item in value.items():
+                yield self.name, tuple(key), item
+        elif value is not None:
+            yield self.name, (), value
+
+    def snapshot(self):
+        return {key: value for _, key, value in self.samples()}
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, optionally split by labels"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS, registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label key -> [per-bucket counts (+Inf last), sum, count]
+        (registry or REGISTRY).register(self)
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of a block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        for key, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket', key + (('le', _format_value(float(bound))),), cumulative
+            yield f'{self.name}_sum', key, total
+            yield f'{self.name}_count', key, count
+
+    def quantile(self, fraction, **labels):
+        """Estimate a quantile by interpolating within the bucket it falls in"""
+        series = self._series.get(_label_key(labels))
+        return self._quantile(series, fraction) if series else 0.0
+
+    def _quantile(self, series, fraction):
+        counts, _, count = series
+        if not count:
+            return 0.0
+        rank = fraction * count
+        seen = 0
+        lower = 0.0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            if bucket_count and seen + bucket_count >= rank:
+                if bound == float('inf'):
+                    return lower  # Beyond the last bucket; the best we can say is "at least"
+                return lower + (bound - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+            lower = bound
+        return lower
+
+    def snapshot(self):
+        """label key -> (count, mean, p50, p99) for every series"""
+        return {
+            key: (series[2], series[1] / series[2] if series[2] else 0.0,
+                  self._quantile(series, 0.5), self._quantile(series, 0.99))
+            for key, series in self._series.items()
+        }
+
+
+class Registry:
+    """Every metric exposed by the process, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def __iter__(self):
+        return iter(self._metrics.values())
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, key, value in metric.samples():
+                lines.append(f'{name}{_format_labels(key)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class MetricsServer:
+    """Tiny aiohttp server exposing a registry at /metrics for Prometheus to scrape"""
+
+    def __init__(self, registry=REGISTRY, host='127.0.0.1', port=9108):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def _handle(self, request):
+        return web.Response(text=self.registry.render(), content_type='text/plain', charset='utf-8')
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/metrics', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
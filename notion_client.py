@@ -0,0 +1,401 @@
+import asyncio
+import json
+import logging
+import random
+import time
+import aiohttp
+
+from metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+NOTION_API_URL = 'https://api.notion.com/v1'
+NOTION_VERSION = '2022-06-28'
+MAX_PAGE_SIZE = 100  # Notion's maximum rows per query page
+NOTION_RATE_LIMIT = 3  # Notion allows an average of ~3 requests per second per integration
+RETRYABLE_STATUSES = {409, 429, 500, 502, 503, 504}
+RICH_TEXT_LIMIT = 2000  # Characters per rich_text segment
+MAX_RICH_TEXT_SEGMENTS = 100  # Segments per property
+
+NOTION_REQUEST_SECONDS = Histogram('notion_request_seconds', 'Latency of each Notion API call by endpoint and status')
+
+
+def _endpoint(method, path):
+    """Metric label for a request with page/database IDs folded out, e.g. PATCH /pages/{id}"""
+    parts = path.strip('/').split('/')
+    if len(parts) > 1:
+        parts[1] = '{id}'
+    return f"{method} /{'/'.join(parts)}"
+
+
+def _segment_bounds(text, limit):
+    """(start, end) index pairs cutting text into pieces Notion will accept
+
+    Notion counts UTF-16 code units, so characters outside the BMP (emoji) take
+    two. Text without any keeps the plain stride; otherwise one pass finds the cuts.
+    """
+    if not text:
+        return
+    if text.isascii() or max(text) < '\U00010000':
+        for start in range(0, len(text), limit):
+            yield start, min(start + limit, len(text))
+        return
+    start = units = 0
+    for index, char in enumerate(text):
+        width = 2 if char >= '\U00010000' else 1
+        if units + width > limit:
+            yield start, index
+            start, units = index, 0
+        units += width
+    yield start, len(text)
+
+
+def encode_rich_text(text, limit=RICH_TEXT_LIMIT):
+    """rich_text segments for arbitrarily long text, each within Notion's per-segment limit
+
+    Each segment is sliced once straight out of the source string; nothing is
+    built up by repeated concatenation.
+    """
+    segments = [
+        {"text": {"content": text[start:end]}}
+        for start, end in _segment_bounds(text or '', limit)
+    ]
+    if len(segments) > MAX_RICH_TEXT_SEGMENTS:
+        logger.warning("⚠️ Text of %d characters exceeds Notion's %d segment limit; truncating", len(text), MAX_RICH_TEXT_SEGMENTS)
+        segments = segments[:MAX_RICH_TEXT_SEGMENTS]
+    return segments or [{"text": {"content": ""}}]
+
+
+def decode_rich_text(prop):
+    """Full text of a title/rich_text property value (or a bare segment list), joining every segment"""
+    if not prop:
+        return ''
+    segments = prop if isinstance(prop, list) else (prop.get('title') if 'title' in prop else prop.get('rich_text'))
+    if not segments:
+        return ''
+    if len(segments) == 1:
+        segment = segments[0]
+        return segment.get('plain_text') or segment.get('text', {}).get('content', '')
+    return ''.join([
+        segment.get('plain_text') or segment.get('text', {}).get('content', '')
+        for segment in segments
+    ])
+
+
+class NotionAPIError(Exception):
+    """Raised when Notion answers with a non-200 status
+
+    ``may_have_applied`` is True when the request could have taken effect anyway
+    (a 409/5xx, or a network error after the connection was made).
+    """
+
+    def __init__(self, status, text, may_have_applied=False):
+        self.status = status
+        self.text = text
+        self.may_have_applied = may_have_applied
+        super().__init__(f"{status} - {text}")
+
+
+class TokenBucket:
+    """Async token bucket shared by every request made through one client"""
+
+    def __init__(self, rate=NOTION_RATE_LIMIT, capacity=None):
+        self.rate = rate
+        # A request needs a whole token, so rates below 1/s still hold one
+        self.capacity = max(1, capacity or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a request may be sent"""
+        async with self._lock:
+            waited = False
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    delay = self.blocked_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        if waited:
+                            self.waits += 1
+                        return
+                    delay = (1 - self.tokens) / self.rate
+                waited = True
+                self.wait_seconds += delay
+                await asyncio.sleep(delay)
+
+    def pause(self, seconds):
+        """Hold back every caller for ``seconds`` (used when Notion sends Retry-After)"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class QueryCache:
+    """Short-lived cache of complete database query results
+
+    Entries are keyed by database and query body and dropped after ``ttl``
+    seconds or as soon as the client writes anything. A generation counter makes
+    sure a query that was in flight during a write never stores stale rows.
+    """
+
+    def __init__(self, ttl=60, max_entries=64):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = {}  # key -> (stored_at, rows)
+
+    @staticmethod
+    def key(database_id, query):
+        query = {k: v for k, v in (query or {}).items() if k not in ('page_size', 'start_cursor')}
+        return database_id, json.dumps(query, sort_keys=True)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            self.hits += 1
+            return entry[1]
+        if entry is not None:
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, rows, generation):
+        if generation != self.generation:
+            return  # A write happened while this query was running
+        if len(self._entries) >= self.max_entries:
+            del self._entries[min(self._entries, key=lambda k: self._entries[k][0])]
+        self._entries[key] = (time.monotonic(), rows)
+
+    def invalidate(self):
+        self.generation += 1
+        self.invalidations += 1
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'invalidations': self.invalidations,
+        }
+
+
+class NotionClient:
+    """Async Notion API client sharing one pooled keep-alive session
+
+    Every request passes through a shared token bucket and is retried on
+    429/5xx/network errors, honouring Retry-After or falling back to jittered
+    exponential backoff. Page creation is the exception; see create_page.
+    """
+
+    def __init__(self, token, timeout=30, pool_size=10, keepalive=30,
+                 rate_limit=NOTION_RATE_LIMIT, max_retries=5, backoff_base=0.5, backoff_max=30,
+                 cache_ttl=60, base_url=NOTION_API_URL):
+        self.base_url = base_url.rstrip('/')
+        self.headers = {
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'application/json',
+            'Notion-Version': NOTION_VERSION
+        }
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.pool_size = pool_size
+        self.keepalive = keepalive
+        self.limiter = TokenBucket(rate_limit)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cache = QueryCache(ttl=cache_ttl)
+        self.counters = {
+            'requests': 0,
+            'retries': 0,
+            'throttled': 0,  # 429 responses received
+            'server_errors': 0,
+            'network_errors': 0,
+            'failures': 0,  # Requests that gave up after all retries
+        }
+        self._session = None
+        self._session_lock = asyncio.Lock()
+
+    async def _get_session(self):
+        """Create the HTTP session lazily so it binds to the running event loop"""
+        if self._session is None or self._session.closed:
+            async with self._session_lock:
+                if self._session is None or self._session.closed:
+                    connector = aiohttp.TCPConnector(
+                        limit=self.pool_size,
+                        keepalive_timeout=self.keepalive
+                    )
+                    self._session = aiohttp.ClientSession(
+                        headers=self.headers,
+                        timeout=self.timeout,
+                        connector=connector
+                    )
+        return self._session
+
+    async def close(self):
+        """Close the underlying HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def stats(self):
+        """Snapshot of request, retry and throttle counters"""
+        return {
+            **self.counters,
+            'throttle_waits': self.limiter.waits,
+            'throttle_wait_seconds': round(self.limiter.wait_seconds, 3),
+        }
+
+    def _backoff(self, attempt, retry_after=None):
+        """Seconds to wait before the next attempt"""
+        if retry_after is not None:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass
+        # Full jitter: spread retries out so concurrent callers don't stampede together
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def request(self, method, path, payload=None, idempotent=True):
+        """Send a request to the Notion API and return the decoded JSON body
+
+        With idempotent=False only failures Notion can't have acted on (429s and
+        connections that were never made) are retried.
+        """
+        session = await self._get_session()
+        url = f'{self.base_url}{path}'
+        endpoint = _endpoint(method, path)
+        attempt = 0
+        while True:
+            await self.limiter.acquire()
+            self.counters['requests'] += 1
+            started = time.perf_counter()
+            try:
+                async with session.request(method, url, json=payload) as response:
+                    if response.status == 200:
+                        body = await response.json()
+                        NOTION_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, status='200')
+                        return body
+                    error = NotionAPIError(response.status, await response.text(),
+                                           may_have_applied=response.status in RETRYABLE_STATUSES and response.status != 429)
+                    retry_after = response.headers.get('Retry-After')
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.counters['network_errors'] += 1
+                error = NotionAPIError(0, f"{type(e).__name__}: {e}",
+                                       may_have_applied=not isinstance(e, aiohttp.ClientConnectorError))
+                retry_after = None
+            NOTION_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, status=str(error.status or 'network'))
+
+            if error.status == 429:
+                self.counters['throttled'] += 1
+            elif error.status >= 500:
+                self.counters['server_errors'] += 1
+
+            if ((error.status and error.status not in RETRYABLE_STATUSES) or attempt >= self.max_retries
+                    or (error.may_have_applied and not idempotent)):
+                self.counters['failures'] += 1
+                raise error
+
+            delay = self._backoff(attempt, retry_after)
+            if error.status == 429:
+                # Throttling applies to the whole integration, so hold back every caller
+                self.limiter.pause(delay)
+            self.counters['retries'] += 1
+            attempt += 1
+            logger.warning("⏳ Notion %s %s failed (%s), retry %d/%d in %.1fs", method, path, error.status or 'network',
+                           attempt, self.max_retries, delay)
+            await asyncio.sleep(delay)
+
+    async def create_page(self, page_data, find_existing=None):
+        """Create a page (database row) from a full Notion page payload
+
+        POST /pages isn't idempotent: a timeout or 5xx can arrive after Notion has
+        created the page. Those failures are only retried when ``find_existing``
+        (async callable -> the page or None) first confirms the row isn't there;
+        if it is, that page is returned instead of creating a duplicate.
+        """
+        attempt = 0
+        try:
+            while True:
+                try:
+                    return await self.request('POST', '/pages', page_data, idempotent=False)
+                except NotionAPIError as e:
+                    if not e.may_have_applied or find_existing is None or attempt >= self.max_retries:
+                        raise
+                    error = e
+                delay = self._backoff(attempt)
+                self.counters['retries'] += 1
+                attempt += 1
+                logger.warning("⏳ Notion POST /pages failed (%s), checking for the page before retry %d/%d in %.1fs",
+                               error.status or 'network', attempt, self.max_retries, delay)
+                await asyncio.sleep(delay)
+                existing = await find_existing()
+                if existing:
+                    return existing
+        finally:
+            self.cache.invalidate()
+
+    async def query_database(self, database_id, query=None):
+        """Run a database query and return the raw response body"""
+        return await self.request('POST', f'/databases/{database_id}/query', query or {})
+
+    async def iter_database(self, database_id, query=None, page_size=100, cached=False):
+        """Yield every row matching a database query, following Notion's pagination cursors
+
+        Rows are yielded as each page arrives and the next page is prefetched while
+        the caller works through the current one, so delivery can start before the
+        last page lands. page_size is a hint capped at Notion's limit of 100.
+
+        With cached=True a recent identical query is replayed from the QueryCache,
+        and a fully consumed result is stored for the next caller.
+        """
+        cache_key = generation = None
+        collected = None
+        if cached:
+            cache_key = QueryCache.key(database_id, query)
+            rows = self.cache.get(cache_key)
+            if rows is not None:
+                for row in rows:
+                    yield row
+                return
+            generation = self.cache.generation
+            collected = []
+
+        query = dict(query or {})
+        query['page_size'] = max(1, min(int(page_size), MAX_PAGE_SIZE))
+        pending = asyncio.ensure_future(self.query_database(database_id, query))
+        try:
+            while pending is not None:
+                response = await pending
+                pending = None
+                if response.get('has_more') and response.get('next_cursor'):
+                    query = {**query, 'start_cursor': response['next_cursor']}
+                    pending = asyncio.ensure_future(self.query_database(database_id, query))
+                for row in response.get('results', []):
+                    if collected is not None:
+                        collected.append(row)
+                    yield row
+            if collected is not None:
+                self.cache.put(cache_key, collected, generation)
+        finally:
+            # Caller stopped early - don't leave a prefetch running
+            if pending is not None:
+                pending.cancel()
+
+    async def update_page(self, page_id, properties):
+        """Patch properties on an existing page"""
+        try:
+            return await self.request('PATCH', f'/pages/{page_id}', {"properties": properties})
+        finally:
+            self.cache.invalidate()
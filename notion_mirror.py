@@ -0,0 +1,308 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+from notion_client import decode_rich_text
+
+logger = logging.getLogger(__name__)
+
+
+def _row_from_page(page, submission_property):
+    properties = page.get('properties', {})
+    date_prop = properties.get('Date', {}).get('date') or {}
+    status = (properties.get('Status', {}).get('select') or {}).get('name')
+    ciso_response = decode_rich_text(properties.get('CISO Response'))
+    return (
+        page['id'],
+        date_prop.get('start', '') or '',
+        decode_rich_text(properties.get('Student Name')),
+        decode_rich_text(properties.get('Discord User ID')),
+        1 if ciso_response.strip() else 0,
+        1 if properties.get('Response Sent', {}).get('checkbox') else 0,
+        status,
+        properties.get('Hours Worked', {}).get('number'),
+        page.get('last_edited_time', ''),
+        json.dumps(page),
+        decode_rich_text(properties.get(submission_property)),
+    )
+
+
+class NotionMirror:
+    """Local SQLite copy of the journal database, indexed for the bot's read paths
+
+    ``submission_property`` names the rich-text property holding the Discord
+    message ID an entry was created from, which the backfill dedupes on.
+    """
+
+    def __init__(self, path, submission_property='Submission ID'):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.submission_property = submission_property
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS entries (
+                page_id TEXT PRIMARY KEY,
+                entry_date TEXT NOT NULL,
+                student_name TEXT NOT NULL,
+                discord_user_id TEXT NOT NULL,
+                has_response INTEGER NOT NULL,
+                response_sent INTEGER NOT NULL,
+                status TEXT,
+                hours_worked REAL,
+                last_edited_time TEXT NOT NULL,
+                page_json TEXT NOT NULL,
+                submission_id TEXT NOT NULL DEFAULT ''
+            );
+            CREATE INDEX IF NOT EXISTS entries_pending ON entries (entry_date, has_response, response_sent, student_name);
+            CREATE INDEX IF NOT EXISTS entries_unsent ON entries (has_response, response_sent, entry_date);
+            CREATE INDEX IF NOT EXISTS entries_student ON entries (discord_user_id, entry_date);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        ''')
+        self.conn.commit()
+        self._add_submission_ids()
+
+    def _add_submission_ids(self):
+        """Mirrors created before submission IDs get the column, filled in from the stored pages"""
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(entries)')}
+        if 'submission_id' in columns:
+            return
+        with self.conn:
+            self.conn.execute("ALTER TABLE entries ADD COLUMN submission_id TEXT NOT NULL DEFAULT ''")
+            rows = self.conn.execute('SELECT page_id, page_json FROM entries').fetchall()
+            self.conn.executemany('UPDATE entries SET submission_id = ? WHERE page_id = ?', [
+                (decode_rich_text(json.loads(page_json).get('properties', {}).get(self.submission_property)), page_id)
+                for page_id, page_json in rows
+            ])
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, str(value)))
+
+    def upsert(self, pages):
+        """Insert or replace Notion pages; archived pages are removed"""
+        live = [page for page in pages if not page.get('archived') and not page.get('in_trash')]
+        gone = [(page['id'],) for page in pages if page.get('archived') or page.get('in_trash')]
+        with self.conn:
+            self.conn.executemany(
+                '''INSERT OR REPLACE INTO entries
+                       (page_id, entry_date, student_name, discord_user_id, has_response, response_sent,
+                        status, hours_worked, last_edited_time, page_json, submission_id)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                [_row_from_page(page, self.submission_property) for page in live]
+            )
+            if gone:
+                self.conn.executemany('DELETE FROM entries WHERE page_id = ?', gone)
+        return len(live)
+
+    def remove_missing(self, page_ids):
+        """Drop rows that no longer exist in Notion (deleted pages don't show up in delta polls)"""
+        existing = {row[0] for row in self.conn.execute('SELECT page_id FROM entries')}
+        stale = [(page_id,) for page_id in existing - set(page_ids)]
+        if stale:
+            with self.conn:
+                self.conn.executemany('DELETE FROM entries WHERE page_id = ?', stale)
+        return len(stale)
+
+    def mark_sent(self, page_id):
+        """Reflect a "Response Sent" update immediately, before the next sync sees it"""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE entries SET response_sent = 1, status = 'Responded' WHERE page_id = ?",
+                (page_id,)
+            )
+
+    def pending_responses(self, entry_date):
+        """Raw Notion pages for entry_date with a CISO response not yet sent, by student name"""
+        rows = self.conn.execute(
+            '''SELECT page_json, response_sent FROM entries
+               WHERE entry_date = ? AND has_response = 1 AND response_sent = 0
+               ORDER BY student_name''',
+            (entry_date,)
+        )
+        return [self._page(page_json, response_sent) for page_json, response_sent in rows]
+
+    def pending_range(self, start_date, end_date):
+        """Unsent CISO responses dated start_date..end_date inclusive, by student then date"""
+        rows = self.conn.execute(
+            '''SELECT page_json, response_sent FROM entries
+               WHERE entry_date BETWEEN ? AND ? AND has_response = 1 AND response_sent = 0
+               ORDER BY student_name, entry_date''',
+            (start_date, end_date)
+        )
+        return [self._page(page_json, response_sent) for page_json, response_sent in rows]
+
+    def known_students(self):
+        """(Discord user ID, student name) for every student with at least one entry here"""
+        return self.conn.execute(
+            "SELECT DISTINCT discord_user_id, student_name FROM entries WHERE discord_user_id != ''"
+        ).fetchall()
+
+    def entry_keys(self, since_date):
+        """(submission_id, discord_user_id, YYYY-MM-DD) for every entry dated on or after since_date
+
+        submission_id is '' for entries created before submission IDs were recorded. Dates are
+        cut to the day like the Notion query path, so a start with a time still matches.
+        """
+        return self.conn.execute(
+            'SELECT submission_id, discord_user_id, substr(entry_date, 1, 10) FROM entries WHERE entry_date >= ?',
+            (since_date,)
+        ).fetchall()
+
+    def hours_rows(self, since=''):
+        """(discord_user_id, student_name, entry_date, hours_worked, last_edited_time) edited at or after ``since``, by date"""
+        return self.conn.execute(
+            '''SELECT discord_user_id, student_name, entry_date, hours_worked, last_edited_time FROM entries
+               WHERE last_edited_time >= ? AND entry_date != ''
+               ORDER BY entry_date''',
+            (since,)
+        )
+
+    def count_pending(self, entry_date):
+        return self.conn.execute(
+            'SELECT COUNT(*) FROM entries WHERE entry_date = ? AND has_response = 1 AND response_sent = 0',
+            (entry_date,)
+        ).fetchone()[0]
+
+    def all_pending(self, limit=None):
+        """(total, newest pages first) for every unsent CISO response regardless of date"""
+        total = self.conn.execute(
+            'SELECT COUNT(*) FROM entries WHERE has_response = 1 AND response_sent = 0'
+        ).fetchone()[0]
+        rows = self.conn.execute(
+            '''SELECT page_json, response_sent FROM entries
+               WHERE has_response = 1 AND response_sent = 0
+               ORDER BY entry_date DESC LIMIT ?''',
+            (-1 if limit is None else limit,)
+        )
+        return total, [self._page(page_json, response_sent) for page_json, response_sent in rows]
+
+    @staticmethod
+    def _page(page_json, response_sent):
+        page = json.loads(page_json)
+        # Local mark_sent updates win over the stored snapshot
+        if response_sent and 'Response Sent' in page.get('properties', {}):
+            page['properties']['Response Sent']['checkbox'] = True
+        return page
+
+    def row_count(self):
+        return self.conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+class MirrorSync:
+    """Keeps a NotionMirror current with delta polls on last_edited_time
+
+    The first sync (and one every ``full_sync_interval`` seconds) pulls the whole
+    database so deleted pages are dropped; in between, only pages edited since
+    the last cursor are fetched.
+    """
+
+    def __init__(self, notion, database_id, mirror, interval=60, full_sync_interval=6 * 3600, page_size=100):
+        self.notion = notion
+        self.database_id = database_id
+        self.mirror = mirror
+        self.interval = interval
+        self.full_sync_interval = full_sync_interval
+        self.page_size = page_size
+        self.last_delta_rows = 0
+        self.syncs = 0
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    @property
+    def last_sync(self):
+        return float(self.mirror.get_meta('last_sync', 0))
+
+    @property
+    def lag(self):
+        """Seconds since the mirror last caught up with Notion"""
+        return time.time() - self.last_sync if self.last_sync else float('inf')
+
+    def is_ready(self):
+        """True once a full sync has completed, so the mirror can answer reads"""
+        return bool(self.mirror.get_meta('last_full_sync'))
+
+    async def sync_now(self, full=False):
+        """Pull changes from Notion; concurrent callers share one sync"""
+        if self._lock.locked():
+            async with self._lock:
+                return self.last_delta_rows
+        async with self._lock:
+            started = time.time()
+            full = full or time.time() - float(self.mirror.get_meta('last_full_sync', 0)) > self.full_sync_interval
+            cursor = self.mirror.get_meta('cursor')
+            query = {"sorts": [{"timestamp": "last_edited_time", "direction": "ascending"}]}
+            if cursor and not full:
+                query["filter"] = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": cursor}}
+
+            batch, seen_ids, newest, rows = [], [], cursor, 0
+            async for page in self.notion.iter_database(self.database_id, query, page_size=self.page_size):
+                batch.append(page)
+                seen_ids.append(page['id'])
+                if not newest or page.get('last_edited_time', '') > newest:
+                    newest = page['last_edited_time']
+                if len(batch) >= self.page_size:
+                    rows += self.mirror.upsert(batch)
+                    batch = []
+            rows += self.mirror.upsert(batch)
+
+            removed = self.mirror.remove_missing(seen_ids) if full else 0
+            if newest:
+                self.mirror.set_meta('cursor', newest)
+            # Stamp with the start time: anything edited during the sync is picked up next time
+            self.mirror.set_meta('last_sync', started)
+            if full:
+                self.mirror.set_meta('last_full_sync', started)
+            self.last_delta_rows = rows
+            self.syncs += 1
+            # Quiet delta polls that found nothing stay at debug level
+            logger.log(logging.INFO if full or rows else logging.DEBUG, "🔄 Notion mirror %s sync: %d rows updated, %d removed, %d total",
+                       'full' if full else 'delta', rows, removed, self.mirror.row_count())
+            return rows
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        while True:
+            try:
+                await self.sync_now()
+            except Exception as e:
+                logger.exception("❌ Notion mirror sync failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def stats(self):
+        last_sync = self.last_sync
+        return {
+            'rows': self.mirror.row_count(),
+            'ready': self.is_ready(),
+            'lag_seconds': round(self.lag, 1) if last_sync else None,
+            'last_sync': datetime.fromtimestamp(last_sync, timezone.utc).isoformat() if last_sync else None,
+            'last_delta_rows': self.last_delta_rows,
+            'syncs': self.syncs,
+        }
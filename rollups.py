@@ -0,0 +1,338 @@
+import asyncio
+import logging
+from array import array
+from datetime import date
+
+from member_index import normalize_name
+
+logger = logging.getLogger(__name__)
+
+NO_ENTRY = -1  # Day slot with no submission
+
+# Journals are due Monday-Friday (ISO weekdays); other days count hours but never break a streak
+DEFAULT_WORKDAYS = frozenset(range(1, 6))
+
+
+def student_key(discord_user_id, student_name):
+    """Rollup key for a student: their Discord user ID, else the normalized name they journal under"""
+    return str(discord_user_id) if discord_user_id else normalize_name(student_name)
+
+
+def _ordinal(day):
+    # Notion date starts may carry a time ("2025-06-13T10:00:00.000+02:00"); the day is what counts
+    return date.fromisoformat(day[:10]).toordinal() if isinstance(day, str) else day.toordinal()
+
+
+class Workdays:
+    """Calendar arithmetic on date ordinals for the days journals are due"""
+
+    def __init__(self, weekdays=DEFAULT_WORKDAYS):
+        self.weekdays = frozenset(weekdays)
+
+    def __contains__(self, ordinal):
+        # Ordinal 1 (0001-01-01) is a Monday
+        return (ordinal - 1) % 7 + 1 in self.weekdays
+
+    def previous(self, ordinal):
+        """Latest workday strictly before ``ordinal``"""
+        for back in range(1, 8):
+            if ordinal - back in self:
+                return ordinal - back
+        return ordinal - 1
+
+    def count(self, first, last):
+        """Workdays in first..last inclusive, in constant time"""
+        if last < first:
+            return 0
+        weeks, extra = divmod(last - first + 1, 7)
+        return weeks * len(self.weekdays) + sum(1 for offset in range(extra) if first + offset in self)
+
+
+class DaySeries:
+    """Per-day values in a compact array indexed by days since ``start``"""
+
+    __slots__ = ('start', 'values', 'fill')
+
+    def __init__(self, typecode, fill=0):
+        self.start = None
+        self.values = array(typecode)
+        self.fill = fill
+
+    def get(self, ordinal):
+        if self.start is None or not self.start <= ordinal < self.start + len(self.values):
+            return self.fill
+        return self.values[ordinal - self.start]
+
+    def set(self, ordinal, value):
+        if self.start is None:
+            self.start = ordinal
+        elif ordinal < self.start:
+            # Backdated entry before the series began - rare, so a copy is fine
+            self.values = array(self.values.typecode, [self.fill] * (self.start - ordinal)) + self.values
+            self.start = ordinal
+        index = ordinal - self.start
+        if index >= len(self.values):
+            self.values.extend([self.fill] * (index + 1 - len(self.values)))
+        self.values[index] = value
+
+    def add(self, ordinal, delta):
+        self.set(ordinal, self.get(ordinal) + delta)
+
+    def total(self, first, last):
+        """Sum over first..last inclusive (callers keep the window to a week or a month)"""
+        if self.start is None:
+            return 0
+        low = max(first, self.start) - self.start
+        high = min(last, self.start + len(self.values) - 1) - self.start
+        return sum(value for value in self.values[low:high + 1] if value != self.fill) if high >= low else 0
+
+    def nbytes(self):
+        return self.values.itemsize * len(self.values)
+
+
+class StudentRollup:
+    """One student's hours per day plus running totals, streaks and submission counts"""
+
+    __slots__ = ('key', 'name', 'hours', 'total_hours', 'submissions', 'workday_submissions',
+                 'first_day', 'last_day', 'streak', 'streak_end', 'best_streak')
+
+    def __init__(self, key, name):
+        self.key = key
+        self.name = name
+        self.hours = DaySeries('h', NO_ENTRY)
+        self.total_hours = 0
+        self.submissions = 0
+        self.workday_submissions = 0
+        self.first_day = None
+        self.last_day = None
+        self.streak = 0  # Consecutive workdays with an entry, ending at streak_end
+        self.streak_end = None
+        self.best_streak = 0
+
+    def record(self, ordinal, hours, workdays):
+        """Set the hours for a day; returns (hours delta, True if the day had no entry before)"""
+        previous = self.hours.get(ordinal)
+        self.hours.set(ordinal, hours)
+        if previous != NO_ENTRY:
+            # A resubmission or an edit replaces the day's hours
+            self.total_hours += hours - previous
+            return hours - previous, False
+
+        self.total_hours += hours
+        self.submissions += 1
+        self.first_day = ordinal if self.first_day is None else min(self.first_day, ordinal)
+        self.last_day = ordinal if self.last_day is None else max(self.last_day, ordinal)
+        if ordinal in workdays:
+            self.workday_submissions += 1
+            if self.streak_end is None or ordinal > self.streak_end:
+                extends = self.streak_end is not None and workdays.previous(ordinal) == self.streak_end
+                self.streak = self.streak + 1 if extends else 1
+                self.streak_end = ordinal
+                self.best_streak = max(self.best_streak, self.streak)
+            else:
+                # Backdated entry may join two runs; rescan this student's series once
+                self._recount_streaks(workdays)
+        return hours, True
+
+    def _recount_streaks(self, workdays):
+        run = best = 0
+        end = None
+        for offset, value in enumerate(self.hours.values):
+            ordinal = self.hours.start + offset
+            if ordinal not in workdays:
+                continue
+            run = run + 1 if value != NO_ENTRY else 0
+            if value != NO_ENTRY:
+                end = ordinal
+                best = max(best, run)
+        self.best_streak = best
+        self.streak_end = end
+        self.streak = 0
+        ordinal = end
+        while ordinal is not None and self.hours.get(ordinal) != NO_ENTRY:
+            self.streak += 1
+            ordinal = workdays.previous(ordinal)
+
+    def current_streak(self, today, workdays):
+        """Streak still alive today: it ends today or on the last workday before today"""
+        if self.streak_end is None:
+            return 0
+        if self.streak_end >= today or self.streak_end == workdays.previous(today):
+            return self.streak
+        return 0
+
+    def missed_days(self, today, workdays):
+        """Workdays since the first entry (before today) with no entry"""
+        if self.first_day is None:
+            return 0
+        due = workdays.count(self.first_day, today - 1)
+        submitted = self.workday_submissions
+        if today in workdays and self.hours.get(today) != NO_ENTRY:
+            submitted -= 1
+        return max(0, due - submitted)
+
+
+class CohortRollup:
+    """A cohort's students plus cohort-wide hours and submissions per day"""
+
+    def __init__(self, key):
+        self.key = key
+        self.students = {}  # student key -> StudentRollup
+        self.hours = DaySeries('l')
+        self.submissions = DaySeries('H')
+        self.total_hours = 0
+
+
+class Rollups:
+    """Per-student and per-cohort journal rollups, updated as each entry is ingested
+
+    Every day a student journals is one slot in a small array, so a year of
+    history costs about 730 bytes per student. Totals, streaks and submission
+    counts are kept up to date on each entry, so a report reads a handful of
+    array slots and counters instead of rescanning Notion. Recording the same
+    (student, day) again replaces its hours, which makes replaying entries
+    from the mirror safe.
+    """
+
+    def __init__(self, workdays=DEFAULT_WORKDAYS):
+        self.workdays = Workdays(workdays)
+        self.cohorts = {}  # cohort key -> CohortRollup
+        self.recorded = 0
+
+    def cohort(self, cohort_key):
+        rollup = self.cohorts.get(cohort_key)
+        if rollup is None:
+            rollup = self.cohorts[cohort_key] = CohortRollup(cohort_key)
+        return rollup
+
+    def record(self, cohort_key, student_key, student_name, day, hours):
+        """Fold one journal entry (day as YYYY-MM-DD) into the student's and cohort's rollups"""
+        if not student_key or not day:
+            return
+        ordinal = _ordinal(day)
+        cohort = self.cohort(cohort_key)
+        student = cohort.students.get(student_key)
+        if student is None:
+            student = cohort.students[student_key] = StudentRollup(student_key, student_name)
+        elif student_name:
+            student.name = student_name
+        delta, new_day = student.record(ordinal, max(0, min(int(hours or 0), 24)), self.workdays)
+        cohort.hours.add(ordinal, delta)
+        cohort.total_hours += delta
+        if new_day:
+            cohort.submissions.add(ordinal, 1)
+        self.recorded += 1
+
+    def find(self, cohort_key, student_key):
+        cohort = self.cohorts.get(cohort_key)
+        return cohort.students.get(student_key) if cohort else None
+
+    def student_report(self, student, today):
+        today = _ordinal(today)
+        week_start = today - (today - 1) % 7  # Monday
+        month_start = date.fromordinal(today).replace(day=1).toordinal()
+        return {
+            'name': student.name,
+            'today_hours': max(0, student.hours.get(today)),
+            'week_hours': student.hours.total(week_start, today),
+            'month_hours': student.hours.total(month_start, today),
+            'total_hours': student.total_hours,
+            'submissions': student.submissions,
+            'current_streak': student.current_streak(today, self.workdays),
+            'best_streak': student.best_streak,
+            'missed_days': student.missed_days(today, self.workdays),
+            'last_entry': date.fromordinal(student.last_day).isoformat() if student.last_day else None,
+        }
+
+    def cohort_report(self, cohort_key, today):
+        cohort = self.cohort(cohort_key)
+        today = _ordinal(today)
+        week_start = today - (today - 1) % 7
+        month_start = date.fromordinal(today).replace(day=1).toordinal()
+        students = len(cohort.students)
+        workdays_this_week = self.workdays.count(week_start, today)
+        week_submissions = sum(
+            cohort.submissions.get(ordinal) for ordinal in range(week_start, today + 1) if ordinal in self.workdays
+        )
+        return {
+            'students': students,
+            'submitted_today': cohort.submissions.get(today),
+            'today_hours': cohort.hours.get(today),
+            'week_hours': cohort.hours.total(week_start, today),
+            'month_hours': cohort.hours.total(month_start, today),
+            'total_hours': cohort.total_hours,
+            'week_submission_rate': week_submissions / (students * workdays_this_week) if students and workdays_this_week else 0.0,
+        }
+
+    def memory_bytes(self):
+        """Bytes held by the day arrays (excluding per-object overhead)"""
+        return sum(
+            cohort.hours.nbytes() + cohort.submissions.nbytes() + sum(student.hours.nbytes() for student in cohort.students.values())
+            for cohort in self.cohorts.values()
+        )
+
+    def stats(self):
+        return {
+            'cohorts': len(self.cohorts),
+            'students': sum(len(cohort.students) for cohort in self.cohorts.values()),
+            'entries_recorded': self.recorded,
+            'array_bytes': self.memory_bytes(),
+        }
+
+
+class RollupSync:
+    """Folds entries edited in each cohort's local mirror into the rollups
+
+    The first pass replays every mirrored entry; later passes only pick up rows
+    edited since, which brings in hour corrections made in Notion and entries
+    ingested by other shard processes.
+    """
+
+    def __init__(self, rollups, sources, interval=60):
+        self.rollups = rollups
+        self.sources = sources  # [(cohort key, NotionMirror)]
+        self.interval = interval
+        self._cursors = {}
+        self.skipped = 0  # Rows that couldn't be folded in (e.g. a malformed date)
+        self._task = None
+
+    def sync_now(self):
+        folded = 0
+        for cohort_key, mirror in self.sources:
+            cursor = self._cursors.get(cohort_key, '')
+            for discord_user_id, student_name, entry_date, hours, edited in mirror.hours_rows(since=cursor):
+                # The cursor moves past a bad row too, so it can't hold back every row after it
+                cursor = max(cursor, edited)
+                try:
+                    self.rollups.record(cohort_key, student_key(discord_user_id, student_name), student_name, entry_date, hours)
+                except (TypeError, ValueError) as e:
+                    self.skipped += 1
+                    logger.warning("⚠️ Rollups: skipped mirrored entry dated %r for %s: %s", entry_date, student_name, e,
+                                   extra={'discord_user_id': discord_user_id, 'cohort': cohort_key})
+                    continue
+                folded += 1
+            self._cursors[cohort_key] = cursor
+        return folded
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        while True:
+            try:
+                folded = self.sync_now()
+                logger.log(logging.INFO if folded else logging.DEBUG, "📊 Rollups: folded %d mirrored entries", folded)
+            except Exception as e:
+                logger.exception("❌ Rollup sync failed: %s", e)
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,251 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# Longest single sleep; waking periodically keeps us honest across clock changes and suspends
+MAX_SLEEP_SECONDS = 300
+
+
+class CronSpec:
+    """Five-field cron expression: minute hour day-of-month month day-of-week
+
+    Supports ``*``, lists (``1,15``), ranges (``1-5``) and steps (``*/15``, ``8-18/2``).
+    Day-of-week runs 0-6 with 0 (or 7) as Sunday. As in cron, when both day fields
+    are restricted a day matches if either one does.
+    """
+
+    FIELDS = (('minute', 0, 59), ('hour', 0, 23), ('day', 1, 31), ('month', 1, 12), ('weekday', 0, 7))
+
+    def __init__(self, expression):
+        self.expression = expression
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron spec needs 5 fields, got {len(parts)}: {expression!r}")
+        values = {}
+        for part, (name, low, high) in zip(parts, self.FIELDS):
+            values[name] = self._parse_field(part, low, high)
+        self.minutes = sorted(values['minute'])
+        self.hours = sorted(values['hour'])
+        self.days = values['day']
+        self.months = values['month']
+        self.weekdays = {7 if day == 0 else day for day in values['weekday']}  # Store Sunday as 7
+        self.day_restricted = parts[2] != '*'
+        self.weekday_restricted = parts[4] != '*'
+
+    @staticmethod
+    def _parse_field(field, low, high):
+        values = set()
+        for chunk in field.split(','):
+            step = 1
+            if '/' in chunk:
+                chunk, step_text = chunk.split('/', 1)
+                step = int(step_text)
+                if step < 1:
+                    raise ValueError(f"Invalid step in cron field {field!r}")
+            if chunk == '*':
+                start, end = low, high
+            elif '-' in chunk:
+                start, end = (int(value) for value in chunk.split('-', 1))
+            else:
+                start = end = int(chunk)
+            if start < low or end > high or start > end:
+                raise ValueError(f"Cron field {field!r} out of range {low}-{high}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, day):
+        in_month = day.day in self.days
+        in_week = day.isoweekday() in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return in_month or in_week
+        return in_month and in_week
+
+    def next_after(self, after):
+        """First matching time strictly after ``after`` (a timezone-aware datetime, in its timezone)"""
+        tz = after.tzinfo
+        start = after.replace(tzinfo=None, second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.date()
+        for _ in range(366 * 5):  # Any valid spec matches within a few years (Feb 29)
+            if day.month in self.months and self._day_matches(day):
+                for hour in self.hours:
+                    if day == start.date() and hour < start.hour:
+                        continue
+                    for minute in self.minutes:
+                        candidate = datetime(day.year, day.month, day.day, hour, minute)
+                        if candidate >= start:
+                            return _localize(tz, candidate)
+            day += timedelta(days=1)
+        raise ValueError(f"Cron spec never fires: {self.expression!r}")
+
+
+def _localize(tz, naive):
+    # pytz zones need localize(); zoneinfo/datetime.timezone take tzinfo directly
+    if hasattr(tz, 'localize'):
+        return tz.localize(naive)
+    return naive.replace(tzinfo=tz)
+
+
+class Job:
+    def __init__(self, name, spec, func, catch_up_window):
+        self.name = name
+        self.spec = spec
+        self.func = func  # async callable(scheduled_for)
+        self.catch_up_window = catch_up_window
+        self.next_run = None
+        self.running = False
+
+
+class Scheduler:
+    """Runs named async jobs on cron specs, sleeping exactly until the next one is due
+
+    The last scheduled time each job ran for is persisted, so a run missed while
+    the bot was down is caught up on restart as long as it is within the job's
+    catch-up window. Jobs receive the time they were scheduled for, so a late
+    catch-up still works on the right day.
+    """
+
+    def __init__(self, tz, state_path=None, now=None):
+        self.tz = tz
+        self.state_path = state_path
+        self.jobs = {}
+        self._now = now or (lambda: datetime.now(self.tz))
+        self._state = self._load_state()
+        self._task = None
+        self._job_tasks = set()  # Strong references so running jobs aren't garbage collected
+        self._wakeup = asyncio.Event()
+
+    def add_job(self, name, cron, func, catch_up_window=timedelta(hours=6)):
+        spec = cron if isinstance(cron, CronSpec) else CronSpec(cron)
+        self.jobs[name] = Job(name, spec, func, catch_up_window)
+        self._wakeup.set()
+        return self.jobs[name]
+
+    def last_run(self, name):
+        stamp = self._state.get(name)
+        return datetime.fromisoformat(stamp).astimezone(self.tz) if stamp else None
+
+    def _load_state(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("⚠️ Could not read scheduler state, starting fresh: %s", e)
+            return {}
+
+    def _save_state(self):
+        if not self.state_path:
+            return
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f'{self.state_path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._state, f, indent=2)
+        os.replace(temp_path, self.state_path)
+
+    def _plan(self, job, now):
+        """Decide the next run: a missed run still inside the catch-up window, or the next fire time"""
+        last = self.last_run(job.name)
+        if last is not None:
+            missed = job.spec.next_after(last)
+            if missed <= now:
+                # Only the most recent missed fire matters
+                latest = missed
+                while True:
+                    following = job.spec.next_after(latest)
+                    if following > now:
+                        break
+                    latest = following
+                if now - latest <= job.catch_up_window:
+                    logger.info("⏰ Catching up missed '%s' run scheduled for %s", job.name, latest.isoformat())
+                    return latest
+        return job.spec.next_after(now)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            # Another process may have run jobs since we loaded the state (e.g. before a leader handover)
+            self._state = self._load_state()
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        """Stop scheduling and cancel job runs still in progress
+
+        A cancelled run isn't recorded, so whichever process runs the jobs next
+        catches it up; nothing keeps running here once stop() returns.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        job_tasks = list(self._job_tasks)
+        for task in job_tasks:
+            task.cancel()
+        if job_tasks:
+            await asyncio.gather(*job_tasks, return_exceptions=True)
+
+    async def run(self):
+        now = self._now()
+        for job in self.jobs.values():
+            job.next_run = self._plan(job, now)
+            logger.info("🗓️ Job '%s' (%s) next run: %s", job.name, job.spec.expression, job.next_run.isoformat())
+
+        while True:
+            self._wakeup.clear()
+            now = self._now()
+            for job in self.jobs.values():
+                if job.next_run is None:
+                    job.next_run = self._plan(job, now)
+            for job in self.jobs.values():
+                if job.next_run > now:
+                    continue
+                scheduled_for = job.next_run
+                job.next_run = job.spec.next_after(max(scheduled_for, now))
+                if job.running:
+                    logger.warning("⚠️ Skipping '%s' run for %s - previous run still going", job.name, scheduled_for.isoformat())
+                    continue
+                task = asyncio.create_task(self._run_job(job, scheduled_for))
+                self._job_tasks.add(task)
+                task.add_done_callback(self._job_tasks.discard)
+
+            if not self.jobs:
+                await self._wakeup.wait()
+                continue
+            upcoming = min(job.next_run for job in self.jobs.values())
+            delay = min(MAX_SLEEP_SECONDS, max(0.0, (upcoming - self._now()).total_seconds()))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run_job(self, job, scheduled_for):
+        job.running = True
+        logger.info("▶️ Running job '%s' scheduled for %s", job.name, scheduled_for.isoformat())
+        try:
+            await job.func(scheduled_for)
+        except asyncio.CancelledError:
+            job.running = False
+            logger.warning("⏹️ Job '%s' run for %s stopped before finishing; left to be caught up", job.name, scheduled_for.isoformat())
+            raise
+        except Exception as e:
+            logger.exception("❌ Job '%s' failed: %s", job.name, e)
+        job.running = False
+        # Record the slot even on failure so a crash loop doesn't re-fire it forever
+        self._state[job.name] = scheduled_for.isoformat()
+        self._save_state()
+
+    def describe(self):
+        """(name, spec, last run, next run) for every job"""
+        return [
+            (job.name, job.spec.expression, self.last_run(job.name), job.next_run)
+            for job in self.jobs.values()
+        ]
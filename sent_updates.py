@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class SentUpdateLog:
+    """Durable SQLite log of delivered responses whose "Response Sent" PATCH is still owed
+
+    An entry is recorded the moment its DM goes out and only removed once Notion
+    confirms the update, so a crash between the two leaves a record behind: the
+    PATCH is retried on restart and delivery runs skip the entry instead of
+    sending the DM again.
+    """
+
+    def __init__(self, path, max_attempts=20):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS pending_updates (
+                entry_id TEXT PRIMARY KEY,
+                delivered_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                dead INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS pending_updates_ready ON pending_updates (dead, next_attempt_at, delivered_at)')
+        self.conn.commit()
+
+    def __contains__(self, entry_id):
+        # Dead-lettered rows still count: the DM went out even if Notion never took the update
+        return self.conn.execute(
+            'SELECT 1 FROM pending_updates WHERE entry_id = ?', (entry_id,)
+        ).fetchone() is not None
+
+    def record(self, entry_id):
+        """Persist a delivered entry before anything else can go wrong"""
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR IGNORE INTO pending_updates (entry_id, delivered_at) VALUES (?, ?)',
+                (entry_id, time.time())
+            )
+
+    def due(self, limit):
+        """Oldest updates due for a (re)try, as (entry_id, delivered_at, attempts) tuples"""
+        return self.conn.execute(
+            '''SELECT entry_id, delivered_at, attempts FROM pending_updates
+               WHERE dead = 0 AND next_attempt_at <= ? ORDER BY delivered_at LIMIT ?''',
+            (time.time(), limit)
+        ).fetchall()
+
+    def ack(self, entry_ids):
+        """Remove updates Notion has confirmed"""
+        if not entry_ids:
+            return
+        with self.conn:
+            self.conn.executemany('DELETE FROM pending_updates WHERE entry_id = ?', [(entry_id,) for entry_id in entry_ids])
+
+    def retry_later(self, entry_id, error, delay):
+        """Record a failed attempt; gives up (dead-letters) after max_attempts"""
+        with self.conn:
+            self.conn.execute(
+                '''UPDATE pending_updates
+                   SET attempts = attempts + 1, next_attempt_at = ?, last_error = ?,
+                       dead = CASE WHEN attempts + 1 >= ? THEN 1 ELSE 0 END
+                   WHERE entry_id = ?''',
+                (time.time() + delay, str(error)[:500], self.max_attempts, entry_id)
+            )
+
+    def depth(self):
+        return self.conn.execute('SELECT COUNT(*) FROM pending_updates WHERE dead = 0').fetchone()[0]
+
+    def dead_count(self):
+        return self.conn.execute('SELECT COUNT(*) FROM pending_updates WHERE dead = 1').fetchone()[0]
+
+    def oldest_age(self):
+        """Seconds since the oldest unconfirmed delivery (0 when empty)"""
+        oldest = self.conn.execute('SELECT MIN(delivered_at) FROM pending_updates WHERE dead = 0').fetchone()[0]
+        return time.time() - oldest if oldest else 0.0
+
+    def close(self):
+        self.conn.close()
+
+
+class SentUpdater:
+    """Background worker pool flushing a SentUpdateLog to Notion
+
+    Delivered entry IDs are collected and pushed out by ``workers`` concurrent
+    updaters. The Notion client's token bucket is the real throttle, so with
+    at least as many workers as the rate limit the pool runs at the maximum
+    rate Notion allows without ever blocking a DM.
+    """
+
+    def __init__(self, log, update, workers=3, batch_size=30, idle_interval=5.0, max_backoff=300):
+        self.log = log
+        self.update = update  # async callable(entry_id) -> True on success
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.idle_interval = idle_interval
+        self.max_backoff = max_backoff
+        self.flushed = 0
+        self.failed_attempts = 0
+        self._latencies = deque(maxlen=1000)  # Seconds from DM to confirmed update
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._task = None
+
+    def record_delivered(self, entry_id):
+        """Durably note a delivered DM and wake the flusher; returns True once recorded"""
+        self.log.record(entry_id)
+        self._idle.clear()
+        self._wakeup.set()
+        return True
+
+    def is_pending(self, entry_id):
+        return entry_id in self.log
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        while True:
+            # Clear before flushing so an ID recorded mid-flush still wakes us
+            self._wakeup.clear()
+            try:
+                flushed = await self.flush_once()
+            except Exception as e:
+                logger.exception("❌ Sent-update worker error: %s", e)
+                flushed = 0
+            if flushed:
+                continue
+            if self.log.depth() == 0 or not self.log.due(1):
+                self._idle.set()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.idle_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def flush_once(self):
+        """Push one batch of due updates through the worker pool; returns how many Notion confirmed"""
+        pending = deque(self.log.due(self.batch_size))
+        if not pending:
+            return 0
+
+        confirmed = []
+
+        async def worker():
+            while pending:
+                entry_id, delivered_at, attempts = pending.popleft()
+                try:
+                    outcome = await self.update(entry_id)
+                    error = None if outcome is True else 'update failed'
+                except Exception as e:
+                    error = str(e)
+                if error is None:
+                    confirmed.append(entry_id)
+                    self._latencies.append(time.time() - delivered_at)
+                else:
+                    self.failed_attempts += 1
+                    self.log.retry_later(entry_id, error, min(self.max_backoff, 2 ** attempts))
+                    logger.warning("⚠️ Response Sent update for %s failed (attempt %d): %s", entry_id, attempts + 1, error,
+                                   extra={'entry_id': entry_id})
+
+        await asyncio.gather(*(worker() for _ in range(min(self.workers, len(pending)))))
+        # One commit per batch; a crash before it only repeats an idempotent PATCH
+        self.log.ack(confirmed)
+        self.flushed += len(confirmed)
+        return len(confirmed)
+
+    async def wait_idle(self, timeout=None):
+        """Wait until nothing is due (e.g. before reporting a delivery run); True if it got there"""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def _latency(self, fraction):
+        if not self._latencies:
+            return 0.0
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def stats(self):
+        return {
+            'depth': self.log.depth(),
+            'dead': self.log.dead_count(),
+            'oldest_age_seconds': round(self.log.oldest_age(), 1),
+            'flushed': self.flushed,
+            'failed_attempts': self.failed_attempts,
+            'flush_latency_p50': round(self._latency(0.5), 3),
+            'flush_latency_p95': round(self._latency(0.95), 3),
+            'flush_latency_max': round(max(self._latencies, default=0.0), 3),
+        }
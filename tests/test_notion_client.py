@@ -0,0 +1,56 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notion_client import NotionAPIError, NotionClient, TokenBucket  # noqa: E402
+
+
+def test_token_bucket_below_one_request_per_second():
+    async def scenario():
+        bucket = TokenBucket(rate=0.5)
+        await asyncio.wait_for(bucket.acquire(), timeout=1)
+        # The next token takes 2s to refill; it must come, not hang
+        bucket.updated -= 2
+        await asyncio.wait_for(bucket.acquire(), timeout=1)
+    asyncio.run(scenario())
+
+
+def test_create_page_uses_existing_row_instead_of_retrying():
+    async def scenario():
+        client = NotionClient('token', backoff_base=0)
+        calls = []
+
+        async def request(method, path, payload=None, idempotent=True):
+            calls.append(idempotent)
+            raise NotionAPIError(502, 'Bad Gateway', may_have_applied=True)
+
+        async def find_existing():
+            return {'id': 'created-before-the-502'}
+
+        client.request = request
+        page = await client.create_page({'properties': {}}, find_existing=find_existing)
+        assert page == {'id': 'created-before-the-502'}
+        assert calls == [False]
+    asyncio.run(scenario())
+
+
+def test_create_page_does_not_retry_ambiguous_failure_blind():
+    async def scenario():
+        client = NotionClient('token', backoff_base=0)
+        calls = []
+
+        async def request(method, path, payload=None, idempotent=True):
+            calls.append(path)
+            raise NotionAPIError(0, 'TimeoutError', may_have_applied=True)
+
+        client.request = request
+        try:
+            await client.create_page({'properties': {}})
+        except NotionAPIError:
+            pass
+        else:
+            raise AssertionError('create_page should have raised')
+        assert calls == ['/pages']
+    asyncio.run(scenario())
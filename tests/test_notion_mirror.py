@@ -0,0 +1,44 @@
+import json
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notion_mirror import NotionMirror  # noqa: E402
+
+
+def page(page_id, user_id, date, submission_id=None):
+    properties = {
+        'Date': {'date': {'start': date}},
+        'Discord User ID': {'rich_text': [{'plain_text': user_id}]},
+    }
+    if submission_id:
+        properties['Submission ID'] = {'rich_text': [{'plain_text': submission_id}]}
+    return {'id': page_id, 'properties': properties, 'last_edited_time': '2026-01-05T10:00:00.000Z'}
+
+
+def test_entry_keys_carry_submission_ids(tmp_path):
+    mirror = NotionMirror(str(tmp_path / 'mirror.db'))
+    mirror.upsert([page('a', '1', '2026-01-05T09:00:00+02:00', '111'), page('b', '1', '2026-01-05', None)])
+    assert sorted(mirror.entry_keys('2026-01-01')) == [('', '1', '2026-01-05'), ('111', '1', '2026-01-05')]
+    mirror.close()
+
+
+def test_mirror_without_submission_ids_is_migrated(tmp_path):
+    path = str(tmp_path / 'mirror.db')
+    conn = sqlite3.connect(path)
+    conn.execute('''CREATE TABLE entries (
+        page_id TEXT PRIMARY KEY, entry_date TEXT NOT NULL, student_name TEXT NOT NULL, discord_user_id TEXT NOT NULL,
+        has_response INTEGER NOT NULL, response_sent INTEGER NOT NULL, status TEXT, hours_worked REAL,
+        last_edited_time TEXT NOT NULL, page_json TEXT NOT NULL)''')
+    conn.execute("INSERT INTO entries VALUES ('a', '2026-01-05', 'Ana', '1', 0, 0, NULL, 8, '', ?)",
+                 (json.dumps(page('a', '1', '2026-01-05', '111')),))
+    conn.commit()
+    conn.close()
+
+    mirror = NotionMirror(path)
+    assert mirror.entry_keys('2026-01-01') == [('111', '1', '2026-01-05')]
+    mirror.upsert([page('b', '2', '2026-01-06', '222')])
+    assert len(mirror.entry_keys('2026-01-01')) == 2
+    mirror.close()
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from bench_parser import EXPECTED, STRESS, build_corpus, legacy_parse  # noqa: E402
+from ciso_parser import parse_sections  # noqa: E402
+
+CORPUS = build_corpus()
+
+
+@pytest.mark.parametrize('case', sorted(EXPECTED))
+def test_corpus_case_parses_as_expected(case):
+    parsed = parse_sections(CORPUS[case])
+    for field, expected in EXPECTED[case].items():
+        assert parsed[field] == expected, f"{case}.{field}"
+
+
+def test_well_formed_matches_legacy_parser():
+    parsed = parse_sections(CORPUS['well_formed'])
+    for field, expected in legacy_parse(CORPUS['well_formed']).items():
+        assert parsed[field] == expected, field
+
+
+@pytest.mark.parametrize('shape', sorted(STRESS))
+def test_stress_shape_parses(shape):
+    # Timing is the benchmark's job; this only checks the shapes parse without raising
+    parsed = parse_sections(STRESS[shape](20_000))
+    assert isinstance(parsed['missing_sections'], list)
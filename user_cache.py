@@ -0,0 +1,76 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class UserCache:
+    """Bounded LRU/TTL cache of users fetched from the API by ID
+
+    Stands in for the gateway's member cache when it's turned off: a student is
+    fetched once when first needed and kept while recently used, so memory stays
+    at ``max_size`` users no matter how many members the guilds have. Concurrent
+    lookups for the same ID share one fetch.
+    """
+
+    def __init__(self, fetch, max_size=1024, ttl=6 * 3600):
+        self.fetch = fetch  # async callable(user_id) -> user; raises when the user doesn't exist
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._users = OrderedDict()  # user_id -> (user, fetched_at), oldest first
+        self._in_flight = {}  # user_id -> Future shared by concurrent lookups
+
+    def __len__(self):
+        return len(self._users)
+
+    def peek(self, user_id):
+        """Cached user or None, without fetching"""
+        cached = self._users.get(user_id)
+        if cached is None or time.monotonic() - cached[1] > self.ttl:
+            return None
+        self._users.move_to_end(user_id)
+        return cached[0]
+
+    async def get(self, user_id):
+        user = self.peek(user_id)
+        if user is not None:
+            self.hits += 1
+            return user
+        self.misses += 1
+        pending = self._in_flight.get(user_id)
+        if pending is not None:
+            return await pending
+        pending = asyncio.get_running_loop().create_future()
+        self._in_flight[user_id] = pending
+        try:
+            user = await self.fetch(user_id)
+        except asyncio.CancelledError:
+            pending.cancel()
+            raise
+        except Exception as e:
+            pending.set_exception(e)
+            pending.exception()  # Mark retrieved so an unawaited share doesn't warn
+            raise
+        finally:
+            self._in_flight.pop(user_id, None)
+        pending.set_result(user)
+        self.put(user_id, user)
+        return user
+
+    def put(self, user_id, user):
+        """Cache a user seen elsewhere (e.g. the author of a journal message)"""
+        self._users[user_id] = (user, time.monotonic())
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_size:
+            self._users.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._users),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+        }